@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the contacts application.
+
+Each module is a standalone script, run from the project root, e.g.:
+
+    python -m benchmarks.sqlite_concurrency
+"""
@@ -0,0 +1,278 @@
+"""
+WSGI vs ASGI under a mixed database and weather load.
+
+Runs the same request mix through Django's WSGIHandler (a pool of
+threads, as a threaded WSGI server would) and its ASGIHandler (concurrent
+tasks on one event loop, as uvicorn would) at each concurrency level:
+
+- list page (async ContactListView)
+- API list and retrieve (async ContactViewSet.list/retrieve)
+- weather lookups against a stubbed Nominatim/Open-Meteo that answers
+  after --upstream-ms; --weather-miss-ratio of them are for cities not
+  seen before, so they go upstream and store the result
+
+Requests are built in process and handed to the handlers directly, so no
+HTTP server or client is involved and the middleware, views, database
+work and connection handling (one connection per request) are the same as
+in production. The report has throughput and per-kind latency for both.
+
+Usage:
+    python -m benchmarks.asgi_vs_wsgi --size 10000 --requests 400 --concurrency 8 32
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.suite import StubResponse
+from benchmarks.utils import setup_django, summarize
+
+# (kind, weight)
+MIX = [('list_page', 3), ('api_list', 2), ('api_retrieve', 2), ('weather', 3)]
+
+HOST = 'localhost'
+
+
+def make_requests(count, size, miss_ratio, seed, mode):
+    """The request mix as (kind, path, query string) tuples, same for both modes."""
+    rng = random.Random(seed)
+    kinds = [kind for kind, weight in MIX for _ in range(weight)]
+    requests = []
+    for i in range(count):
+        kind = rng.choice(kinds)
+        if kind == 'list_page':
+            requests.append((kind, '/', f'page={rng.randint(1, 20)}'))
+        elif kind == 'api_list':
+            requests.append((kind, '/api/contacts/', rng.choice(['', 'status=new', 'ordering=last_name'])))
+        elif kind == 'api_retrieve':
+            requests.append((kind, f'/api/contacts/{rng.randint(1, size)}/', ''))
+        else:
+            # A city never looked up before goes upstream twice (geocode, weather)
+            city = f'{mode}-city-{i}' if rng.random() < miss_ratio else f'known-city-{rng.randint(1, 20)}'
+            requests.append((kind, f'/weather/{city}/', ''))
+    return requests
+
+
+def slow_upstream(delay):
+    """Stubbed requests.get answering after delay seconds, with per-city coordinates."""
+    from contacts.weather_views import NOMINATIM_API
+
+    def get(url, params=None, **kwargs):
+        time.sleep(delay)
+        if url == NOMINATIM_API:
+            spread = zlib.crc32(params['q'].encode()) % 10000 / 10000
+            return StubResponse([{'lat': str(49 + 5 * spread), 'lon': str(14 + 10 * spread)}])
+        return StubResponse({
+            'current_weather': {'temperature': 12.5, 'windspeed': 10.1, 'weathercode': 3},
+            'hourly': {'relativehumidity_2m': [70]},
+        })
+
+    return get
+
+
+def wsgi_environ(path, query):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_ACCEPT': 'application/json, text/html',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def asgi_scope(path, query):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'accept', b'application/json, text/html')],
+        'client': ('127.0.0.1', 50000),
+        'server': (HOST, 80),
+    }
+
+
+def run_wsgi(requests, concurrency):
+    """Serve the requests from a pool of threads; returns (kind, seconds, status) per request."""
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    pending = iter(requests)
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            kind, path, query = item
+            status = []
+            start = time.perf_counter()
+            response = handler(wsgi_environ(path, query), lambda s, headers, exc_info=None: status.append(s))
+            try:
+                b''.join(response)
+            finally:
+                response.close()  # request_finished: closes the thread's connection
+            results.append((kind, time.perf_counter() - start, int(status[0].split()[0])))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_asgi(requests, concurrency):
+    """Serve the requests from concurrent tasks on one event loop."""
+    from django.core.handlers.asgi import ASGIHandler
+
+    application = ASGIHandler()
+
+    async def request(path, query):
+        status = []
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if body_sent:
+                # Client stays connected; Django cancels this wait once it has responded
+                await asyncio.Event().wait()
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await application(asgi_scope(path, query), receive, send)
+        return status[0]
+
+    async def main():
+        pending = iter(requests)
+        results = []
+
+        async def worker():
+            for kind, path, query in pending:
+                start = time.perf_counter()
+                status = await request(path, query)
+                results.append((kind, time.perf_counter() - start, status))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    return asyncio.run(main())
+
+
+def report(results, seconds):
+    errors = sum(1 for _, _, status in results if status >= 400)
+    by_kind = {}
+    for kind, latency, _ in results:
+        by_kind.setdefault(kind, []).append(latency)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(len(results) / seconds, 1),
+        'all': summarize([latency for _, latency, _ in results]),
+        **{kind: summarize(latencies) for kind, latencies in sorted(by_kind.items())},
+    }
+
+
+def run_mode(mode, runner, args, concurrency):
+    from django.core.cache import cache
+
+    cache.clear()
+    requests = make_requests(args.requests, args.size, args.weather_miss_ratio, args.seed, f'{mode}{concurrency}')
+    # Warm-up: imports, template loading, URL resolver
+    runner(make_requests(20, args.size, args.weather_miss_ratio, args.seed + 1, f'warmup-{mode}{concurrency}'), concurrency)
+    started = time.perf_counter()
+    results = runner(requests, concurrency)
+    return report(results, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=10000, help='Contacts in the database')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per mode and concurrency level')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32],
+                        help='WSGI threads / ASGI tasks serving at once')
+    parser.add_argument('--upstream-ms', type=float, default=100, help='Latency of the stubbed weather APIs')
+    parser.add_argument('--weather-miss-ratio', type=float, default=0.5,
+                        help='Share of weather lookups for cities not cached yet')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    # Production-like: no query log, no shared metrics snapshots
+    setup_django(METRICS_DIR=None, DEBUG=False)
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection, connections
+
+    report_data = {
+        'benchmark': 'asgi_vs_wsgi',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'django': django.get_version(),
+        'vendor': connection.vendor,
+        'params': vars(args),
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            connections.settings['default']['TEST']['NAME'] = str(Path(tmp) / 'bench.sqlite3')
+            # Concurrent weather writes need the WAL/BEGIN IMMEDIATE profile
+            # (see benchmarks.sqlite_concurrency) in either mode
+            connections.settings['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20}
+            settings.SQLITE_PERFORMANCE_MODE = True
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('seed_contacts', count=args.size, seed=args.seed, stdout=io.StringIO())
+            connections.close_all()
+            with mock.patch('contacts.weather_views.requests.get', side_effect=slow_upstream(args.upstream_ms / 1000)):
+                for concurrency in args.concurrency:
+                    print(f'Running at concurrency {concurrency}...', flush=True)
+                    report_data['results'][str(concurrency)] = {
+                        'wsgi': run_mode('wsgi', run_wsgi, args, concurrency),
+                        'asgi': run_mode('asgi', run_asgi, args, concurrency),
+                    }
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    output = json.dumps(report_data, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
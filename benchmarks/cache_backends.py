@@ -0,0 +1,187 @@
+"""
+Cache backend latency and sharing benchmark.
+
+Compares LocMemCache, FileBasedCache and contacts.shared_cache.SQLiteCache
+(each in a fresh temporary location) on:
+
+- get of a hit for the values the app caches: geocoded coordinates, a
+  weather payload and a rendered contact card
+- get of a miss, get_many of 20 keys, set, add and incr
+- get from a thread's first cache call, as the sync code of each ASGI
+  request runs on a new thread
+- workers: --processes forked workers look up --cities cities, storing
+  each one they miss (as the weather view does); counts the misses, i.e.
+  upstream calls, per backend
+
+Usage:
+    python -m benchmarks.cache_backends --ops 20000 --processes 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import setup_django, summarize
+
+COORDINATES = {'lat': 52.2297, 'lon': 21.0122}
+
+WEATHER = {
+    'temperature': 12.5,
+    'windspeed': 10.1,
+    'weathercode': 3,
+    'humidity': 70,
+    'hourly': {'temperature_2m': [round(10 + i % 24 * 0.4, 1) for i in range(168)]},
+}
+
+CARD = (
+    '<div class="card contact-card"><div class="card-body">'
+    '<h5 class="card-title">Anna Nowak</h5>'
+    '<p class="card-text"><a href="tel:+48600000001">+48 600 000 001</a><br>'
+    '<a href="mailto:anna.nowak@example.com">anna.nowak@example.com</a><br>Warszawa</p>'
+    '<span class="badge bg-primary">new</span></div></div>'
+) * 4
+
+
+def backends(root, max_entries):
+    return {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(root / 'file'),
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        },
+        'sqlite': {
+            'BACKEND': 'contacts.shared_cache.SQLiteCache',
+            'LOCATION': str(root / 'cache.sqlite3'),
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        },
+    }
+
+
+def create(config):
+    """A backend instance, as django.core.cache.caches builds one."""
+    from django.utils.module_loading import import_string
+
+    params = dict(config)
+    backend = import_string(params.pop('BACKEND'))
+    return backend(params.pop('LOCATION', ''), params)
+
+
+def timed(op, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        op(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def timed_on_new_threads(op, count):
+    latencies = []
+
+    def run(i):
+        start = time.perf_counter()
+        op(i)
+        latencies.append(time.perf_counter() - start)
+
+    for i in range(count):
+        thread = threading.Thread(target=run, args=(i,))
+        thread.start()
+        thread.join()
+    return summarize(latencies)
+
+
+def measure_latency(cache, ops, keys):
+    results = {}
+    for name, value in [('coordinates', COORDINATES), ('weather', WEATHER), ('card', CARD)]:
+        for i in range(keys):
+            cache.set(f'{name}:{i}', value, None)
+        results[f'get_{name}'] = timed(lambda i: cache.get(f'{name}:{i % keys}'), ops)
+    results['get_new_thread'] = timed_on_new_threads(lambda i: cache.get(f'weather:{i % keys}'), ops // 10)
+    results['get_miss'] = timed(lambda i: cache.get(f'missing:{i}'), ops)
+    batch = [f'weather:{i}' for i in range(20)]
+    results['get_many_20'] = timed(lambda i: cache.get_many(batch), ops // 10)
+    results['set_weather'] = timed(lambda i: cache.set(f'weather:{i % keys}', WEATHER, 900), ops // 10)
+    results['add'] = timed(lambda i: cache.add(f'lock:{i}', 1, 30), ops // 10)
+    cache.set('version', 1, None)
+    results['incr'] = timed(lambda i: cache.incr('version'), ops // 10)
+    return results
+
+
+def lookup_cities(config, cities, lookups, seed, misses):
+    cache = create(config)
+    rng = random.Random(seed)
+    missed = 0
+    for _ in range(lookups):
+        key = f'weather:city-{rng.randrange(cities)}'
+        if cache.get(key) is None:
+            missed += 1
+            cache.set(key, WEATHER, 900)
+    misses.put(missed)
+
+
+def measure_sharing(config, processes, cities, lookups, seed):
+    """Upstream calls when forked workers share (or do not share) a backend."""
+    context = multiprocessing.get_context('fork')
+    misses = context.Queue()
+    workers = [
+        context.Process(target=lookup_cities, args=(config, cities, lookups, seed + n, misses))
+        for n in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    total = sum(misses.get() for _ in workers)
+    return {'processes': processes, 'cities': cities, 'lookups': processes * lookups, 'misses': total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=20000, help='Timed gets per value kind')
+    parser.add_argument('--keys', type=int, default=1000, help='Distinct keys per value kind')
+    parser.add_argument('--processes', type=int, default=4, help='Forked workers in the sharing run')
+    parser.add_argument('--cities', type=int, default=200, help='Distinct cities in the sharing run')
+    parser.add_argument('--lookups', type=int, default=1000, help='Lookups per worker in the sharing run')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup_django()
+
+    report_data = {
+        'benchmark': 'cache_backends',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'params': vars(args),
+        'results': {},
+    }
+    for name in ['locmem', 'file', 'sqlite']:
+        print(f'Running {name}...', flush=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Room for every key: the runs measure access, not eviction
+            configs = backends(Path(tmp), max_entries=10 * (args.keys + args.ops + args.cities))
+            report_data['results'][name] = {
+                'latency': measure_latency(create(configs[name]), args.ops, args.keys),
+            }
+        with tempfile.TemporaryDirectory() as tmp:
+            configs = backends(Path(tmp), max_entries=10 * args.cities)
+            report_data['results'][name]['sharing'] = measure_sharing(
+                configs[name], args.processes, args.cities, args.lookups, args.seed
+            )
+
+    output = json.dumps(report_data, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare two benchmark reports produced by benchmarks.suite.
+
+Prints the p50/p99 latency of every scenario side by side with the
+relative change, and flags regressions above the threshold.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+
+def flatten(results, prefix=''):
+    """Yield (scenario path, summary dict) for every latency summary."""
+    for key, value in results.items():
+        path = f'{prefix}/{key}' if prefix else key
+        if isinstance(value, dict) and 'p50_ms' in value:
+            yield path, value
+        elif isinstance(value, dict):
+            yield from flatten(value, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Regression threshold in percent')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = dict(flatten(json.load(f)['results']))
+    with open(args.candidate) as f:
+        candidate = dict(flatten(json.load(f)['results']))
+
+    regressions = 0
+    print(f"{'scenario':<45} {'p50 base':>10} {'p50 new':>10} {'change':>8} {'p99 base':>10} {'p99 new':>10}")
+    for path in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[path], candidate[path]
+        change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(
+            f"{path:<45} {old['p50_ms']:>10.2f} {new['p50_ms']:>10.2f} {change:>7.1f}% "
+            f"{old['p99_ms']:>10.2f} {new['p99_ms']:>10.2f}{flag}"
+        )
+
+    for path in sorted(baseline.keys() - candidate.keys()):
+        print(f'{path:<45} missing from candidate')
+    for path in sorted(candidate.keys() - baseline.keys()):
+        print(f'{path:<45} new in candidate')
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Database throughput benchmark at increasing worker counts.
+
+Creates a throwaway test database on the configured backend (set
+DB_ENGINE=postgresql and the POSTGRES_* variables to benchmark
+PostgreSQL), seeds it, then runs a read-heavy mix of list pages,
+retrieves and creates from 1, 8 and 16 concurrent workers.
+
+Usage:
+    DB_ENGINE=postgresql python -m benchmarks.db_throughput --workers 1 8 16
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from benchmarks.utils import setup_django, summarize
+
+
+def seed(count):
+    from contacts.models import Contact, ContactStatus
+
+    statuses = [ContactStatus.objects.get_or_create(name=name)[0] for name in ('new', 'in progress', 'lost', 'outdated')]
+    Contact.objects.bulk_create(
+        [
+            Contact(
+                first_name='Seed',
+                last_name=f'Contact{i}',
+                phone_number=f'+4860{i:07d}',
+                email=f'seed{i}@bench.example.com',
+                city=random.choice(['Warszawa', 'Kraków', 'Gdańsk', 'Poznań', 'Wrocław']),
+                status=random.choice(statuses),
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+
+
+def run_workers(workers, duration, max_id):
+    from django.db import connections
+
+    from contacts.db import retry_on_locked
+    from contacts.models import Contact, ContactStatus
+
+    status_id = ContactStatus.objects.values_list('pk', flat=True).first()
+
+    @retry_on_locked
+    def create():
+        token = uuid.uuid4().hex
+        Contact.objects.create(
+            first_name='Bench',
+            last_name='Writer',
+            phone_number=f'+48{int(token[:12], 16) % 10**9:09d}',
+            email=f'{token}@bench.example.com',
+            city='Warszawa',
+            status_id=status_id,
+        )
+
+    def list_page():
+        list(Contact.objects.select_related('status').order_by('-date_added')[:20])
+        Contact.objects.count()
+
+    def retrieve():
+        Contact.objects.select_related('status').filter(pk=random.randint(1, max_id)).first()
+
+    operations = [(list_page, 0.7), (retrieve, 0.2), (create, 0.1)]
+    latencies = {op.__name__: [] for op, _ in operations}
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        local = {name: [] for name in latencies}
+        failed = 0
+        while time.monotonic() < deadline:
+            op = random.choices([op for op, _ in operations], weights=[w for _, w in operations])[0]
+            start = time.perf_counter()
+            try:
+                op()
+                local[op.__name__].append(time.perf_counter() - start)
+            except Exception:
+                failed += 1
+        connections.close_all()
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        'workers': workers,
+        'ops_per_second': round(total / duration, 1),
+        'errors': errors[0],
+        'operations': {name: summarize(values) for name, values in latencies.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 16])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per worker count')
+    parser.add_argument('--rows', type=int, default=10000, help='Contacts to seed')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection, connections
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            # Threads need a file database, not the shared in-memory one
+            connections.settings['default']['TEST']['NAME'] = str(Path(tmp) / 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(args.rows)
+            results = [run_workers(workers, args.duration, args.rows) for workers in args.workers]
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    output = json.dumps({
+        'benchmark': 'db_throughput',
+        'vendor': connection.vendor,
+        'params': vars(args),
+        'results': results,
+    }, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
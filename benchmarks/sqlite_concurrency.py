@@ -0,0 +1,125 @@
+"""
+Mixed reader/writer benchmark for SQLite settings.
+
+Runs the same workload against a fresh database twice: once with the
+default SQLite configuration and once with SQLITE_PERFORMANCE_MODE
+(WAL, synchronous=NORMAL, BEGIN IMMEDIATE, retry on lock contention).
+Writers mimic CSV import rows and API creates (a read followed by an
+INSERT in one transaction), readers fetch a list page and its count.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency --writers 4 --readers 8 --duration 10
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from benchmarks.utils import setup_django, summarize
+
+
+def run_profile(name, db_path, performance_mode, args):
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import OperationalError, connections, transaction
+
+    from contacts.db import retry_on_locked
+    from contacts.models import Contact, ContactStatus
+
+    connections.close_all()
+    db_settings = connections.settings['default']
+    db_settings['NAME'] = str(db_path)
+    db_settings['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20} if performance_mode else {}
+    settings.SQLITE_PERFORMANCE_MODE = performance_mode
+
+    call_command('migrate', verbosity=0)
+    ContactStatus.objects.get_or_create(name='new')
+    connections.close_all()
+
+    def write_contact():
+        with transaction.atomic():
+            contact_status = ContactStatus.objects.get(name='new')
+            token = uuid.uuid4().hex
+            Contact.objects.create(
+                first_name='Bench',
+                last_name='Writer',
+                phone_number=f'+48{int(token[:12], 16) % 10**9:09d}',
+                email=f'{token}@bench.example.com',
+                city='Warszawa',
+                status=contact_status,
+            )
+
+    if performance_mode:
+        write_op = retry_on_locked(lambda: write_contact())
+    else:
+        write_op = write_contact
+
+    def read_page():
+        list(Contact.objects.select_related('status').order_by('-date_added')[:20])
+        Contact.objects.count()
+
+    results = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def worker(kind, op):
+        latencies = []
+        failed = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                op()
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                failed += 1
+        connections.close_all()
+        with lock:
+            results[kind].extend(latencies)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=('write', write_op)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=worker, args=('read', read_page)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {'profile': name}
+    for kind in ('write', 'read'):
+        report[kind] = {
+            **summarize(results[kind]),
+            'ops_per_second': round(len(results[kind]) / args.duration, 1),
+            'errors': errors[kind],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup_django()
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, performance_mode in (('default', False), ('performance', True)):
+            db_path = Path(tmp) / f'{name}.sqlite3'
+            reports.append(run_profile(name, db_path, performance_mode, args))
+
+    output = json.dumps({'benchmark': 'sqlite_concurrency', 'params': vars(args), 'results': reports}, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+End-to-end benchmark suite for the contacts application.
+
+For every dataset size a throwaway test database is created and filled
+with ``seed_contacts``. Requests then go through the full Django stack
+(middleware, views, templates, serializers) using the test client:
+
+- list page at several sort and search settings
+- API list and retrieve, and typeahead suggestions with a cold and a
+  warm cache
+- list page template rendering at 20 and 100 contacts per page, with
+  contact card fragment caching off, cold and warm
+- CSV import throughput (rows per second), plus re-importing the same
+  file in upsert mode
+- weather lookups against a stubbed Nominatim/Open-Meteo upstream
+
+The JSON report can be compared between commits with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.suite --sizes 10000 100000 1000000 --output report.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from benchmarks.utils import BASE_DIR, setup_django, summarize
+
+LIST_SCENARIOS = [
+    ('newest', {}),
+    ('oldest', {'sort': 'date_added'}),
+    ('last_name', {'sort': 'last_name'}),
+    ('last_name_desc', {'sort': '-last_name'}),
+    ('search_name', {'search': 'kowal'}),
+    ('search_city', {'search': 'Kraków', 'sort': 'last_name'}),
+    ('search_phone', {'search': '600'}),
+    ('search_miss', {'search': 'zzzz-no-match'}),
+    ('deep_page', {'page': 50}),
+]
+
+
+def time_requests(client, iterations, make_request):
+    """Run make_request repeatedly and return latency statistics."""
+    make_request(client)  # Warm-up: caches, query compilation, template loading
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = make_request(client)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Benchmark request failed with HTTP {response.status_code}')
+    return summarize(latencies)
+
+
+def bench_list_page(client, iterations):
+    from django.urls import reverse
+
+    url = reverse('contact_list')
+    return {
+        name: time_requests(client, iterations, lambda c, p=params: c.get(url, p))
+        for name, params in LIST_SCENARIOS
+    }
+
+
+def bench_api(client, iterations, max_id):
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    list_url = reverse('contact-list')
+    suggest_url = reverse('contact-suggest')
+
+    def suggest_cold(c):
+        cache.clear()
+        return c.get(suggest_url, {'q': random.choice(['k', 'kow', 'now', 'anna', 'wis', 'ma'])})
+
+    return {
+        'list': time_requests(client, iterations, lambda c: c.get(list_url)),
+        'list_page_10': time_requests(client, iterations, lambda c: c.get(list_url, {'page': 10})),
+        'retrieve': time_requests(
+            client,
+            iterations,
+            lambda c: c.get(reverse('contact-detail', kwargs={'pk': random.randint(1, max_id)})),
+        ),
+        'suggest_cold': time_requests(client, iterations, suggest_cold),
+        'suggest_warm': time_requests(client, iterations, lambda c: c.get(suggest_url, {'q': 'kow'})),
+    }
+
+
+def time_calls(iterations, call, before=None):
+    """Time call() repeatedly (running before() untimed first) and return latency statistics."""
+    latencies = []
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def bench_templates(iterations, page_sizes=(20, 100)):
+    """Template time for one list page: contacts are loaded once, only rendering is timed."""
+    from django.core.cache import cache
+    from django.core.paginator import Paginator
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from contacts import caching
+    from contacts.models import Contact, ContactStatus
+
+    request = RequestFactory().get('/')
+    result = {}
+    for rows in page_sizes:
+        contacts = list(Contact.objects.select_related('status').order_by('-date_added', '-id')[:rows])
+        page = Paginator(contacts, rows).page(1)
+        context = {
+            'contacts': contacts,
+            'page_obj': page,
+            'is_paginated': False,
+            'statuses': list(ContactStatus.objects.order_by('name')),
+            'card_version': caching.get_version(caching.STATUSES),
+        }
+
+        def render(seconds):
+            return lambda: render_to_string(
+                'contacts/contact_list.html', {**context, 'card_cache_seconds': seconds}, request=request
+            )
+
+        render(0)()  # Warm-up: template loading
+        result[f'rows_{rows}'] = {
+            'uncached': time_calls(iterations, render(0)),
+            'cache_cold': time_calls(iterations, render(3600), before=cache.clear),
+            'cache_warm': time_calls(iterations, render(3600)),
+        }
+    return result
+
+
+def bench_csv_import(client, rows):
+    from django.urls import reverse
+
+    from contacts.management.commands.seed_contacts import CITIES, FIRST_NAMES, LAST_NAMES, email_local_part
+
+    token = random.randint(0, 10**6)
+    lines = ['first_name,last_name,phone_number,email,city,status']
+    for i in range(rows):
+        first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        lines.append(
+            f'{first},{last},+48 7{token % 100:02d} {i // 1000:03d} {i % 1000:03d},'
+            f'{email_local_part(first, last)}.import{token}.{i}@example.com,{random.choice(CITIES)[0]},new'
+        )
+    content = '\n'.join(lines).encode('utf-8')
+
+    result = {}
+    for mode in ('create', 'upsert'):
+        upload = io.BytesIO(content)
+        upload.name = 'benchmark.csv'
+        start = time.perf_counter()
+        response = client.post(reverse('import_csv'), {'csv_file': upload, 'mode': mode})
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f'CSV import failed with HTTP {response.status_code}')
+        result[mode] = {'rows': rows, 'seconds': round(elapsed, 3), 'rows_per_second': round(rows / elapsed, 1)}
+    return result
+
+
+class StubResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def stub_upstream(url, params=None, **kwargs):
+    from contacts.weather_views import NOMINATIM_API
+
+    if url == NOMINATIM_API:
+        return StubResponse([{'lat': '52.2297', 'lon': '21.0122'}])
+    return StubResponse({
+        'current_weather': {'temperature': 12.5, 'windspeed': 10.1, 'weathercode': 3},
+        'hourly': {'relativehumidity_2m': [70]},
+    })
+
+
+def bench_weather(client, iterations):
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    from contacts.management.commands.seed_contacts import CITIES
+
+    def cold(c):
+        cache.clear()
+        return c.get(reverse('get_weather', kwargs={'city': random.choice(CITIES)[0]}))
+
+    def warm(c):
+        return c.get(reverse('get_weather', kwargs={'city': 'Warszawa'}))
+
+    with mock.patch('contacts.weather_views.requests.get', side_effect=stub_upstream):
+        return {
+            'cache_miss': time_requests(client, iterations, cold),
+            'cache_hit': time_requests(client, iterations, warm),
+        }
+
+
+def run_size(size, args):
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test import Client
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            connections.settings['default']['TEST']['NAME'] = str(Path(tmp) / 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            call_command('seed_contacts', count=size, seed=args.seed, stdout=io.StringIO())
+            seed_seconds = time.perf_counter() - started
+
+            client = Client()
+            result = {
+                'seed_rows_per_second': round(size / seed_seconds, 1),
+                'list_page': bench_list_page(client, args.iterations),
+                'api': bench_api(client, args.iterations, size),
+                'templates': bench_templates(args.iterations),
+                'csv_import': bench_csv_import(client, args.import_rows),
+                'weather': bench_weather(client, args.iterations),
+            }
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--iterations', type=int, default=30, help='Timed requests per scenario')
+    parser.add_argument('--import-rows', type=int, default=2000, help='Rows in the CSV import test')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    # Keep benchmark runs out of the shared metrics snapshots
+    setup_django(METRICS_DIR=None)
+    import django
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    random.seed(args.seed)
+
+    report = {
+        'benchmark': 'suite',
+        'revision': git_revision(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'vendor': connection.vendor,
+        'params': vars(args),
+        'results': {},
+    }
+    for size in args.sizes:
+        print(f'Running benchmarks at {size} rows...', flush=True)
+        report['results'][str(size)] = run_size(size, args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
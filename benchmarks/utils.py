@@ -0,0 +1,43 @@
+"""
+Shared helpers for benchmark scripts.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from contacts.loadgen import percentile
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database_name=None, **settings_overrides):
+    """
+    Configure Django for a benchmark run.
+
+    Args:
+        database_name: Optional SQLite file to use instead of db.sqlite3
+        **settings_overrides: Extra settings applied before django.setup()
+    """
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'contacts_project.settings')
+
+    import django
+    from django.conf import settings
+
+    if database_name is not None:
+        settings.DATABASES['default']['NAME'] = str(database_name)
+    for name, value in settings_overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+
+def summarize(latencies):
+    """Summarize a list of latencies in seconds as milliseconds."""
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
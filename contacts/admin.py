@@ -1,5 +1,12 @@
-from django.contrib import admin
-from .models import Contact, ContactStatus
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from . import bulk, stats
+from .models import CityLocation, Contact, ContactStat, ContactStatus, RequestProfile, WeatherObservation
 
 
 @admin.register(ContactStatus)
@@ -9,11 +16,149 @@ class ContactStatusAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
 
 
+class ContactPaginator(Paginator):
+    """Paginator that takes the unfiltered total from the ContactStat counters."""
+    
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            return stats.total(using=self.object_list.db)
+        return super().count
+
+
+class CityListFilter(admin.SimpleListFilter):
+    """City filter offering the largest cities, read from the ContactStat counters."""
+    title = 'city'
+    parameter_name = 'city'
+    limit = 50
+    
+    def lookups(self, request, model_admin):
+        cities = ContactStat.objects.filter(dimension=stats.CITY, count__gt=0).order_by('-count', 'key')
+        return [(city, f'{city} ({count})') for city, count in cities.values_list('key', 'count')[:self.limit]]
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(city=self.value())
+        return queryset
+
+
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
-    """Admin interface for Contact model."""
+    """
+    Admin interface for Contact model.
+    
+    The changelist avoids full-table scans: the total comes from the
+    ContactStat counters, the "N total" link that would COUNT(*) again is
+    off, and the city filter lists the largest cities from the counters
+    instead of a SELECT DISTINCT over contacts. Dates are narrowed with
+    the date_added filter rather than a date hierarchy, which would run
+    SELECT DISTINCT over the dates. Bulk actions run set-based (see
+    contacts.bulk).
+    """
     list_display = ['first_name', 'last_name', 'email', 'phone_number', 'city', 'status', 'date_added']
-    list_filter = ['status', 'city', 'date_added']
+    list_filter = ['status', CityListFilter, 'date_added']
     search_fields = ['first_name', 'last_name', 'email', 'phone_number', 'city']
-    date_hierarchy = 'date_added'
     ordering = ['-date_added']
+    paginator = ContactPaginator
+    show_full_result_count = False
+    actions = ['archive_selected', 'export_selected']
+    
+    def get_actions(self, request):
+        """Add a "Set status to ..." action per status."""
+        actions = super().get_actions(request)
+        if not self.has_change_permission(request):
+            return actions
+        for status in ContactStatus.objects.order_by('name'):
+            name = f'set_status_{status.pk}'
+            actions[name] = (self._set_status_action(status), name, f'Set status to: {status.name}')
+        return actions
+    
+    def _set_status_action(self, status):
+        def set_status(modeladmin, request, queryset):
+            updated = bulk.set_status(queryset, status)
+            self.message_user(request, f'Set status to "{status.name}" for {updated} contacts.', messages.SUCCESS)
+        return set_status
+    
+    @admin.action(description='Archive selected contacts', permissions=['delete'])
+    def archive_selected(self, request, queryset):
+        result = bulk.archive_selected(queryset)
+        self.message_user(request, f'Archived {result.moved} contacts.', messages.SUCCESS)
+    
+    @admin.action(description='Export selected contacts to CSV')
+    def export_selected(self, request, queryset):
+        return bulk.export_csv(queryset, request=request)
+
+
+@admin.register(CityLocation)
+class CityLocationAdmin(admin.ModelAdmin):
+    """Admin interface for geocoded city coordinates (fix wrong matches here)."""
+    list_display = ['name', 'latitude', 'longitude', 'geocoded_at']
+    search_fields = ['name']
+
+
+@admin.register(WeatherObservation)
+class WeatherObservationAdmin(admin.ModelAdmin):
+    """Admin interface for stored weather observations."""
+    list_display = ['location', 'bucket', 'resolution', 'temperature', 'humidity', 'wind_speed', 'weather_code']
+    list_filter = ['resolution']
+    list_select_related = ['location']
+    raw_id_fields = ['location']
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Read-only admin interface for captured request profiles."""
+    list_display = ['created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'user']
+    list_filter = ['method', 'view_name']
+    search_fields = ['path', 'view_name']
+    fields = [
+        'created_at', 'method', 'path', 'view_name', 'status_code', 'user',
+        'duration_ms', 'query_count', 'query_time_ms', 'download_link',
+        'top_functions_display', 'call_tree_display', 'sql_timeline_display',
+    ]
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        urls = [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='contacts_requestprofile_download',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def download_view(self, request, pk):
+        """Return the raw cProfile stats, loadable with pstats or snakeviz."""
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-profile-{profile.pk}.prof"'
+        return response
+    
+    @admin.display(description='Raw stats')
+    def download_link(self, obj):
+        url = reverse('admin:contacts_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">Download .prof</a>', url)
+    
+    @admin.display(description='Top functions')
+    def top_functions_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.top_functions)
+    
+    @admin.display(description='Call tree')
+    def call_tree_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.call_tree)
+    
+    @admin.display(description='SQL timeline')
+    def sql_timeline_display(self, obj):
+        lines = [
+            f"{q['start_ms']:>10.2f} ms  +{q['duration_ms']:.2f} ms  [{q['alias']}]  {q['sql']}"
+            for q in obj.sql_timeline
+        ]
+        return format_html('<pre>{}</pre>', '\n'.join(lines))
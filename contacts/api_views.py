@@ -6,37 +6,100 @@ Provides endpoints:
 - POST /api/contacts/ - Create new contact
 - PUT /api/contacts/{id}/ - Update contact
 - DELETE /api/contacts/{id}/ - Delete contact
+- POST /api/contacts/bulk/ - Create or update contacts in bulk
+- POST /api/contacts/ingest/ - Stream contacts in as NDJSON
+- POST /api/contacts/transition/ - Move filtered contacts to another status
+- GET /api/contacts/changes/?since=<cursor> - Changes since a cursor
+- GET /api/contacts/stats/ - Contact counts per status, city and day
+- GET /api/contacts/suggest/?q=<prefix> - Typeahead suggestions
+- GET /api/contacts/nearby/?lat=&lon=&radius_km= - Contacts near a point
 """
 
+import json
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 
-from .models import Contact, ContactStatus
-from .serializers import ContactSerializer, ContactListSerializer, ContactStatusSerializer
+from . import archive, bulk, geo, ingest as ndjson_ingest, stats, suggest
+from .async_api import AsyncReadMixin
+from .changes import InvalidCursor, get_changes
+from .db import retry_on_locked
+from .filters import TRANSITION_FILTERS, apply_filters, filter_contacts, get_ordering
+from .importers import upsert_contacts
+from .models import ArchivedContact, Contact, ContactStatus
+from .serializers import (
+    CombinedContactListSerializer, ContactSerializer, ContactListSerializer, ContactStatusSerializer
+)
+from .streaming import streaming_response
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(AsyncReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Contact model providing full CRUD operations via REST API.
     
     Endpoints:
-    - GET /api/contacts/ - List all contacts
+    - GET /api/contacts/ - List contacts (filter by status, city, date_added range;
+      ?include_archived=1 adds archived contacts)
     - POST /api/contacts/ - Create new contact
     - GET /api/contacts/{id}/ - Retrieve specific contact
     - PUT /api/contacts/{id}/ - Update contact
     - PATCH /api/contacts/{id}/ - Partial update contact
     - DELETE /api/contacts/{id}/ - Delete contact
+    - POST /api/contacts/bulk/ - Upsert a list of contacts
+    - POST /api/contacts/ingest/ - Upsert an NDJSON stream of contacts in batches
+    - POST /api/contacts/transition/ - Set the status of all contacts matching a filter
+    - GET /api/contacts/changes/?since=<cursor> - Incremental sync feed
+    - GET /api/contacts/stats/ - Dashboard counts
+    - GET /api/contacts/suggest/?q=<prefix> - Typeahead suggestions
+    - GET /api/contacts/nearby/?lat=&lon=&radius_km= - Proximity search
+    
+    List and retrieve are async (see contacts.async_api).
     """
     queryset = Contact.objects.select_related('status').all()
     
+    def get_queryset(self):
+        """
+        Apply the list filters: ?status=, ?city=, ?date_added_after=,
+        ?date_added_before= and ?ordering= (see contacts.filters), and
+        ?include_archived=1 (see contacts.archive).
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            params = self.request.query_params
+            if archive.include_archived(params):
+                # Same filters on both tables, merged in one ordered UNION
+                return archive.combined_rows(
+                    apply_filters(queryset, params),
+                    apply_filters(ArchivedContact.objects.all(), params),
+                    get_ordering(params),
+                )
+            queryset = filter_contacts(queryset, params)
+        return queryset
+    
+    def paginate_queryset(self, queryset):
+        """Load the objects behind a page of combined (?include_archived=1) rows."""
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.action == 'list' and archive.include_archived(self.request.query_params):
+            page = archive.hydrate(page)
+        return page
+    
+    async def apaginate_queryset(self, queryset):
+        """Async paginate_queryset()."""
+        page = await super().apaginate_queryset(queryset)
+        if page is not None and self.action == 'list' and archive.include_archived(self.request.query_params):
+            page = await archive.ahydrate(page)
+        return page
+    
     def get_serializer_class(self):
         """
         Use lightweight serializer for list view,
         full serializer for other actions.
         """
         if self.action == 'list':
+            if archive.include_archived(self.request.query_params):
+                return CombinedContactListSerializer
             return ContactListSerializer
         return ContactSerializer
     
@@ -66,6 +129,221 @@ class ContactViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @retry_on_locked
+    def perform_create(self, serializer):
+        serializer.save()
+    
+    @retry_on_locked
+    def perform_update(self, serializer):
+        serializer.save()
+    
+    @retry_on_locked
+    def perform_destroy(self, instance):
+        instance.delete()
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create or update contacts in bulk.
+        
+        Accepts a list of objects with first_name, last_name, phone_number,
+        email, city and status (the status name). Rows are matched to
+        existing contacts by email or phone number.
+        """
+        rows = request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response(
+                {'detail': 'Expected a list of contact objects.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        result = upsert_contacts(rows, start=0)
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """
+        Upsert contacts streamed as NDJSON, one contact object per line.
+        
+        Send ``Content-Type: application/x-ndjson`` (with
+        ``Content-Encoding: gzip`` for a compressed body). The body is read
+        from the request stream and written ``?batch_size=`` lines at a
+        time (default 1000); the response streams one NDJSON summary per
+        batch with its line range, counts and errors, then the totals.
+        Bad lines are reported by line number and do not stop the upload.
+        """
+        content_type = request.content_type.split(';')[0].strip().lower()
+        if content_type != 'application/x-ndjson':
+            return Response(
+                {'detail': 'Expected Content-Type: application/x-ndjson.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        try:
+            batch_size = int(request.query_params.get('batch_size', ndjson_ingest.DEFAULT_BATCH_SIZE))
+            if not 1 <= batch_size <= ndjson_ingest.MAX_BATCH_SIZE:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'detail': f'batch_size must be between 1 and {ndjson_ingest.MAX_BATCH_SIZE}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # The underlying HttpRequest, so DRF never parses (and buffers) the body
+        body = ndjson_ingest.open_body(request._request, request.headers.get('Content-Encoding', ''))
+        summaries = ndjson_ingest.ingest(body, batch_size=batch_size)
+        return streaming_response(
+            request, (json.dumps(summary) + '\n' for summary in summaries), content_type='application/x-ndjson'
+        )
+    
+    @action(detail=False, methods=['post'])
+    def transition(self, request):
+        """
+        Move every contact matching a filter to another status.
+        
+        Body: ``filter`` (an object with any of status, city,
+        date_added_after, date_added_before and search, as for the list),
+        ``to`` (the target status name or id) and optional ``dry_run``.
+        Runs as a single UPDATE; contacts already in the target status are
+        not touched. Returns the number of contacts moved (or that would
+        move, for a dry run).
+        """
+        filters = request.data.get('filter')
+        if not isinstance(filters, dict) or not filters:
+            return Response(
+                {'detail': f'filter must be an object with any of: {", ".join(TRANSITION_FILTERS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        unknown = sorted(set(filters) - set(TRANSITION_FILTERS))
+        if unknown:
+            # A mistyped key must not widen the update to every contact
+            return Response(
+                {'detail': f'Unknown filter: {", ".join(unknown)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params = {key: '' if value is None else str(value).strip() for key, value in filters.items()}
+        # apply_filters skips empty values and list separators alone
+        empty = sorted(key for key, value in params.items() if not value.replace(',', '').strip())
+        if empty:
+            return Response(
+                {'detail': f'Empty filter: {", ".join(empty)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        target = str(request.data.get('to', '')).strip()
+        lookup = {'pk': int(target)} if target.isdigit() else {'name': target}
+        target_status = ContactStatus.objects.filter(**lookup).first() if target else None
+        if target_status is None:
+            return Response(
+                {'detail': 'to must name an existing status.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        
+        queryset = apply_filters(Contact.objects.all(), params)
+        count = retry_on_locked(bulk.transition)(queryset, target_status, dry_run=dry_run)
+        return Response({'count': count, 'to': target_status.name, 'dry_run': dry_run})
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Contacts created, updated or deleted since a cursor.
+        
+        Start without ``since`` and pass ``next_cursor`` from each response
+        to the next call; an empty page keeps the same cursor.
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), 1000)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'detail': 'limit must be a positive integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            page = get_changes(request.query_params.get('since'), limit=limit)
+        except InvalidCursor as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'upserted': ContactSerializer(page['upserted'], many=True).data,
+            'deleted': [
+                {'id': tombstone.contact_id, 'deleted_at': tombstone.deleted_at}
+                for tombstone in page['deleted']
+            ],
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Contact counts per status, city and day added.
+        
+        Read from the incrementally maintained summary table, so the cost
+        does not depend on the number of contacts. ``days`` (default 30)
+        limits by_day, ``cities`` (default 50) the largest cities listed.
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+            cities = int(request.query_params.get('cities', 50))
+            if days < 1 or cities < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'detail': 'days and cities must be positive integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(stats.summary(days=min(days, 3660), cities=min(cities, 1000)))
+    
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Contacts whose last name, first name or email starts with ``q``,
+        and cities starting with it.
+        
+        Matching ignores case and accents ("lodz" finds "Łódź"). ``limit``
+        (default 10, at most 50) caps contacts and cities separately.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'detail': 'limit must be a positive integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(suggest.suggest(request.query_params.get('q', ''), limit=min(limit, suggest.MAX_LIMIT)))
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Contacts living within ``radius_km`` (default 50, at most 1000) of
+        the point ``lat``/``lon``.
+        
+        Only cities with stored coordinates are found (see the
+        geocode_cities command). Returns the matching cities with their
+        distance and contact count, the total count, and up to ``limit``
+        contacts (default 100, at most 1000), nearest cities first.
+        """
+        params = request.query_params
+        try:
+            lat, lon = float(params['lat']), float(params['lon'])
+            radius_km = float(params.get('radius_km', 50))
+            limit = int(params.get('limit', 100))
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius_km <= 1000 and limit >= 1):
+                raise ValueError
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'lat (-90..90) and lon (-180..180) are required; radius_km must be '
+                           'between 0 and 1000 and limit a positive integer.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        found = geo.contacts_near(lat, lon, radius_km, limit=min(limit, 1000))
+        contacts = []
+        for contact, distance in found['contacts']:
+            contacts.append({**ContactListSerializer(contact).data, 'distance_km': round(distance, 2)})
+        return Response({'cities': found['cities'], 'count': found['count'], 'results': contacts})
 
 
 class ContactStatusViewSet(viewsets.ReadOnlyModelViewSet):
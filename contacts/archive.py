@@ -0,0 +1,191 @@
+"""
+Hot/cold split of the contacts table.
+
+Includes:
+- archive_contacts: move contacts of given statuses older than a cutoff
+  into ArchivedContact, in chunked transactions
+- archive_queryset: the same for any selection of contacts
+- restore_contacts: move archived contacts back into the main table
+- include_archived / combined_rows / hydrate / ahydrate: listings
+  spanning both tables (?include_archived=1)
+
+Archived contacts leave the main table, its indexes and its ContactStat
+counters, so everyday listings, counts and searches only touch the
+contacts people actually work with. Each chunk is copied and deleted in
+one transaction; the delete writes change-feed tombstones, and a restore
+shows up in the feed as an update.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import BooleanField, Q, Value
+
+from .models import ArchivedContact, Contact
+
+DEFAULT_STATUSES = ['lost', 'outdated']
+
+# Columns of a combined listing row; they cover every ordering in
+# filters.ORDERINGS
+ROW_FIELDS = ['id', 'date_added', 'first_name_sort', 'last_name_sort']
+
+
+@dataclass
+class MoveResult:
+    """Outcome of an archive or restore run."""
+    moved: int = 0
+    chunks: int = 0
+    skipped: list = field(default_factory=list)  # (id, reason) pairs
+
+
+def _copy(source, model):
+    return model(id=source.pk, **{name: getattr(source, name) for name in ArchivedContact.COPIED_FIELDS})
+
+
+def archive_contacts(statuses, older_than, chunk_size=1000):
+    """
+    Move contacts with one of the statuses added before a cutoff to the archive.
+
+    Args:
+        statuses: Status names to archive
+        older_than: Only contacts with date_added before this datetime
+        chunk_size: Contacts moved per transaction
+
+    Returns:
+        MoveResult
+    """
+    candidates = Contact.objects.filter(status__name__in=statuses, date_added__lt=older_than)
+    return archive_queryset(candidates, chunk_size=chunk_size)
+
+
+def archive_queryset(candidates, chunk_size=1000):
+    """
+    Move every contact of a queryset to the archive, chunk by chunk.
+
+    Args:
+        candidates: Contact queryset to archive
+        chunk_size: Contacts moved per transaction
+
+    Returns:
+        MoveResult
+    """
+    result = MoveResult()
+    while True:
+        with transaction.atomic():
+            chunk = list(candidates.select_for_update().order_by('id')[:chunk_size])
+            if not chunk:
+                break
+            ArchivedContact.objects.bulk_create([_copy(contact, ArchivedContact) for contact in chunk])
+            Contact.objects.filter(pk__in=[contact.pk for contact in chunk]).delete()
+        result.moved += len(chunk)
+        result.chunks += 1
+    return result
+
+
+def restore_contacts(queryset, chunk_size=1000):
+    """
+    Move archived contacts back into the main table.
+
+    A contact whose phone number or email has been taken by another
+    contact since it was archived stays in the archive and is reported
+    in MoveResult.skipped.
+
+    Args:
+        queryset: ArchivedContact queryset to restore
+        chunk_size: Contacts moved per transaction
+
+    Returns:
+        MoveResult
+    """
+    result = MoveResult()
+    last_id = None
+    while True:
+        with transaction.atomic():
+            pending = queryset.select_for_update().order_by('id')
+            if last_id is not None:
+                pending = pending.filter(pk__gt=last_id)
+            chunk = list(pending[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+
+            # One query finds the keys taken in the main table meanwhile
+            taken = Contact.objects.filter(
+                Q(phone_e164__in=[a.phone_e164 for a in chunk if a.phone_e164])
+                | Q(email_normalized__in=[a.email_normalized for a in chunk if a.email_normalized])
+            ).values_list('phone_e164', 'email_normalized')
+            taken_phones, taken_emails = set(), set()
+            for phone_e164, email_normalized in taken:
+                taken_phones.add(phone_e164)
+                taken_emails.add(email_normalized)
+
+            restored = []
+            for archived in chunk:
+                if archived.phone_e164 and archived.phone_e164 in taken_phones:
+                    result.skipped.append((archived.pk, 'phone_number'))
+                elif archived.email_normalized and archived.email_normalized in taken_emails:
+                    result.skipped.append((archived.pk, 'email'))
+                else:
+                    taken_phones.add(archived.phone_e164)
+                    taken_emails.add(archived.email_normalized)
+                    restored.append(archived)
+            if not restored:
+                continue
+
+            contacts = Contact.objects.bulk_create([_copy(archived, Contact) for archived in restored])
+            # bulk_create() stamps created_at; put the original back
+            for contact, archived in zip(contacts, restored):
+                contact.created_at = archived.created_at
+            Contact.objects.bulk_update(contacts, ['created_at'])
+            ArchivedContact.objects.filter(pk__in=[archived.pk for archived in restored]).delete()
+        result.moved += len(restored)
+        result.chunks += 1
+    return result
+
+
+def include_archived(params):
+    """Whether the request asked for archived contacts too."""
+    return str(params.get('include_archived', '')).lower() in ('1', 'true', 'yes')
+
+
+def combined_rows(contacts, archived, ordering):
+    """
+    Ordered listing over contacts and archived contacts.
+
+    Args:
+        contacts: Filtered Contact queryset
+        archived: ArchivedContact queryset with the same filters
+        ordering: order_by() arguments (see filters.order_by_fields)
+
+    Returns:
+        QuerySet: UNION of row dicts (ROW_FIELDS plus "archived"); pass a
+        page of it to hydrate()
+    """
+    flag = {'archived': Value(False, output_field=BooleanField())}
+    rows = contacts.order_by().values(*ROW_FIELDS, **flag)
+    flag = {'archived': Value(True, output_field=BooleanField())}
+    archived_rows = archived.order_by().values(*ROW_FIELDS, **flag)
+    return rows.union(archived_rows, all=True).order_by(*ordering)
+
+
+def _in_order(rows, objects):
+    return [objects[row['archived']][row['id']] for row in rows if row['id'] in objects[row['archived']]]
+
+
+def hydrate(rows):
+    """Turn a page of combined_rows() into Contact/ArchivedContact objects, in order."""
+    rows = list(rows)
+    objects = {
+        False: Contact.objects.select_related('status').in_bulk([r['id'] for r in rows if not r['archived']]),
+        True: ArchivedContact.objects.select_related('status').in_bulk([r['id'] for r in rows if r['archived']]),
+    }
+    return _in_order(rows, objects)
+
+
+async def ahydrate(rows):
+    """hydrate() with the async ORM, for a page of rows already loaded."""
+    objects = {
+        False: await Contact.objects.select_related('status').ain_bulk([r['id'] for r in rows if not r['archived']]),
+        True: await ArchivedContact.objects.select_related('status').ain_bulk([r['id'] for r in rows if r['archived']]),
+    }
+    return _in_order(rows, objects)
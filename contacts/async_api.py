@@ -0,0 +1,157 @@
+"""
+Async read path for DRF viewsets.
+
+Includes:
+- AsyncPageNumberPagination: PageNumberPagination that counts and loads
+  the page with the async ORM
+- AsyncReadMixin: serve list and retrieve from async handlers (alist,
+  aretrieve), every other action through DRF's usual sync dispatch
+
+DRF dispatches synchronously, so under ASGI each API request would be
+handed to a worker thread as a whole. With the mixin, list and retrieve
+run on the event loop: authentication, permissions, throttling and
+content negotiation still run through DRF (in one sync_to_async call,
+as they may load the session), as does building the filtered queryset;
+then the queries run with acount, aiterator and aget, and serializers
+only see loaded objects. Under WSGI
+Django runs the same view through async_to_sync.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination with an async apaginate_queryset()."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async paginate_queryset(): same page, count and errors.
+
+        Args:
+            queryset: Queryset to paginate (or a combined_rows() UNION)
+            request: DRF request
+            view: The viewset
+
+        Returns:
+            list or None: The page's objects, or None without a page size
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+
+        self.page.object_list = [obj async for obj in self.page.object_list.aiterator()]
+        return list(self.page)
+
+
+class AsyncReadMixin:
+    """
+    Run the list and retrieve actions of a viewset as async handlers.
+
+    The viewset implements ``alist``/``aretrieve`` (defaults below) and
+    may override ``apaginate_queryset``/``aget_object``. Requests for
+    other actions go to the sync view DRF builds.
+    """
+
+    pagination_class = AsyncPageNumberPagination
+    async_actions = {'list': 'alist', 'retrieve': 'aretrieve'}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not set(actions.values()) & set(cls.async_actions):
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            method = request.method.lower()
+            action = actions.get('get' if method == 'head' else method)
+            if action not in cls.async_actions:
+                return await sync_view(request, *args, **kwargs)
+
+            # What DRF's view() does, then an async dispatch
+            self = cls(**initkwargs)
+            self.action_map = {**actions, 'head': actions['get']}
+            for bound_method, bound_action in self.action_map.items():
+                setattr(self, bound_method, getattr(self, bound_action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        async_view.__name__ = view.__name__
+        async_view.__doc__ = view.__doc__
+        async_view.cls = cls
+        async_view.initkwargs = initkwargs
+        async_view.actions = actions
+        return csrf_exempt(async_view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """dispatch() for an async action."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, self.async_actions[self.action])
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def apaginate_queryset(self, queryset):
+        """Async paginate_queryset()."""
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        """Async get_object(): the lookup runs with aget()."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        # Building the queryset may run lookups (status names to ids)
+        queryset = await sync_to_async(lambda: self.filter_queryset(self.get_queryset()))()
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer([obj async for obj in queryset.aiterator()], many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,131 @@
+"""
+Bulk actions on a selection of contacts (admin actions and the list page).
+
+Includes:
+- set_status: give every selected contact the same status
+- transition: move every contact matching a filter to a status in one
+  UPDATE (or count them for a dry run)
+- archive_selected: move the selection to the archive
+- export_csv: stream the selection as a CSV file in the import format
+
+Every action works on the selection as a set: a selection is either
+written with one UPDATE (transition) or read a chunk of ids at a time in
+primary key order, each chunk written with one UPDATE (or one INSERT and
+one DELETE when archiving). ContactQuerySet keeps the ContactStat
+counters and the change feed in step once per statement.
+No action loads contacts as model instances one by one or sends
+per-contact signals.
+"""
+
+import csv
+from itertools import islice
+
+from django.utils import timezone
+
+from . import archive
+from .models import Contact
+from .streaming import streaming_response
+
+# Contacts written per statement; also bounds how long locks are held
+CHUNK_SIZE = 5000
+
+# Same columns as the CSV import, so an export can be imported again
+EXPORT_COLUMNS = ['first_name', 'last_name', 'phone_number', 'email', 'city', 'status']
+
+
+def _id_chunks(queryset, chunk_size):
+    """Primary keys of a queryset, chunk_size at a time (keyset pagination)."""
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    last_id = None
+    while True:
+        pending = ids if last_id is None else ids.filter(pk__gt=last_id)
+        chunk = list(pending[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]
+        yield chunk
+
+
+def set_status(queryset, status, chunk_size=CHUNK_SIZE):
+    """
+    Change the status of the selected contacts.
+
+    Args:
+        queryset: Contact queryset to update
+        status: ContactStatus to set
+        chunk_size: Contacts updated per statement
+
+    Returns:
+        int: Number of contacts updated
+    """
+    updated = 0
+    for chunk in _id_chunks(queryset, chunk_size):
+        updated += Contact.objects.filter(pk__in=chunk).update(status=status, updated_at=timezone.now())
+    return updated
+
+
+def transition(queryset, status, dry_run=False):
+    """
+    Move the contacts of a filtered queryset to a status with one UPDATE.
+
+    Contacts already in the status are left alone (and keep their
+    updated_at). The counters and the suggestion cache are adjusted once
+    for the whole statement.
+
+    Args:
+        queryset: Filtered Contact queryset
+        status: ContactStatus to move the contacts to
+        dry_run: Only count the contacts that would move
+
+    Returns:
+        int: Number of contacts moved (or that would move)
+    """
+    queryset = queryset.exclude(status=status)
+    if dry_run:
+        return queryset.count()
+    return queryset.update(status=status, updated_at=timezone.now())
+
+
+def archive_selected(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Move the selected contacts to the archive.
+
+    Returns:
+        archive.MoveResult
+    """
+    return archive.archive_queryset(queryset, chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(queryset, chunk_size):
+    """CSV text of the selection, one string per chunk of rows."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    fields = [column if column != 'status' else 'status__name' for column in EXPORT_COLUMNS]
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+def export_csv(queryset, filename='contacts.csv', chunk_size=2000, request=None):
+    """
+    Stream the selected contacts as CSV.
+
+    Rows are fetched and written a chunk at a time, so memory use does not
+    grow with the size of the selection. Pass the request so the export
+    also streams under ASGI (see contacts.streaming).
+
+    Returns:
+        StreamingHttpResponse
+    """
+    response = streaming_response(
+        request, _export_rows(queryset, chunk_size), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
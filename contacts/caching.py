@@ -0,0 +1,61 @@
+"""
+Versioned cache keys for data derived from contacts and statuses.
+
+Includes:
+- cache_key: key that embeds the current version of a namespace
+- get_version/aget_version: the current version of a namespace
+- bump_version: invalidate every key of a namespace at once
+- bump_version_on_commit: bump once the surrounding transaction commits
+
+Instead of deleting individual entries on write (which would require
+knowing every cached prefix a contact appears under), each namespace has
+a version counter that is part of the key. Writes increment the counter
+and stale entries simply stop being read until they expire.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+SUGGEST = 'suggest'
+STATUSES = 'statuses'  # Rendered contact cards show the status name
+
+
+def _version_key(namespace):
+    return f'contacts:{namespace}:version'
+
+
+def _fresh_version():
+    # Starting from the clock (not 1) keeps a version that was evicted from
+    # the cache from coming back and matching entries written under it
+    return time.time_ns() // 1000
+
+
+def get_version(namespace):
+    """Current version of a namespace."""
+    return cache.get_or_set(_version_key(namespace), _fresh_version, None)
+
+
+async def aget_version(namespace):
+    """Async get_version(), for async views."""
+    return await cache.aget_or_set(_version_key(namespace), _fresh_version, None)
+
+
+def cache_key(namespace, *parts):
+    """Cache key for parts under the current version of a namespace."""
+    return ':'.join(['contacts', namespace, f'v{get_version(namespace)}', *map(str, parts)])
+
+
+def bump_version(namespace):
+    """Invalidate all keys of a namespace."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Not cached yet (or evicted)
+        cache.set(_version_key(namespace), _fresh_version(), None)
+
+
+def bump_version_on_commit(namespace, using=None):
+    """Bump a namespace when the current transaction commits (now if none)."""
+    transaction.on_commit(lambda: bump_version(namespace), using=using)
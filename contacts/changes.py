@@ -0,0 +1,119 @@
+"""
+Incremental change feed for sync clients.
+
+Includes:
+- encode_cursor / decode_cursor: opaque position in the feed
+- get_changes: contacts modified and deleted after a cursor, in order
+
+The feed is the merge of two indexed streams: contacts ordered by
+(updated_at, id) and tombstones ordered by (deleted_at, id). A cursor is
+the (timestamp, kind, id) of the last change a client has seen, so each
+page is two index range scans no matter how large the table is.
+
+Changes newer than CONTACTS_CHANGES_SETTLE_SECONDS are held back: a
+transaction can commit after a later one, and its timestamp would then
+fall behind a cursor a client already moved past.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Contact, ContactTombstone
+
+# Order of the two streams when timestamps are equal
+UPSERT, DELETE = 0, 1
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that were not produced by encode_cursor."""
+
+
+def encode_cursor(timestamp, kind, pk):
+    """Build an opaque cursor from the position of a change."""
+    raw = json.dumps([timestamp.isoformat(), kind, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (timestamp, kind, id)
+
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, kind, pk = json.loads(raw)
+        timestamp = datetime.fromisoformat(timestamp)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if kind not in (UPSERT, DELETE) or not isinstance(pk, int):
+        raise InvalidCursor('Invalid cursor')
+    return timestamp, kind, pk
+
+
+def _after(field, timestamp, kind, pk, stream_kind):
+    """Filter for rows of one stream that come after the cursor position."""
+    later = Q(**{f'{field}__gt': timestamp})
+    if stream_kind > kind:
+        return later | Q(**{field: timestamp})
+    if stream_kind == kind:
+        return later | Q(**{field: timestamp, 'pk__gt': pk})
+    return later
+
+
+def get_changes(cursor=None, limit=100):
+    """
+    Return the next page of changes after a cursor.
+
+    Args:
+        cursor: Value of next_cursor from the previous page, or None to
+            start from the beginning
+        limit: Maximum number of changes in the page
+
+    Returns:
+        dict: upserted contacts, deleted ids, next_cursor and has_more
+
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    settle = getattr(settings, 'CONTACTS_CHANGES_SETTLE_SECONDS', 2)
+    horizon = timezone.now() - timedelta(seconds=settle)
+
+    contacts = Contact.objects.select_related('status').filter(updated_at__lte=horizon)
+    tombstones = ContactTombstone.objects.filter(deleted_at__lte=horizon)
+    if cursor:
+        timestamp, kind, pk = decode_cursor(cursor)
+        contacts = contacts.filter(_after('updated_at', timestamp, kind, pk, UPSERT))
+        tombstones = tombstones.filter(_after('deleted_at', timestamp, kind, pk, DELETE))
+
+    # Fetch one extra row per stream to know whether more pages follow
+    stream = [
+        (contact.updated_at, UPSERT, contact.pk, contact)
+        for contact in contacts.order_by('updated_at', 'id')[:limit + 1]
+    ] + [
+        (tombstone.deleted_at, DELETE, tombstone.pk, tombstone)
+        for tombstone in tombstones.order_by('deleted_at', 'id')[:limit + 1]
+    ]
+    stream.sort(key=lambda change: change[:3])
+    page, has_more = stream[:limit], len(stream) > limit
+
+    next_cursor = cursor
+    if page:
+        timestamp, kind, pk, _ = page[-1]
+        next_cursor = encode_cursor(timestamp, kind, pk)
+    return {
+        'upserted': [obj for _, kind, _, obj in page if kind == UPSERT],
+        'deleted': [obj for _, kind, _, obj in page if kind == DELETE],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
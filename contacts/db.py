@@ -0,0 +1,93 @@
+"""
+Database helpers for the contacts application.
+
+Includes:
+- SQLite performance profile applied through the connection_created signal
+- retry_on_locked: run a write in its own transaction, retrying on lock contention
+"""
+
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new SQLite connection when SQLITE_PERFORMANCE_MODE is on.
+# WAL lets readers run alongside a writer, synchronous=NORMAL only fsyncs
+# at checkpoints instead of on every commit.
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # Negative value means KiB, i.e. 64 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# Error messages SQLite uses for lock contention
+LOCKED_ERRORS = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def sqlite_pragmas():
+    """Return the pragmas to apply, allowing overrides from settings."""
+    return {**DEFAULT_SQLITE_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply the SQLite performance pragmas to a freshly opened connection."""
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_PERFORMANCE_MODE', False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_lock_error(exc):
+    """Check whether an OperationalError was caused by lock contention."""
+    message = str(exc).lower()
+    return any(text in message for text in LOCKED_ERRORS)
+
+
+def retry_on_locked(func=None, *, using=DEFAULT_DB_ALIAS, attempts=None, base_delay=None):
+    """
+    Run a write in its own transaction and retry it when the database is locked.
+
+    With SQLITE_PERFORMANCE_MODE the transaction starts with BEGIN IMMEDIATE,
+    so the write lock is taken up front and contention surfaces as a quick
+    retryable error rather than a deadlock half-way through the transaction.
+    Retries back off exponentially with jitter. When called inside an
+    existing atomic block the function runs once, since only the outermost
+    transaction can be retried.
+
+    Can be used as ``@retry_on_locked`` or ``@retry_on_locked(attempts=3)``.
+    """
+    if func is None:
+        return functools.partial(retry_on_locked, using=using, attempts=attempts, base_delay=base_delay)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        max_attempts = attempts or getattr(settings, 'DB_LOCK_RETRY_ATTEMPTS', 5)
+        delay = base_delay or getattr(settings, 'DB_LOCK_RETRY_DELAY', 0.05)
+
+        if connections[using].in_atomic_block:
+            return func(*args, **kwargs)
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e) or attempt == max_attempts:
+                    raise
+                sleep_for = delay * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.warning(f"Database locked, retrying {func.__name__} in {sleep_for:.3f}s ({attempt}/{max_attempts})")
+                time.sleep(sleep_for)
+
+    return wrapper
@@ -0,0 +1,141 @@
+"""
+Database router sending read traffic to replicas.
+
+Reads go to one of the DATABASE_REPLICAS aliases, chosen round-robin among
+the replicas that passed their last health check. Everything else stays on
+the primary:
+
+- all writes
+- reads inside a transaction on the primary
+- reads later in a request that has already written
+- reads from a client that wrote within the last REPLICA_PIN_SECONDS, so
+  users always see their own changes (see ReplicaPinningMiddleware)
+"""
+
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+# Set for the current request/task when reads must go to the primary
+_pinned = ContextVar('contacts_db_pinned', default=False)
+# Set as soon as the current request/task routes a write
+_wrote = ContextVar('contacts_db_wrote', default=False)
+
+
+def pin_to_primary():
+    """
+    Send the remaining reads of the current request to the primary.
+
+    Returns:
+        Token that can be passed to unpin().
+    """
+    return _pinned.set(True)
+
+
+def unpin(token):
+    """Undo a previous pin_to_primary() call."""
+    _pinned.reset(token)
+
+
+@contextmanager
+def primary_pinned():
+    """Context manager routing all reads in the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def has_written():
+    """Check whether the current request/task has routed a write."""
+    return _wrote.get()
+
+
+def reset_write_tracking():
+    """
+    Start tracking writes for a new request.
+
+    Returns:
+        Token that can be passed to ``_wrote.reset``.
+    """
+    return _wrote.set(False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to healthy replicas round-robin and writes to the primary.
+
+    Args:
+        primary (str): Alias of the primary database.
+        replicas (list): Replica aliases, defaults to settings.DATABASE_REPLICAS.
+        health_check_interval (float): Seconds between replica health checks.
+    """
+
+    def __init__(self, primary=DEFAULT_DB_ALIAS, replicas=None, health_check_interval=None):
+        self.primary = primary
+        if replicas is None:
+            replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        self.replicas = list(replicas)
+        if health_check_interval is None:
+            health_check_interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 10.0)
+        self.health_check_interval = health_check_interval
+        self._counter = itertools.count()
+        self._health = {}
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or _pinned.get() or _wrote.get():
+            return self.primary
+        if connections[self.primary].in_atomic_block:
+            return self.primary
+
+        # Start from the next replica in turn and skip unhealthy ones
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            alias = self.replicas[(start + offset) % len(self.replicas)]
+            if self.is_healthy(alias):
+                return alias
+        return self.primary
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {self.primary, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        if db in self.replicas:
+            return False
+        return None
+
+    def is_healthy(self, alias):
+        """Check a replica, reusing the last result for health_check_interval seconds."""
+        now = time.monotonic()
+        checked_at, healthy = self._health.get(alias, (None, True))
+        if checked_at is not None and now - checked_at < self.health_check_interval:
+            return healthy
+        try:
+            connection = connections[alias]
+            connection.ensure_connection()
+            healthy = connection.is_usable()
+        except Exception as e:
+            logger.warning(f"Replica {alias} failed health check: {str(e)}")
+            healthy = False
+        self._health[alias] = (now, healthy)
+        return healthy
+
+    def mark_unhealthy(self, alias):
+        """Take a replica out of rotation until its next health check."""
+        self._health[alias] = (time.monotonic(), False)
@@ -0,0 +1,184 @@
+"""
+Query-string filters for the contacts API.
+
+Includes:
+- filter_contacts: apply status, city, date_added range and ordering
+  parameters to a Contact queryset
+- apply_filters / get_ordering: the two halves of filter_contacts, used
+  separately for listings that include archived contacts
+- search_contacts: the free-text search of the list page search box
+
+Every combination is served by one of the composite indexes on Contact
+(see Contact.Meta.indexes): equality columns first, then the column the
+results are ordered or ranged by. A date range on a name-ordered listing
+is checked row by row while the name index is walked (see RowValue), so
+a page is read in index order instead of sorting the whole range.
+"""
+
+import re
+from datetime import datetime, time
+
+from django.db.models import DateTimeField, F, Func, Q
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Contact, ContactStatus
+from .normalization import NON_DIGITS, normalize_phone
+
+ORDERINGS = ['-date_added', 'date_added', 'last_name', '-last_name']
+
+# Parameters apply_filters understands
+TRANSITION_FILTERS = ['status', 'city', 'date_added_after', 'date_added_before', 'search']
+
+# Search terms that look like a phone number; with 9+ digits it may be a whole one
+PHONE_SEARCH = re.compile(r'^\+?[\d\s\-\(\)]+$')
+# Shorter digit runs are not searched in phone numbers (they match most contacts)
+PHONE_SEARCH_MIN_DIGITS = 3
+
+
+class RowValue(Func):
+    """
+    A column compared row by row rather than through an index.
+
+    SQLite plans without table statistics and would rather search a
+    date_added range and sort it than walk a name index in order; the
+    unary "+" is its documented way to take a column out of index
+    selection. Other databases get the plain column.
+    """
+
+    template = '%(expressions)s'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='+%(expressions)s', **extra_context)
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _parse_moment(name, value):
+    """Parse an ISO date or datetime into an aware datetime."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        # Malformed, or well-formed but impossible ("2024-02-30")
+        raise ValidationError({name: 'Enter an ISO 8601 date or datetime.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _status_ids(value):
+    """Resolve status ids or names (comma-separated) to ids."""
+    ids, names = set(), set()
+    for part in _split(value):
+        (ids if part.isdigit() else names).add(part)
+    ids = {int(pk) for pk in ids}
+    if names:
+        ids |= set(ContactStatus.objects.filter(name__in=names).values_list('pk', flat=True))
+    return ids
+
+
+def filter_contacts(queryset, params):
+    """
+    Filter and order contacts by query parameters.
+
+    Supported parameters:
+        status: Status ids or names, comma-separated
+        city: Exact city names, comma-separated
+        date_added_after: Inclusive lower bound (ISO date or datetime)
+        date_added_before: Exclusive upper bound (ISO date or datetime)
+        search: Free text, as in the list page search box
+        ordering: One of ORDERINGS (default -date_added)
+
+    Returns:
+        QuerySet: Filtered queryset
+
+    Raises:
+        ValidationError: for malformed dates or an unknown ordering
+    """
+    ordering = get_ordering(params)
+    by_date = ordering[0].lstrip('-') == 'date_added'
+    return apply_filters(queryset, params, date_index=by_date).order_by(*ordering)
+
+
+def apply_filters(queryset, params, date_index=True):
+    """
+    Apply the status, city, date_added and search filters of filter_contacts.
+
+    Works for ArchivedContact querysets too, which have the same fields.
+    With date_index=False the date_added bounds are checked per row
+    instead of choosing the index (for listings ordered by a name).
+    """
+    date_added = F('date_added') if date_index else RowValue('date_added', output_field=DateTimeField())
+    if params.get('status'):
+        queryset = queryset.filter(status_id__in=_status_ids(params['status']))
+    if params.get('city'):
+        queryset = queryset.filter(city__in=_split(params['city']))
+    if params.get('date_added_after'):
+        after = _parse_moment('date_added_after', params['date_added_after'])
+        queryset = queryset.filter(GreaterThanOrEqual(date_added, after))
+    if params.get('date_added_before'):
+        before = _parse_moment('date_added_before', params['date_added_before'])
+        queryset = queryset.filter(LessThan(date_added, before))
+    if params.get('search'):
+        queryset = search_contacts(queryset, params['search'])
+    return queryset
+
+
+def search_contacts(queryset, search_query):
+    """
+    Filter contacts (or archived contacts) by the list page search box.
+    """
+    if not search_query:
+        return queryset
+    digits = NON_DIGITS.sub('', search_query)
+    phone_part = PHONE_SEARCH.match(search_query.strip()) and len(digits) >= PHONE_SEARCH_MIN_DIGITS
+    phone_like = phone_part and len(digits) >= 9
+    if phone_like and search_query.strip().startswith(('+', '00')):
+        # A complete international number: exact lookup on the indexed E.164 key
+        return queryset.filter(phone_e164=normalize_phone(search_query))
+    lookup = (
+        Q(first_name__icontains=search_query) |
+        Q(last_name__icontains=search_query) |
+        Q(email__icontains=search_query) |
+        Q(city__icontains=search_query)
+    )
+    # Partial numbers match regardless of spaces and dashes; names and
+    # emails with digits in them are not looked up in phone numbers
+    if phone_part:
+        lookup |= Q(phone_e164__contains=digits)
+    if phone_like:
+        # A local number ("0 600 ...") under the default country code
+        lookup |= Q(phone_e164=normalize_phone(search_query))
+    return queryset.filter(lookup)
+
+
+def get_ordering(params):
+    """order_by() arguments for the ordering parameter (validated)."""
+    ordering = params.get('ordering') or '-date_added'
+    if ordering not in ORDERINGS:
+        raise ValidationError({'ordering': f'Choose one of: {", ".join(ORDERINGS)}.'})
+    return order_by_fields(ordering)
+
+
+def order_by_fields(ordering):
+    """
+    order_by() arguments for an ordering such as "-last_name".
+
+    Names are ordered by their stored sort keys (Polish alphabetical
+    order, indexed) and id breaks ties so pages are stable.
+    """
+    descending = ordering.startswith('-')
+    name = ordering.lstrip('-')
+    column = Contact.SORT_KEYS.get(name, name)
+    if descending:
+        return [f'-{column}', '-id']
+    return [column, 'id']
@@ -6,6 +6,7 @@ Includes validation for email and phone number fields.
 
 from django import forms
 from .models import Contact, ContactStatus
+from .uniqueness import constraint_first_enabled, unique_violations_as_errors
 
 
 class ContactForm(forms.ModelForm):
@@ -64,6 +65,24 @@ class ContactForm(forms.ModelForm):
             },
         }
     
+    def validate_unique(self):
+        """Skip the pre-flight uniqueness queries in constraint-first mode."""
+        if constraint_first_enabled():
+            return
+        super().validate_unique()
+    
+    def save(self, commit=True):
+        """
+        Save the contact.
+        
+        In constraint-first mode a duplicate email or phone number raises
+        ValidationError from here instead of during validation.
+        """
+        if not commit or not constraint_first_enabled():
+            return super().save(commit)
+        with unique_violations_as_errors():
+            return super().save(commit)
+    
     def clean_phone_number(self):
         """Additional validation for phone number."""
         phone = self.cleaned_data.get('phone_number')
@@ -121,6 +140,21 @@ class CSVImportForm(forms.Form):
         })
     )
     
+    mode = forms.ChoiceField(
+        label='Import mode',
+        choices=[
+            ('create', 'Create new contacts only'),
+            ('upsert', 'Create or update (match by email or phone number)'),
+        ],
+        initial='create',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
+    def clean_mode(self):
+        """Default to create-only imports."""
+        return self.cleaned_data.get('mode') or 'create'
+    
     def clean_csv_file(self):
         """Validate that uploaded file is a CSV."""
         file = self.cleaned_data.get('csv_file')
@@ -131,3 +165,48 @@ class CSVImportForm(forms.Form):
             if file.size > 5 * 1024 * 1024:
                 raise forms.ValidationError('File size should not exceed 5MB.')
         return file
+
+
+class ContactIdsField(forms.Field):
+    """Contact ids posted as repeated values (checkboxes named "ids")."""
+    widget = forms.MultipleHiddenInput
+    
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [int(pk) for pk in value]
+        except (TypeError, ValueError):
+            raise forms.ValidationError('Invalid contact selection.')
+
+
+class BulkActionForm(forms.Form):
+    """
+    Bulk action on contacts selected on the list page.
+    
+    Either the checked ids or, with all_matching, every contact matching
+    the search the list page showed.
+    """
+    ACTIONS = [
+        ('set_status', 'Set status'),
+        ('archive', 'Archive'),
+        ('export', 'Export CSV'),
+    ]
+    
+    action = forms.ChoiceField(choices=ACTIONS)
+    ids = ContactIdsField(required=False)
+    all_matching = forms.BooleanField(required=False)
+    search = forms.CharField(required=False)
+    status = forms.ModelChoiceField(
+        queryset=ContactStatus.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('ids') and not cleaned_data.get('all_matching'):
+            raise forms.ValidationError('Select at least one contact.')
+        if cleaned_data.get('action') == 'set_status' and not cleaned_data.get('status'):
+            self.add_error('status', 'Choose the status to set.')
+        return cleaned_data
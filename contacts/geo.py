@@ -0,0 +1,121 @@
+"""
+Proximity queries without a spatial database extension.
+
+Includes:
+- haversine_km: great-circle distance between two points
+- bounding_box: latitude range and longitude range(s) enclosing a circle
+- cities_within: geocoded cities inside a radius, nearest first
+- contacts_near: contacts living in those cities
+
+Contacts share the coordinates of their city (CityLocation), so a query
+first narrows the few thousand cities with an indexed bounding-box
+range scan, keeps those passing the exact haversine check, and then
+reads contacts city by city through the (city, date_added, id) index.
+No step scans the contacts table.
+"""
+
+from math import asin, cos, degrees, radians, sin, sqrt
+
+from django.db.models import Q
+
+from . import stats
+from .models import CityLocation, Contact, ContactStat
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres between two (lat, lon) points."""
+    phi1, phi2 = radians(lat1), radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, radians(lon2 - lon1)
+    a = sin(d_phi / 2) ** 2 + cos(phi1) * cos(phi2) * sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Smallest latitude/longitude box containing a circle.
+
+    Returns:
+        tuple: (min_lat, max_lat, lon_ranges), where lon_ranges holds two
+        (min_lon, max_lon) pairs when the box crosses the antimeridian
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat, max_lat = lat - degrees(angular), lat + degrees(angular)
+    if min_lat <= -90 or max_lat >= 90 or angular >= radians(90):
+        # The circle contains a pole: every longitude qualifies
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    d_lon = degrees(asin(min(1.0, sin(angular) / cos(radians(lat)))))
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def cities_within(lat, lon, radius_km):
+    """
+    Geocoded cities within radius_km of a point.
+
+    Returns:
+        list: (distance_km, CityLocation) pairs, nearest first
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+    in_lon = Q()
+    for min_lon, max_lon in lon_ranges:
+        in_lon |= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+    candidates = CityLocation.objects.filter(in_lon, latitude__gte=min_lat, latitude__lte=max_lat)
+
+    found = []
+    for location in candidates:
+        distance = haversine_km(lat, lon, location.latitude, location.longitude)
+        if distance <= radius_km:
+            found.append((distance, location))
+    found.sort(key=lambda pair: (pair[0], pair[1].name))
+    return found
+
+
+def contacts_near(lat, lon, radius_km, limit=100):
+    """
+    Contacts whose city lies within radius_km of a point.
+
+    Args:
+        lat, lon: Centre of the search in degrees
+        radius_km: Search radius in kilometres
+        limit: Maximum number of contacts returned
+
+    Returns:
+        dict: cities (name, coordinates, distance_km, count), count (all
+        matching contacts) and contacts (nearest cities first, newest
+        contacts first within a city), each paired with its distance
+    """
+    cities = cities_within(lat, lon, radius_km)
+    counts = dict(ContactStat.objects.filter(
+        dimension=stats.CITY, key__in=[location.name for _, location in cities]
+    ).values_list('key', 'count'))
+
+    contacts = []
+    for distance, location in cities:
+        if len(contacts) >= limit or not counts.get(location.name):
+            continue
+        page = Contact.objects.select_related('status').filter(city=location.name).order_by(
+            '-date_added', '-id'
+        )[:limit - len(contacts)]
+        contacts.extend((contact, distance) for contact in page)
+
+    return {
+        'cities': [
+            {
+                'city': location.name,
+                'latitude': location.latitude,
+                'longitude': location.longitude,
+                'distance_km': round(distance, 2),
+                'count': counts.get(location.name, 0),
+            }
+            for distance, location in cities
+        ],
+        'count': sum(counts.values()),
+        'contacts': contacts,
+    }
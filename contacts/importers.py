@@ -0,0 +1,241 @@
+"""
+Bulk import of contacts with upsert semantics.
+
+Includes:
+- UpsertResult: inserted/updated/unchanged/rejected counts and row errors
+- upsert_contacts: match rows to existing contacts by email or phone number
+  and write a whole batch with one INSERT and one UPDATE
+- write_batch: upsert one batch of numbered rows (for callers that batch
+  and report on their own, such as the NDJSON ingest)
+
+Each batch costs one SELECT to find the existing contacts, then a single
+bulk_create for new rows and a single bulk_update for changed ones, instead
+of a query (and often an IntegrityError) per row.
+"""
+
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .db import retry_on_locked
+from .models import Contact, ContactStatus
+
+# Columns compared and written when a row matches an existing contact
+UPSERT_FIELDS = ['first_name', 'last_name', 'phone_number', 'email', 'city', 'status']
+
+
+@dataclass
+class UpsertResult:
+    """Outcome of an upsert import."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def accepted(self):
+        return self.inserted + self.updated + self.unchanged
+
+    def reject(self, row_num, message):
+        self.rejected += 1
+        self.errors.append((row_num, message))
+
+    def add(self, other):
+        """Add the counts and errors of another result to this one."""
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.rejected += other.rejected
+        self.errors.extend(other.errors)
+
+    def as_dict(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'rejected': self.rejected,
+            'errors': [{'row': row_num, 'error': message} for row_num, message in self.errors],
+        }
+
+
+def _format_error(error):
+    """Flatten a model ValidationError into one line."""
+    if hasattr(error, 'message_dict'):
+        return '; '.join(
+            f'{name}: {" ".join(messages)}' for name, messages in error.message_dict.items()
+        )
+    return ' '.join(error.messages)
+
+
+def _resolve_statuses(rows):
+    """Map every status name used by the rows to a ContactStatus, creating missing ones."""
+    names = {str(row.get('status') or '').strip() for _, row in rows} - {''}
+    statuses = {s.name: s for s in ContactStatus.objects.filter(name__in=names)}
+    for name in names - statuses.keys():
+        statuses[name], _ = ContactStatus.objects.get_or_create(
+            name=name,
+            defaults={'description': f'Status: {name}'}
+        )
+    return statuses
+
+
+def _build_contact(row, statuses):
+    """
+    Turn an import row into an unsaved, validated Contact.
+
+    Raises:
+        ValidationError: if the row is incomplete or invalid
+    """
+    status_name = str(row.get('status') or '').strip()
+    if not status_name:
+        raise ValidationError('Status is required')
+
+    contact = Contact(
+        first_name=str(row.get('first_name') or '').strip(),
+        last_name=str(row.get('last_name') or '').strip(),
+        phone_number=str(row.get('phone_number') or '').strip(),
+        email=str(row.get('email') or '').strip().lower(),
+        city=str(row.get('city') or '').strip(),
+        status=statuses[status_name],
+    )
+    contact.full_clean(exclude=['status'], validate_unique=False)
+    contact.populate_derived_fields()
+    return contact
+
+
+@retry_on_locked
+def _upsert_batch(rows, statuses):
+    """Classify one batch against the database and write it."""
+    result = UpsertResult()
+    candidates = []
+    for row_num, row in rows:
+        try:
+            candidates.append((row_num, _build_contact(row, statuses)))
+        except ValidationError as e:
+            result.reject(row_num, _format_error(e))
+
+    # One query finds every existing contact the batch could match
+    emails = [c.email_normalized for _, c in candidates]
+    phones = [c.phone_e164 for _, c in candidates]
+    by_email, by_phone = {}, {}
+    for existing in Contact.objects.filter(Q(email_normalized__in=emails) | Q(phone_e164__in=phones)):
+        by_email[existing.email_normalized] = existing
+        by_phone[existing.phone_e164] = existing
+
+    now = timezone.now()
+    to_insert, to_update = [], {}
+    claimed_emails, claimed_phones, claimed_contacts = {}, {}, {}
+    for row_num, contact in candidates:
+        duplicate_of = claimed_emails.get(contact.email_normalized) or claimed_phones.get(contact.phone_e164)
+        if duplicate_of:
+            result.reject(row_num, f'Duplicate of row {duplicate_of} in this import')
+            continue
+
+        match_email = by_email.get(contact.email_normalized)
+        match_phone = by_phone.get(contact.phone_e164)
+        if match_email and match_phone and match_email.pk != match_phone.pk:
+            result.reject(
+                row_num,
+                f'Email matches contact #{match_email.pk} but phone number matches contact #{match_phone.pk}'
+            )
+            continue
+
+        target = match_email or match_phone
+        if target is not None and target.pk in claimed_contacts:
+            result.reject(row_num, f'Matches the same contact as row {claimed_contacts[target.pk]}')
+            continue
+
+        claimed_emails[contact.email_normalized] = row_num
+        claimed_phones[contact.phone_e164] = row_num
+        if target is None:
+            to_insert.append(contact)
+            result.inserted += 1
+            continue
+
+        claimed_contacts[target.pk] = row_num
+        changed = [
+            name for name in UPSERT_FIELDS
+            if getattr(target, Contact._meta.get_field(name).attname)
+            != getattr(contact, Contact._meta.get_field(name).attname)
+        ]
+        if not changed:
+            result.unchanged += 1
+            continue
+        for name in changed:
+            setattr(target, name, getattr(contact, name))
+        # bulk_update() bypasses auto_now, so stamp the row explicitly
+        target.updated_at = now
+        to_update[target.pk] = target
+        result.updated += 1
+
+    with transaction.atomic():
+        if to_insert:
+            # A contact inserted concurrently with the same email since the
+            # SELECT above becomes an update instead of a failed batch
+            Contact.objects.bulk_create(
+                to_insert,
+                update_conflicts=True,
+                unique_fields=['email_normalized'],
+                update_fields=[f for f in UPSERT_FIELDS if f != 'email'] + ['updated_at'],
+            )
+        if to_update:
+            Contact.objects.bulk_update(to_update.values(), UPSERT_FIELDS + ['updated_at'])
+    return result
+
+
+def upsert_contacts(rows, batch_size=500, start=1):
+    """
+    Insert new contacts and update existing ones in batches.
+
+    A row matches an existing contact by normalized email or phone number. Matched
+    contacts are updated only if a field actually changed. Rows that are
+    invalid, conflict with two different contacts or repeat an earlier
+    row of the same import are rejected.
+
+    Args:
+        rows: Iterable of dicts with first_name, last_name, phone_number,
+            email, city and status (name) keys
+        batch_size: Rows classified and written per transaction
+        start: Number reported for the first row in errors
+
+    Returns:
+        UpsertResult: Counts and per-row errors
+    """
+    result = UpsertResult()
+    batch = []
+    for row_num, row in enumerate(rows, start=start):
+        batch.append((row_num, row))
+        if len(batch) >= batch_size:
+            result.add(write_batch(batch))
+            batch = []
+    if batch:
+        result.add(write_batch(batch))
+    return result
+
+
+def write_batch(batch):
+    """
+    Upsert one batch, retrying once if a concurrent writer caused a conflict.
+
+    Args:
+        batch: List of (row number, row dict) pairs
+
+    Returns:
+        UpsertResult: Counts and errors of this batch
+    """
+    statuses = _resolve_statuses(batch)
+    for attempt in range(2):
+        try:
+            batch_result = _upsert_batch(batch, statuses)
+            break
+        except IntegrityError:
+            # Another writer took a phone number since the SELECT;
+            # classify the batch again against the current data
+            if attempt:
+                raise
+    batch_result.errors.sort()
+    return batch_result
@@ -0,0 +1,157 @@
+"""
+Streaming NDJSON ingest of contacts.
+
+Includes:
+- read_lines: split a (possibly gzip-compressed) byte stream into lines
+  of bounded length
+- parse_rows: numbered contact dicts, or an error per unparsable line
+- ingest: upsert the rows in fixed-size batches, yielding a summary per
+  batch and a final total
+
+The request body is read line by line as batches are written, so memory
+use is bounded by the batch size and the longest allowed line, not by
+the size of the upload. Rows are matched and written exactly as in the
+CSV and bulk imports (see contacts.importers).
+"""
+
+import gzip
+import json
+import time
+import zlib
+
+from . import db_routers, metrics
+from .importers import UpsertResult, write_batch
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+
+# A contact is a few hundred bytes; anything much longer is not one
+MAX_LINE_BYTES = 64 * 1024
+
+READ_SIZE = 64 * 1024
+
+
+def open_body(stream, content_encoding=''):
+    """Wrap a request body in a decompressor if it was sent compressed."""
+    if content_encoding.strip().lower() in ('gzip', 'x-gzip'):
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    return stream
+
+
+def read_lines(stream, max_line_bytes=MAX_LINE_BYTES):
+    """
+    Lines of a byte stream without their line endings.
+
+    Yields:
+        bytes or None: a line, or None in place of a line longer than
+        max_line_bytes (which is skipped without being buffered)
+    """
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Drop the rest of the oversized line a chunk at a time
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(READ_SIZE)
+            yield None
+            continue
+        yield line.rstrip(b'\r\n')
+
+
+def parse_rows(lines):
+    """
+    Decode NDJSON lines.
+
+    Yields:
+        tuple: (line number, row dict, None) or (line number, None, error);
+        blank lines are skipped
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if line is None:
+            yield line_number, None, f'Line longer than {MAX_LINE_BYTES} bytes'
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except (UnicodeDecodeError, ValueError) as e:
+            yield line_number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Expected a JSON object'
+            continue
+        yield line_number, row, None
+
+
+def _summary(result, **extra):
+    return {
+        **extra,
+        'inserted': result.inserted,
+        'updated': result.updated,
+        'unchanged': result.unchanged,
+        'rejected': result.rejected,
+    }
+
+
+def _flush(number, rows, errors):
+    # Reads must see this request's own writes even with read replicas.
+    # Pinned per batch: a context manager held across yields would be
+    # entered and left in different contexts when streamed under ASGI.
+    with db_routers.primary_pinned():
+        result = write_batch(rows) if rows else UpsertResult()
+    for line_number, message in errors:
+        result.reject(line_number, message)
+    result.errors.sort()
+    lines = [line_number for line_number, _ in rows] + [line_number for line_number, _ in errors]
+    batch = _summary(result, batch=number, first_line=min(lines), last_line=max(lines))
+    batch['errors'] = [{'line': line_number, 'error': message} for line_number, message in result.errors]
+    return result, batch
+
+
+def ingest(stream, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert the contacts of an NDJSON stream in batches.
+
+    Args:
+        stream: File-like object with readline() (already decompressed)
+        batch_size: Lines per batch, each written in one transaction
+
+    Yields:
+        dict: one summary per batch (counts and errors by line number),
+        then a final one with the totals and "done": true (plus "error"
+        if the body could not be read to the end)
+    """
+    started = time.perf_counter()
+    total = UpsertResult()
+    batches, lines = 0, 0
+    rows, errors = [], []
+    failure = None
+    try:
+        for line_number, row, error in parse_rows(read_lines(stream)):
+            lines = line_number
+            if error:
+                errors.append((line_number, error))
+            else:
+                rows.append((line_number, row))
+            if len(rows) + len(errors) >= batch_size:
+                batches += 1
+                result, summary = _flush(batches, rows, errors)
+                total.add(result)
+                rows, errors = [], []
+                yield summary
+    except (EOFError, OSError, zlib.error) as e:
+        # Corrupt or truncated gzip body: keep what was read before it
+        failure = f'Could not read the request body: {e}'
+    if rows or errors:
+        batches += 1
+        result, summary = _flush(batches, rows, errors)
+        total.add(result)
+        yield summary
+
+    seconds = time.perf_counter() - started
+    metrics.record_import(total.accepted, total.rejected, seconds)
+    totals = _summary(total, done=True, batches=batches, lines=lines, seconds=round(seconds, 3))
+    if failure:
+        totals['error'] = failure
+    yield totals
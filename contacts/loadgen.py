@@ -0,0 +1,445 @@
+"""
+Asyncio HTTP load generator used by the ``loadtest`` management command.
+
+Drives a running instance with a weighted mix of list pages, API CRUD,
+weather lookups and CSV uploads (or replays a recorded traffic file) at a
+target request rate and concurrency, and reports throughput, latency
+percentiles and error rate per endpoint.
+
+Only the standard library is used: requests go over keep-alive
+HTTP/1.1 connections opened with asyncio streams.
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from urllib.parse import quote, urlencode, urlsplit
+
+SEARCH_TERMS = ['', '', '', 'nowak', 'kowal', 'anna', 'Kraków', 'warszawa', '600', 'example.org']
+SORTS = ['-date_added', 'date_added', 'last_name', '-last_name']
+CITIES = ['Warszawa', 'Kraków', 'Łódź', 'Wrocław', 'Poznań', 'Gdańsk', 'Szczecin', 'Lublin']
+
+# Requests re-sent when a kept-alive connection turns out to be closed;
+# others may have been processed and are counted as errors instead
+SAFE_TO_RETRY = ('GET', 'HEAD', 'OPTIONS')
+
+# Endpoint name -> relative weight in the default mix
+DEFAULT_MIX = {
+    'list_page': 40,
+    'api_list': 15,
+    'api_retrieve': 15,
+    'api_create': 5,
+    'api_update': 4,
+    'api_delete': 2,
+    'weather': 18,
+    'csv_upload': 1,
+}
+
+
+@dataclass
+class PlannedRequest:
+    """A single request to send, as generated or replayed."""
+    name: str
+    method: str
+    path: str
+    body: bytes = b''
+    headers: dict = field(default_factory=dict)
+    at: float = 0.0  # Offset in seconds from the start of the run
+
+    def to_record(self):
+        return {
+            'name': self.name,
+            'method': self.method,
+            'path': self.path,
+            'body': self.body.decode('utf-8', errors='replace'),
+            'headers': self.headers,
+            't': round(self.at, 6),
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(
+            name=record.get('name') or record['path'].split('?')[0],
+            method=record.get('method', 'GET'),
+            path=record['path'],
+            body=record.get('body', '').encode('utf-8'),
+            headers=record.get('headers', {}),
+            at=float(record.get('t', 0.0)),
+        )
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict
+    body: bytes
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, host, port, use_ssl, timeout):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        return await asyncio.wait_for(self._request(method, path, body, headers or {}), self.timeout)
+
+    async def _request(self, method, path, body, headers, retried=False):
+        reused = self.writer is not None
+        if not reused:
+            await self._connect()
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: keep-alive']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f'Content-Length: {len(body)}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            self.close()
+            if reused and not retried and method in SAFE_TO_RETRY:
+                # Server closed an idle keep-alive connection; retry once on a fresh one
+                return await self._request(method, path, body, headers, retried=True)
+            raise ConnectionError('Server closed the connection without a response')
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers.setdefault(name.strip().lower(), []).append(value.strip())
+
+        if 'chunked' in ','.join(response_headers.get('transfer-encoding', [])):
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            response_body = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            response_body = await self.reader.readexactly(int(response_headers['content-length'][0]))
+        elif method == 'HEAD' or status in (204, 304):
+            response_body = b''
+        else:
+            response_body = await self.reader.read()
+            self.close()
+
+        if 'close' in ','.join(response_headers.get('connection', [])).lower():
+            self.close()
+        return Response(status, response_headers, response_body)
+
+
+class TrafficMix:
+    """
+    Generates a weighted mix of requests.
+
+    Keeps track of contact ids seen and created so retrieves, updates and
+    deletes target existing rows.
+    """
+
+    def __init__(self, weights, csv_rows=50):
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.csv_rows = csv_rows
+        self.contact_ids = []
+        self.status_ids = []
+        self.csrf_token = None
+
+    def next(self):
+        name = random.choices(self.names, self.weights)[0]
+        return getattr(self, f'make_{name}')()
+
+    def _json(self, name, method, path, payload):
+        return PlannedRequest(
+            name, method, path, json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+        )
+
+    def _contact_payload(self):
+        token = uuid.uuid4().hex
+        return {
+            'first_name': 'Load',
+            'last_name': 'Tester',
+            'phone_number': f'+48 {int(token[:10], 16) % 10**9:09d}',
+            'email': f'load-{token}@example.com',
+            'city': random.choice(CITIES),
+            'status': random.choice(self.status_ids) if self.status_ids else 1,
+        }
+
+    def make_list_page(self):
+        params = {'sort': random.choice(SORTS)}
+        search = random.choice(SEARCH_TERMS)
+        if search:
+            params['search'] = search
+        return PlannedRequest('list_page', 'GET', '/?' + urlencode(params))
+
+    def make_api_list(self):
+        return PlannedRequest('api_list', 'GET', '/api/contacts/')
+
+    def make_api_retrieve(self):
+        if not self.contact_ids:
+            return self.make_api_list()
+        return PlannedRequest('api_retrieve', 'GET', f'/api/contacts/{random.choice(self.contact_ids)}/')
+
+    def make_api_create(self):
+        return self._json('api_create', 'POST', '/api/contacts/', self._contact_payload())
+
+    def make_api_update(self):
+        if not self.contact_ids:
+            return self.make_api_create()
+        payload = {'city': random.choice(CITIES)}
+        return self._json('api_update', 'PATCH', f'/api/contacts/{random.choice(self.contact_ids)}/', payload)
+
+    def make_api_delete(self):
+        if len(self.contact_ids) < 10:
+            return self.make_api_create()
+        contact_id = self.contact_ids.pop(random.randrange(len(self.contact_ids)))
+        return PlannedRequest('api_delete', 'DELETE', f'/api/contacts/{contact_id}/')
+
+    def make_weather(self):
+        city = random.choice(CITIES)
+        return PlannedRequest('weather', 'GET', f'/weather/{quote(city)}/')
+
+    def make_csv_upload(self):
+        boundary = uuid.uuid4().hex
+        token = uuid.uuid4().hex[:8]
+        rows = ['first_name,last_name,phone_number,email,city,status']
+        for i in range(self.csv_rows):
+            digits = f'{int(token, 16) % 10**6:06d}{i:03d}'
+            rows.append(f'Csv,Upload,+48 {digits},csv-{token}-{i}@example.com,{random.choice(CITIES)},new')
+        body = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="csrfmiddlewaretoken"\r\n\r\n{self.csrf_token or ""}\r\n'
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="csv_file"; filename="load.csv"\r\n'
+            f'Content-Type: text/csv\r\n\r\n' + '\n'.join(rows) + f'\r\n--{boundary}--\r\n'
+        ).encode('utf-8')
+        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        if self.csrf_token:
+            headers['Cookie'] = f'csrftoken={self.csrf_token}'
+            headers['X-CSRFToken'] = self.csrf_token
+        return PlannedRequest('csv_upload', 'POST', '/import-csv/', body, headers)
+
+    def observe(self, planned, response):
+        """Learn contact ids from API responses."""
+        if not planned.name.startswith('api_') or response.status >= 400 or not response.body:
+            return
+        try:
+            data = json.loads(response.body)
+        except ValueError:
+            return
+        if planned.name == 'api_create' and isinstance(data, dict) and 'id' in data:
+            self.contact_ids.append(data['id'])
+        elif planned.name == 'api_list' and isinstance(data, dict):
+            for item in data.get('results', []):
+                if len(self.contact_ids) < 10000 and item.get('id') not in self.contact_ids:
+                    self.contact_ids.append(item['id'])
+
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    status_codes: dict = field(default_factory=dict)
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest-rank method)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class LoadTest:
+    """
+    Run a load test against base_url.
+
+    Args:
+        base_url (str): e.g. http://127.0.0.1:8000
+        rate (float): Target requests per second; 0 sends as fast as
+            concurrency allows (closed loop).
+        concurrency (int): Number of parallel connections.
+        duration (float): Seconds to generate traffic for (ignored on replay).
+        mix (dict): Endpoint weights, see DEFAULT_MIX.
+        replay (list): PlannedRequests to replay instead of generating traffic.
+        record (file): Optional file object receiving the sent traffic as JSON lines.
+        speed (float): Replay speed multiplier.
+    """
+
+    def __init__(self, base_url, rate=50.0, concurrency=10, duration=30.0, mix=None,
+                 replay=None, record=None, speed=1.0, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.use_ssl = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.traffic = TrafficMix(mix or DEFAULT_MIX)
+        self.replay = replay
+        self.record = record
+        self.speed = speed
+        self.timeout = timeout
+        self.stats = {}
+
+    def _connection(self):
+        return HTTPConnection(self.host, self.port, self.use_ssl, self.timeout)
+
+    async def prepare(self):
+        """Fetch status ids, seed contact ids and a CSRF token for uploads."""
+        connection = self._connection()
+        try:
+            response = await connection.request('GET', '/api/statuses/')
+            if response.status == 200:
+                data = json.loads(response.body)
+                items = data.get('results', data) if isinstance(data, dict) else data
+                self.traffic.status_ids = [item['id'] for item in items]
+            response = await connection.request('GET', '/api/contacts/')
+            if response.status == 200:
+                self.traffic.observe(PlannedRequest('api_list', 'GET', '/api/contacts/'), response)
+            response = await connection.request('GET', '/import-csv/')
+            cookie = SimpleCookie()
+            for header in response.headers.get('set-cookie', []):
+                cookie.load(header)
+            if 'csrftoken' in cookie:
+                self.traffic.csrf_token = cookie['csrftoken'].value
+        finally:
+            connection.close()
+
+    async def _schedule(self, queue, start):
+        """Put (intended start time, request) tickets on the queue."""
+        if self.replay is not None:
+            for planned in self.replay:
+                delay = start + planned.at / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await queue.put((start + planned.at / self.speed, planned))
+        elif self.rate > 0:
+            interval = 1.0 / self.rate
+            ticket = 0
+            while True:
+                intended = start + ticket * interval
+                if intended - start >= self.duration:
+                    break
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                planned = self.traffic.next()
+                planned.at = intended - start
+                await queue.put((intended, planned))
+                ticket += 1
+        else:
+            while time.perf_counter() - start < self.duration:
+                planned = self.traffic.next()
+                planned.at = time.perf_counter() - start
+                await queue.put((None, planned))
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    async def _worker(self, queue):
+        connection = self._connection()
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                intended, planned = item
+                if self.record is not None:
+                    self.record.write(json.dumps(planned.to_record()) + '\n')
+                sent = time.perf_counter()
+                stats = self.stats.setdefault(planned.name, EndpointStats())
+                try:
+                    response = await connection.request(planned.method, planned.path, planned.body, planned.headers)
+                except (OSError, asyncio.TimeoutError, ValueError, asyncio.IncompleteReadError) as e:
+                    connection.close()
+                    stats.errors += 1
+                    key = type(e).__name__
+                    stats.status_codes[key] = stats.status_codes.get(key, 0) + 1
+                    continue
+                # Measure from the intended send time so server stalls are not hidden
+                # by the generator waiting (coordinated omission)
+                stats.latencies.append(time.perf_counter() - (intended or sent))
+                stats.status_codes[response.status] = stats.status_codes.get(response.status, 0) + 1
+                if response.status >= 400:
+                    stats.errors += 1
+                self.traffic.observe(planned, response)
+        finally:
+            connection.close()
+
+    async def run(self):
+        """Run the test and return the report dict."""
+        await self.prepare()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        start = time.perf_counter()
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        await self._schedule(queue, start)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        endpoints = {}
+        all_latencies = []
+        total_errors = 0
+        for name, stats in sorted(self.stats.items()):
+            count = len(stats.latencies) + sum(
+                n for code, n in stats.status_codes.items() if isinstance(code, str)
+            )
+            all_latencies.extend(stats.latencies)
+            total_errors += stats.errors
+            endpoints[name] = {
+                'requests': count,
+                'throughput_rps': round(count / elapsed, 2),
+                'p50_ms': round(percentile(stats.latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(stats.latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(stats.latencies, 99) * 1000, 2),
+                'error_rate': round(stats.errors / count, 4) if count else 0.0,
+                'status_codes': {str(code): n for code, n in stats.status_codes.items()},
+            }
+        total = sum(e['requests'] for e in endpoints.values())
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'target_rps': self.rate,
+            'concurrency': self.concurrency,
+            'total': {
+                'requests': total,
+                'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(all_latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(all_latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(all_latencies, 99) * 1000, 2),
+                'error_rate': round(total_errors / total, 4) if total else 0.0,
+            },
+            'endpoints': endpoints,
+        }
+
+
+def load_replay(path):
+    """Read a JSON-lines traffic file into PlannedRequests sorted by offset."""
+    with open(path, encoding='utf-8') as f:
+        planned = [PlannedRequest.from_record(json.loads(line)) for line in f if line.strip()]
+    return sorted(planned, key=lambda p: p.at)
@@ -0,0 +1,48 @@
+"""
+Management command to move old contacts out of the main table.
+
+Contacts with one of the given statuses (by default "lost" and
+"outdated") added more than --older-than-days ago are copied to
+ArchivedContact and deleted from the main table, --chunk-size contacts
+per transaction, so the main table and its indexes stay small.
+
+Run with: python manage.py archive_contacts --statuses lost,outdated --older-than-days 180
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contacts.archive import DEFAULT_STATUSES, archive_contacts
+from contacts.models import ContactStatus
+
+
+class Command(BaseCommand):
+    help = 'Moves contacts by status and age into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--statuses', default=','.join(DEFAULT_STATUSES),
+            help='Comma-separated status names to archive'
+        )
+        parser.add_argument(
+            '--older-than-days', type=int, default=180,
+            help='Only archive contacts added at least this many days ago'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Contacts moved per transaction')
+
+    def handle(self, *args, **options):
+        statuses = [name.strip() for name in options['statuses'].split(',') if name.strip()]
+        unknown = set(statuses) - set(ContactStatus.objects.filter(name__in=statuses).values_list('name', flat=True))
+        if unknown or not statuses:
+            raise CommandError(f'Unknown status(es): {", ".join(sorted(unknown)) or "none given"}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        result = archive_contacts(statuses, cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {result.moved} contacts in {result.chunks} chunks '
+            f'(statuses: {", ".join(statuses)}; added before {cutoff:%Y-%m-%d})'
+        ))
@@ -0,0 +1,148 @@
+"""
+Management command to report clusters of likely duplicate contacts.
+
+Instead of comparing every pair of contacts, each contact gets a blocking
+key per rule (national phone number, mailbox, folded name + city). The
+(key, id) pairs are sorted and contacts sharing a key in a sorted run are
+joined; clusters found by different rules are merged with union-find.
+The cost is one streaming pass plus a sort per rule, O(n log n) overall.
+
+Run with: python manage.py find_duplicates --keys phone,email,name
+"""
+
+import json
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contacts.models import Contact
+from contacts.normalization import mailbox_key, name_key, national_number, normalize_email, normalize_phone
+
+BLOCKING_RULES = {
+    'phone': lambda row: national_number(normalize_phone(row['phone_number'])),
+    'email': lambda row: mailbox_key(normalize_email(row['email'])),
+    'name': lambda row: name_key(row['first_name'], row['last_name'], row['city']),
+}
+
+ROW_FIELDS = ['id', 'first_name', 'last_name', 'phone_number', 'email', 'city']
+
+
+class DisjointSet:
+    """Union-find over contact ids."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while item != root:  # Path compression
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class Command(BaseCommand):
+    help = 'Finds clusters of likely duplicate contacts using blocking keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keys', default='phone,email',
+            help=f'Comma-separated blocking rules: {", ".join(BLOCKING_RULES)}'
+        )
+        parser.add_argument('--limit', type=int, default=50, help='Clusters to print (0 for all)')
+        parser.add_argument(
+            '--max-block', type=int, default=100,
+            help='Ignore keys shared by more contacts than this (e.g. very common names)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows fetched per round trip')
+        parser.add_argument('--json', action='store_true', help='Print clusters as JSON')
+
+    def handle(self, *args, **options):
+        rules = [key.strip() for key in options['keys'].split(',') if key.strip()]
+        unknown = set(rules) - BLOCKING_RULES.keys()
+        if unknown or not rules:
+            raise CommandError(f'Unknown blocking rule(s): {", ".join(sorted(unknown)) or "none given"}')
+
+        # One streaming pass builds the (key, id) pairs for every rule
+        pairs = {rule: [] for rule in rules}
+        total = 0
+        rows = Contact.objects.order_by().values(*ROW_FIELDS).iterator(chunk_size=options['chunk_size'])
+        for row in rows:
+            total += 1
+            for rule in rules:
+                key = BLOCKING_RULES[rule](row)
+                if key:
+                    pairs[rule].append((key, row['id']))
+
+        clusters = DisjointSet()
+        hits = []
+        skipped_blocks = 0
+        for rule in rules:
+            pairs[rule].sort()
+            for _, run in groupby(pairs[rule], key=itemgetter(0)):
+                ids = [contact_id for _, contact_id in run]
+                if len(ids) < 2:
+                    continue
+                if len(ids) > options['max_block']:
+                    skipped_blocks += 1
+                    continue
+                for contact_id in ids[1:]:
+                    clusters.union(ids[0], contact_id)
+                hits.append((ids[0], rule))
+            pairs[rule] = None  # Release memory before the next rule
+
+        groups = defaultdict(list)
+        for contact_id in list(clusters.parent):
+            groups[clusters.find(contact_id)].append(contact_id)
+        matched_on = defaultdict(set)
+        for contact_id, rule in hits:
+            matched_on[clusters.find(contact_id)].add(rule)
+
+        found = sorted(groups.values(), key=lambda ids: (-len(ids), min(ids)))
+        shown = found[:options['limit']] if options['limit'] else found
+        details = Contact.objects.in_bulk([contact_id for ids in shown for contact_id in ids])
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'contacts_scanned': total,
+                'clusters': len(found),
+                'duplicates': sum(len(ids) - 1 for ids in found),
+                'results': [
+                    {
+                        'ids': sorted(ids),
+                        'matched_on': sorted(matched_on[clusters.find(ids[0])]),
+                        'contacts': [
+                            {field: getattr(details[i], field) for field in ROW_FIELDS}
+                            for i in sorted(ids)
+                        ],
+                    }
+                    for ids in shown
+                ],
+            }, indent=2))
+            return
+
+        for number, ids in enumerate(shown, start=1):
+            rules_hit = ', '.join(sorted(matched_on[clusters.find(ids[0])]))
+            self.stdout.write(f'Cluster {number} ({len(ids)} contacts, matched on {rules_hit}):')
+            for contact_id in sorted(ids):
+                contact = details[contact_id]
+                self.stdout.write(
+                    f'  #{contact.pk} {contact.get_full_name()} <{contact.email}> '
+                    f'{contact.phone_number} ({contact.city})'
+                )
+        if skipped_blocks:
+            self.stdout.write(self.style.WARNING(
+                f'Skipped {skipped_blocks} blocks larger than --max-block {options["max_block"]}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {total} contacts: {len(found)} clusters, '
+            f'{sum(len(ids) - 1 for ids in found)} likely duplicates'
+        ))
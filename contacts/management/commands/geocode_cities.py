@@ -0,0 +1,54 @@
+"""
+Management command to geocode the cities contacts live in.
+
+Cities are read from the ContactStat city counters (no scan of the
+contacts table); those without a CityLocation are looked up with
+Nominatim, at most one request per --delay seconds as its usage policy
+requires. Proximity queries only see contacts whose city is geocoded.
+
+Run with: python manage.py geocode_cities
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from contacts import stats
+from contacts.models import CityLocation, ContactStat
+from contacts.weather_views import get_city_coordinates
+
+
+class Command(BaseCommand):
+    help = 'Stores coordinates for every contact city that has none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=0, help='Cities to geocode (0 for all)')
+        parser.add_argument('--delay', type=float, default=1.0, help='Seconds between Nominatim requests')
+
+    def handle(self, *args, **options):
+        known = set(CityLocation.objects.values_list('name', flat=True))
+        cities = [
+            city for city in ContactStat.objects.filter(
+                dimension=stats.CITY, count__gt=0
+            ).order_by('-count', 'key').values_list('key', flat=True)
+            if city not in known
+        ]
+        if options['limit']:
+            cities = cities[:options['limit']]
+
+        found = 0
+        for number, city in enumerate(cities):
+            if number and options['delay']:
+                time.sleep(options['delay'])
+            lat, lon = get_city_coordinates(city)
+            if lat is None:
+                self.stdout.write(self.style.WARNING(f'Not found: {city}'))
+                continue
+            # Coordinates served from the weather cache were not stored yet
+            CityLocation.objects.update_or_create(name=city, defaults={'latitude': lat, 'longitude': lon})
+            found += 1
+            self.stdout.write(f'{city}: {lat:.4f}, {lon:.4f}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Geocoded {found} of {len(cities)} cities ({len(known)} already known)'
+        ))
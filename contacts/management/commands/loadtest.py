@@ -0,0 +1,83 @@
+"""
+Management command to load test a running instance over HTTP.
+
+Run with: python manage.py loadtest http://127.0.0.1:8000 --rate 100 --concurrency 20 --duration 60
+"""
+
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contacts.loadgen import DEFAULT_MIX, LoadTest, load_replay
+
+
+class Command(BaseCommand):
+    help = 'Drives a running instance with a configurable traffic mix and reports p50/p95/p99 per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', nargs='?', default='http://127.0.0.1:8000')
+        parser.add_argument('--rate', type=float, default=50.0,
+                            help='Target requests per second (0 = as fast as concurrency allows)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Parallel connections')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of traffic to generate')
+        parser.add_argument('--mix', action='append', default=[], metavar='ENDPOINT=WEIGHT',
+                            help=f'Override a weight in the traffic mix ({", ".join(DEFAULT_MIX)}); repeatable')
+        parser.add_argument('--replay', help='Replay a JSON-lines traffic file instead of generating traffic')
+        parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier')
+        parser.add_argument('--record', help='Write the sent traffic to a JSON-lines file for later replay')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        mix = dict(DEFAULT_MIX)
+        for item in options['mix']:
+            name, _, weight = item.partition('=')
+            if name not in DEFAULT_MIX:
+                raise CommandError(f'Unknown endpoint "{name}" in --mix')
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight in --mix {item}')
+
+        replay = load_replay(options['replay']) if options['replay'] else None
+        record = open(options['record'], 'w', encoding='utf-8') if options['record'] else None
+        try:
+            test = LoadTest(
+                options['base_url'],
+                rate=options['rate'],
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                mix=mix,
+                replay=replay,
+                record=record,
+                speed=options['speed'],
+                timeout=options['timeout'],
+            )
+            report = asyncio.run(test.run())
+        except OSError as e:
+            raise CommandError(f'Could not reach {options["base_url"]}: {e}')
+        finally:
+            if record is not None:
+                record.close()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        total = report['total']
+        self.stdout.write(
+            f"{'endpoint':<14} {'requests':>9} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}"
+        )
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:<14} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+                f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>8.2%}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nTotal: {total['requests']} requests in {report['elapsed_seconds']}s, "
+                f"{total['throughput_rps']} req/s, p50 {total['p50_ms']} ms, p95 {total['p95_ms']} ms, "
+                f"p99 {total['p99_ms']} ms, errors {total['error_rate']:.2%}"
+            )
+        )
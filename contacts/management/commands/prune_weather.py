@@ -0,0 +1,44 @@
+"""
+Management command to keep the weather observation table small.
+
+Observations older than --raw-days are folded into hourly averages,
+hourly ones older than --hourly-days into daily averages, and anything
+older than --keep-days is deleted (see contacts.weather_store). Meant to
+run daily, e.g. from cron.
+
+Run with: python manage.py prune_weather --raw-days 2 --hourly-days 30 --keep-days 365
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contacts import weather_store
+
+
+class Command(BaseCommand):
+    help = 'Downsamples old weather observations and deletes expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days', type=int, default=weather_store.RAW_DAYS,
+            help='Keep 15-minute observations for this many days'
+        )
+        parser.add_argument(
+            '--hourly-days', type=int, default=weather_store.HOURLY_DAYS,
+            help='Keep hourly averages for this many days'
+        )
+        parser.add_argument(
+            '--keep-days', type=int, default=weather_store.KEEP_DAYS,
+            help='Delete observations older than this many days'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = weather_store.prune(
+                raw_days=options['raw_days'], hourly_days=options['hourly_days'], keep_days=options['keep_days']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded {result['folded_hourly']} observations into hourly and "
+            f"{result['folded_daily']} into daily averages; deleted {result['deleted']}"
+        ))
@@ -0,0 +1,25 @@
+"""
+Management command to recompute the contact summary counts.
+
+The counts are maintained on every write; this repairs drift after raw
+SQL changes, restores or bugs.
+
+Run with: python manage.py rebuild_contact_stats
+"""
+
+from django.core.management.base import BaseCommand
+
+from contacts import stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the ContactStat summary table from the contacts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        drifted = stats.rebuild(using=options['database'])
+        if drifted:
+            self.stdout.write(self.style.WARNING(f'Corrected {drifted} drifted counters'))
+        self.stdout.write(self.style.SUCCESS('Contact stats rebuilt'))
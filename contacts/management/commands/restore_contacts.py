@@ -0,0 +1,62 @@
+"""
+Management command to move archived contacts back into the main table.
+
+Select contacts by --ids or by --statuses (optionally only those
+archived in the last --archived-within-days); --all restores everything.
+Contacts whose phone number or email was taken in the meantime stay
+archived and are listed.
+
+Run with: python manage.py restore_contacts --ids 12,34
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from contacts.archive import restore_contacts
+from contacts.models import ArchivedContact
+
+
+class Command(BaseCommand):
+    help = 'Moves archived contacts back into the main contacts table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', default='', help='Comma-separated contact ids to restore')
+        parser.add_argument('--statuses', default='', help='Comma-separated status names to restore')
+        parser.add_argument(
+            '--archived-within-days', type=int, default=None,
+            help='Only restore contacts archived in the last N days'
+        )
+        parser.add_argument('--all', action='store_true', help='Restore every archived contact')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Contacts moved per transaction')
+
+    def handle(self, *args, **options):
+        queryset = ArchivedContact.objects.all()
+        selected = options['all']
+        if options['ids']:
+            try:
+                ids = [int(pk) for pk in options['ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--ids must be comma-separated integers')
+            queryset = queryset.filter(pk__in=ids)
+            selected = True
+        if options['statuses']:
+            names = [name.strip() for name in options['statuses'].split(',') if name.strip()]
+            queryset = queryset.filter(status__name__in=names)
+            selected = True
+        if options['archived_within_days'] is not None:
+            since = timezone.now() - timedelta(days=options['archived_within_days'])
+            queryset = queryset.filter(archived_at__gte=since)
+            selected = True
+        if not selected:
+            raise CommandError('Choose contacts with --ids, --statuses, --archived-within-days or --all')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        result = restore_contacts(queryset, chunk_size=options['chunk_size'])
+        for pk, field in result.skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped #{pk}: {field} is used by another contact'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Restored {result.moved} contacts ({len(result.skipped)} skipped)'
+        ))
@@ -0,0 +1,121 @@
+"""
+Management command to generate synthetic contacts for benchmarks and demos.
+
+Run with: python manage.py seed_contacts --count 100000
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from contacts.models import Contact, ContactStatus
+
+FIRST_NAMES = [
+    'Anna', 'Maria', 'Katarzyna', 'Małgorzata', 'Agnieszka', 'Barbara', 'Ewa', 'Krystyna',
+    'Elżbieta', 'Zofia', 'Joanna', 'Magdalena', 'Łucja', 'Jadwiga', 'Bożena', 'Urszula',
+    'Piotr', 'Krzysztof', 'Andrzej', 'Tomasz', 'Paweł', 'Michał', 'Marcin', 'Jakub',
+    'Łukasz', 'Grzegorz', 'Mateusz', 'Wojciech', 'Stanisław', 'Józef', 'Zbigniew', 'Jan',
+    'John', 'Jane', 'Emily', 'Oliver', 'Sophie', 'Liam', "D'Arcy", 'Anne-Marie',
+]
+
+LAST_NAMES = [
+    'Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk', 'Kamiński', 'Lewandowski',
+    'Zieliński', 'Szymański', 'Woźniak', 'Dąbrowski', 'Kozłowski', 'Jankowski', 'Mazur',
+    'Kwiatkowski', 'Krawczyk', 'Piotrowski', 'Grabowski', 'Nowakowski', 'Pawłowski',
+    'Michalski', 'Nowicki', 'Adamczyk', 'Dudek', 'Zając', 'Wieczorek', 'Jabłoński', 'Król',
+    'Majewski', 'Olszewski', 'Jaworski', 'Wróbel', 'Malinowski', 'Pawlak', 'Witkowski',
+    'Walczak', 'Stępień', 'Górski', 'Rutkowski', 'Michalak', 'Sikora', 'Ostrowski',
+    'Baran', 'Duda', 'Szewczyk', 'Tomaszewski', 'Pietrzak', 'Marciniak', 'Wróblewski',
+    'Zalewski', 'Jakubowski', 'Jasiński', 'Zawadzki', 'Sadowski', 'Bąk', 'Chmielewski',
+    'Smith', 'Johnson', "O'Brien", 'Taylor-Brown',
+]
+
+# (city, relative weight) - a few large cities and a long tail of small ones
+CITIES = [
+    ('Warszawa', 30), ('Kraków', 15), ('Łódź', 10), ('Wrocław', 10), ('Poznań', 9),
+    ('Gdańsk', 8), ('Szczecin', 6), ('Bydgoszcz', 5), ('Lublin', 5), ('Białystok', 4),
+    ('Katowice', 4), ('Gdynia', 3), ('Częstochowa', 3), ('Radom', 2), ('Toruń', 2),
+    ('Rzeszów', 2), ('Kielce', 2), ('Olsztyn', 2), ('Zielona Góra', 1), ('Opole', 1),
+    ('Gorzów Wielkopolski', 1), ('Sopot', 1), ('Zakopane', 1), ('Berlin', 1),
+    ('London', 1), ('Praha', 1), ('Wien', 1),
+]
+
+# (status name, relative weight) - matches create_statuses
+STATUSES = [('new', 20), ('in progress', 15), ('lost', 35), ('outdated', 30)]
+
+EMAIL_DOMAINS = ['example.com', 'example.org', 'mail.example.net', 'firma.example.pl']
+
+ASCII_MAP = str.maketrans('ąćęłńóśźżĄĆĘŁŃÓŚŹŻ', 'acelnoszzACELNOSZZ')
+
+
+def email_local_part(first_name, last_name):
+    """Build an ASCII email local part from a name."""
+    name = f'{first_name}.{last_name}'.translate(ASCII_MAP).lower()
+    return ''.join(ch for ch in name if ch.isalnum() or ch in '.-')
+
+
+class Command(BaseCommand):
+    help = 'Bulk-loads realistic synthetic contacts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, required=True, help='Number of contacts to create')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT batch')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument('--days', type=int, default=3 * 365, help='Spread date_added over this many days')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+
+        statuses = {
+            name: ContactStatus.objects.get_or_create(
+                name=name, defaults={'description': f'Status: {name}'}
+            )[0]
+            for name, _ in STATUSES
+        }
+        status_names = [name for name, _ in STATUSES]
+        status_weights = [weight for _, weight in STATUSES]
+        city_names = [name for name, _ in CITIES]
+        city_weights = [weight for _, weight in CITIES]
+
+        # Sequence numbers continue after existing rows, keeping phones and emails unique
+        start = (Contact.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        now = timezone.now()
+        window = timedelta(days=options['days']).total_seconds()
+
+        created = 0
+        started = time.perf_counter()
+        while created < count:
+            size = min(batch_size, count - created)
+            batch = []
+            for offset in range(size):
+                number = start + created + offset
+                first_name = rng.choice(FIRST_NAMES)
+                last_name = rng.choice(LAST_NAMES)
+                digits = f'{500000000 + number:09d}'
+                batch.append(Contact(
+                    first_name=first_name,
+                    last_name=last_name,
+                    phone_number=f'+48 {digits[:3]} {digits[3:6]} {digits[6:]}',
+                    email=f'{email_local_part(first_name, last_name)}.{number}@{rng.choice(EMAIL_DOMAINS)}',
+                    city=rng.choices(city_names, city_weights)[0],
+                    status=statuses[rng.choices(status_names, status_weights)[0]],
+                    date_added=now - timedelta(seconds=rng.uniform(0, window)),
+                ))
+            with transaction.atomic():
+                Contact.objects.bulk_create(batch, batch_size=batch_size)
+            created += size
+            self.stdout.write(f'  {created}/{count} contacts', ending='\r')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nCreated {created} contacts in {elapsed:.1f}s ({created / elapsed:.0f} rows/s)'
+            )
+        )
@@ -0,0 +1,82 @@
+"""
+Management command to run the application under an ASGI server (uvicorn).
+
+Starts --workers processes serving contacts_project.asgi, each with one
+event loop handling up to --limit-concurrency requests at once. Async
+views (the contact list, API list/retrieve, weather lookups) run on the
+loop; sync views run in a thread per request. Defaults come from the
+ASGI_* settings. Persistent database connections are turned off unless
+DB_CONN_MAX_AGE is set: under ASGI every request runs its sync code in
+a thread of its own, whose connection would otherwise linger.
+
+Run with: python manage.py serve --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ASGI_APPLICATION = 'contacts_project.asgi:application'
+
+
+class Command(BaseCommand):
+    help = 'Runs the application under uvicorn with production settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+        parser.add_argument('--port', type=int, default=8000, help='Port to bind')
+        parser.add_argument(
+            '--workers', type=int, default=settings.ASGI_WORKERS,
+            help='Worker processes (default: ASGI_WORKERS, the CPU count)'
+        )
+        parser.add_argument(
+            '--limit-concurrency', type=int, default=settings.ASGI_LIMIT_CONCURRENCY,
+            help='Requests a worker serves at once before answering 503 (0: no limit)'
+        )
+        parser.add_argument(
+            '--backlog', type=int, default=settings.ASGI_BACKLOG,
+            help='Connections the OS queues before accept()'
+        )
+        parser.add_argument(
+            '--keepalive', type=int, default=settings.ASGI_KEEPALIVE_SECONDS,
+            help='Seconds an idle keep-alive connection stays open'
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=settings.ASGI_MAX_REQUESTS,
+            help='Restart a worker after this many requests (0: never)'
+        )
+        parser.add_argument('--log-level', default='info', help='uvicorn log level')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError('uvicorn is not installed (pip install -r requirements.txt).')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        # Read by the workers when they load the settings
+        os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+        max_requests = options['max_requests'] or None
+        self.stdout.write(
+            f"Serving {ASGI_APPLICATION} on {options['host']}:{options['port']} with "
+            f"{options['workers']} workers, up to {options['limit_concurrency'] or 'unlimited'} "
+            f"concurrent requests each"
+        )
+        uvicorn.run(
+            ASGI_APPLICATION,
+            host=options['host'],
+            port=options['port'],
+            workers=options['workers'],
+            limit_concurrency=options['limit_concurrency'] or None,
+            backlog=options['backlog'],
+            timeout_keep_alive=options['keepalive'],
+            limit_max_requests=max_requests,
+            # Spread restarts so the workers are not recycled all at once
+            limit_max_requests_jitter=max_requests // 10 if max_requests else 0,
+            timeout_graceful_shutdown=30,
+            lifespan='off',  # Django does not implement the lifespan protocol
+            proxy_headers=True,
+            log_level=options['log_level'],
+        )
@@ -0,0 +1,314 @@
+"""
+Lightweight Prometheus metrics for the contacts application.
+
+Metrics are collected in memory by every worker process and written to a
+small per-process snapshot file in ``METRICS_DIR``. The metrics endpoint
+merges all snapshots, so counters and histograms add up across workers
+without requiring an external service such as a push gateway or StatsD.
+
+Clear ``METRICS_DIR`` on deploy to reset the totals.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds, +Inf is implicit)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric names
+HTTP_REQUESTS = 'contacts_http_requests_total'
+HTTP_LATENCY = 'contacts_http_request_duration_seconds'
+UPSTREAM_LATENCY = 'contacts_upstream_request_duration_seconds'
+UPSTREAM_ERRORS = 'contacts_upstream_errors_total'
+WEATHER_CACHE = 'contacts_weather_cache_requests_total'
+IMPORT_ROWS = 'contacts_import_rows_total'
+IMPORT_SECONDS = 'contacts_import_duration_seconds_total'
+
+METRIC_HELP = {
+    HTTP_REQUESTS: ('counter', 'HTTP requests by URL name, method and status code.'),
+    HTTP_LATENCY: ('histogram', 'HTTP request latency by URL name and method.'),
+    UPSTREAM_LATENCY: ('histogram', 'Latency of calls to external weather services.'),
+    UPSTREAM_ERRORS: ('counter', 'Failed calls to external weather services.'),
+    WEATHER_CACHE: ('counter', 'Weather and geocoding cache lookups by result.'),
+    IMPORT_ROWS: ('counter', 'CSV import rows processed by result.'),
+    IMPORT_SECONDS: ('counter', 'Total time spent importing CSV files.'),
+    'contacts_upstream_error_ratio': ('gauge', 'Share of failed calls per upstream service.'),
+    'contacts_weather_cache_hit_ratio': ('gauge', 'Share of weather cache lookups served from cache.'),
+    'contacts_import_rows_per_second': ('gauge', 'Average CSV import throughput.'),
+}
+
+
+def _label_key(labels):
+    """Turn a labels dict into a hashable, ordered tuple."""
+    return tuple(sorted((labels or {}).items()))
+
+
+class MetricsRegistry:
+    """
+    Per-process metric store with file-based aggregation.
+
+    Args:
+        directory: Directory shared by all workers for snapshot files,
+            or None to keep metrics in memory only.
+        flush_interval (float): Minimum seconds between snapshot writes.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # The token keeps files apart when a pid gets reused after a restart
+        self._token = f'{self._pid}-{uuid.uuid4().hex[:8]}'
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # A forked worker must not report the parent's numbers as its own
+        if os.getpid() != self._pid:
+            self._reset()
+
+    @property
+    def snapshot_path(self):
+        if self.directory is None:
+            return None
+        return self.directory / f'metrics_{self._token}.json'
+
+    def inc(self, name, labels=None, amount=1):
+        """Increment a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_BUCKETS):
+        """Record an observation in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {'buckets': list(buckets), 'counts': [0] * (len(buckets) + 1), 'sum': 0.0}
+                self._histograms[key] = histogram
+            histogram['counts'][bisect_left(histogram['buckets'], value)] += 1
+            histogram['sum'] += value
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        """Context manager observing the duration of the wrapped block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def snapshot(self):
+        """Return this process's metrics in a JSON-serializable form."""
+        with self._lock:
+            self._check_fork()
+            return {
+                'counters': [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                'histograms': [
+                    [name, list(labels), h['buckets'], h['counts'], h['sum']]
+                    for (name, labels), h in self._histograms.items()
+                ],
+            }
+
+    def _maybe_flush(self):
+        if self.directory is None:
+            return
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot file atomically."""
+        path = self.snapshot_path
+        if path is None:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot {path}: {str(e)}")
+
+    def collect(self):
+        """
+        Merge snapshots from every worker with this process's live state.
+
+        Returns:
+            dict: {'counters': {key: value}, 'histograms': {key: {...}}}
+        """
+        snapshots = [self.snapshot()]
+        own_path = self.snapshot_path
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob('metrics_*.json'):
+                if path == own_path:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue  # Partially written or removed meanwhile
+
+        counters = {}
+        histograms = {}
+        for snap in snapshots:
+            for name, labels, value in snap.get('counters', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, counts, total in snap.get('histograms', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.get(key)
+                if merged is None or merged['buckets'] != buckets:
+                    if merged is not None:
+                        continue  # Bucket layout changed between deploys
+                    merged = {'buckets': buckets, 'counts': [0] * len(counts), 'sum': 0.0}
+                    histograms[key] = merged
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], counts)]
+                merged['sum'] += total
+        return {'counters': counters, 'histograms': histograms}
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + list(extra or [])
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _derived_gauges(counters, histograms):
+    """Compute ratio and throughput gauges from the merged totals."""
+    gauges = {}
+
+    upstream_totals = {}
+    for (name, labels), h in histograms.items():
+        if name == UPSTREAM_LATENCY:
+            upstream_totals[labels] = sum(h['counts'])
+    for labels, total in upstream_totals.items():
+        errors = counters.get((UPSTREAM_ERRORS, labels), 0)
+        gauges[('contacts_upstream_error_ratio', labels)] = errors / total if total else 0.0
+
+    cache_kinds = {}
+    for (name, labels), value in counters.items():
+        if name != WEATHER_CACHE:
+            continue
+        label_dict = dict(labels)
+        kind = label_dict.get('kind', '')
+        hits, total = cache_kinds.get(kind, (0, 0))
+        if label_dict.get('result') == 'hit':
+            hits += value
+        cache_kinds[kind] = (hits, total + value)
+    for kind, (hits, total) in cache_kinds.items():
+        gauges[('contacts_weather_cache_hit_ratio', (('kind', kind),))] = hits / total if total else 0.0
+
+    rows = sum(v for (name, _), v in counters.items() if name == IMPORT_ROWS)
+    seconds = counters.get((IMPORT_SECONDS, ()), 0)
+    if seconds:
+        gauges[('contacts_import_rows_per_second', ())] = rows / seconds
+
+    return gauges
+
+
+def render_prometheus(state):
+    """Render merged metrics in the Prometheus text exposition format."""
+    counters = state['counters']
+    histograms = state['histograms']
+    series = {}
+    for (name, labels), value in counters.items():
+        series.setdefault(name, []).append((labels, value))
+    for (name, labels), h in histograms.items():
+        series.setdefault(name, []).append((labels, h))
+    for (name, labels), value in _derived_gauges(counters, histograms).items():
+        series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(series):
+        metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(series[name], key=lambda item: item[0]):
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            bounds = list(value['buckets']) + [float('inf')]
+            for bound, count in zip(bounds, value['counts']):
+                cumulative += count
+                le = _format_value(bound) if bound != float('inf') else '+Inf'
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value["sum"])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    directory=getattr(settings, 'METRICS_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0),
+)
+atexit.register(registry.flush)
+
+
+# Convenience helpers used by views and middleware
+
+def observe_request(view_name, method, status_code, duration):
+    """Record one HTTP request."""
+    registry.inc(HTTP_REQUESTS, {'view': view_name, 'method': method, 'status': str(status_code)})
+    registry.observe(HTTP_LATENCY, duration, {'view': view_name, 'method': method})
+
+
+@contextmanager
+def track_upstream(upstream):
+    """Time a call to an external service and count it as failed if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registry.inc(UPSTREAM_ERRORS, {'upstream': upstream})
+        raise
+    finally:
+        registry.observe(UPSTREAM_LATENCY, time.perf_counter() - start, {'upstream': upstream})
+
+
+def record_cache_lookup(kind, hit):
+    """Record a weather/geocoding cache hit or miss."""
+    registry.inc(WEATHER_CACHE, {'kind': kind, 'result': 'hit' if hit else 'miss'})
+
+
+def record_import(imported, failed, duration):
+    """Record the outcome of one CSV import."""
+    registry.inc(IMPORT_ROWS, {'result': 'imported'}, imported)
+    registry.inc(IMPORT_ROWS, {'result': 'failed'}, failed)
+    registry.inc(IMPORT_SECONDS, None, duration)
@@ -0,0 +1,25 @@
+"""
+Metrics endpoint for the contacts application.
+
+Exposes aggregated metrics from all worker processes in the
+Prometheus text exposition format.
+"""
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from . import metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Return request latency, weather upstream and import metrics.
+
+    Returns:
+        HttpResponse: Metrics in Prometheus text format
+    """
+    state = metrics.registry.collect()
+    return HttpResponse(metrics.render_prometheus(state), content_type=PROMETHEUS_CONTENT_TYPE)
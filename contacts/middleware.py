@@ -0,0 +1,201 @@
+"""
+Middleware for the contacts application.
+
+Includes:
+- MetricsMiddleware: request latency histograms per URL name
+- ProfilerMiddleware: on-demand request profiling for staff users
+- ReplicaPinningMiddleware: read-your-writes for the read-replica router
+- StaticFilesMiddleware: hashed, precompressed static files from STATIC_ROOT
+- CompressionMiddleware: gzip for JSON and HTML responses above a size
+
+The first four work in sync and async mode (HybridMiddleware), so under
+ASGI requests to async views reach them without a thread switch.
+"""
+
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.urls import reverse
+
+from . import db_routers
+from . import metrics
+from . import profiling
+from . import static_assets
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs in the handler's mode (sync or async).
+
+    Subclasses implement __call__ for sync mode and __acall__ for async
+    mode; Django picks the mode from the rest of the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Record latency and status of every request, labelled by URL name.
+
+    Should be placed first in MIDDLEWARE so the measured time covers
+    the whole middleware stack.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, duration):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.url_name if match and match.url_name else 'unmatched'
+        metrics.observe_request(view_name, request.method, response.status_code, duration)
+
+
+class ProfilerMiddleware(HybridMiddleware):
+    """
+    Profile the request when a staff user asks for it.
+
+    Must come after AuthenticationMiddleware. The stored profile is
+    linked from the X-Profile-Id and X-Profile-Url response headers.
+    In async mode the profiled request runs from a sync thread, which
+    the view's ORM calls return to, so queries are still captured.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not profiling.is_profiling_requested(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not await profiling.ais_profiling_requested(request):
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(request, async_to_sync(self.get_response))
+
+    def profile(self, request, get_response):
+        response, profile = profiling.profile_request(request, get_response)
+        response['X-Profile-Id'] = str(profile.pk)
+        response['X-Profile-Url'] = reverse('admin:contacts_requestprofile_change', args=[profile.pk])
+        return response
+
+
+class ReplicaPinningMiddleware(HybridMiddleware):
+    """
+    Keep a client on the primary database shortly after it writes.
+
+    Write requests (non-safe methods) read from the primary for their whole
+    duration. When a request writes, a cookie pins the client's following
+    requests to the primary for REPLICA_PIN_SECONDS, which covers the usual
+    replication lag and the redirect after a form submit.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE', 'pin_primary')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        pin_token, write_token = self.start(request)
+        try:
+            response = self.get_response(request)
+            self.finish(response)
+        finally:
+            self.reset(pin_token, write_token)
+        return response
+
+    async def __acall__(self, request):
+        # ORM calls in sync_to_async threads see (and hand back) these
+        # context variables, so routing works the same as in sync mode
+        pin_token, write_token = self.start(request)
+        try:
+            response = await self.get_response(request)
+            self.finish(response)
+        finally:
+            self.reset(pin_token, write_token)
+        return response
+
+    def start(self, request):
+        pinned = request.method not in self.SAFE_METHODS or self.cookie_name in request.COOKIES
+        return db_routers._pinned.set(pinned), db_routers.reset_write_tracking()
+
+    def finish(self, response):
+        if db_routers.has_written():
+            response.set_cookie(self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+
+    def reset(self, pin_token, write_token):
+        db_routers._wrote.reset(write_token)
+        db_routers.unpin(pin_token)
+
+
+class StaticFilesMiddleware(HybridMiddleware):
+    """
+    Serve collected static files, precompressed, without a separate web server.
+
+    Hashed names get far-future immutable caching (see
+    contacts.static_assets). Requests for files that were not collected
+    fall through to the rest of the stack (runserver serves the source
+    files itself in DEBUG). Should come right after SecurityMiddleware.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.serve(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request):
+        prefix = settings.STATIC_URL
+        if request.method in ('GET', 'HEAD') and prefix and request.path.startswith(prefix):
+            return static_assets.serve(request, request.path[len(prefix):])
+        return None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Gzip API JSON and HTML pages of at least CONTACTS_COMPRESS_MIN_BYTES.
+
+    Other responses (CSV exports, downloads, static files) are left alone,
+    and so are small ones, where compression saves less than it costs.
+    GZipMiddleware's BREACH mitigation applies to the HTML pages, which
+    carry CSRF tokens. Should come before any middleware that reads or
+    changes the response body.
+    """
+
+    content_types = ('application/json', 'text/html')
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in self.content_types:
+            return response
+        if not response.streaming and len(response.content) < settings.CONTACTS_COMPRESS_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,43 @@
+# Trigram indexes for the contact list search on PostgreSQL.
+#
+# ContactListView searches with icontains, which Django compiles to
+# UPPER("column"::text) LIKE UPPER('%term%') on PostgreSQL. GIN indexes over
+# the same expression with gin_trgm_ops let the planner use the index for
+# these substring searches. Other database backends skip this migration.
+
+from django.db import migrations
+
+SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'phone_number', 'city']
+
+
+def index_name(field):
+    return f'contacts_co_{field[:10]}_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name(field)} '
+            f'ON contacts_contact USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(field)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_requestprofile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,51 @@
+# Adds the normalized phone/email keys and fills them for existing rows.
+#
+# Rows are processed in id order; when two contacts normalize to the same
+# key, the later one keeps NULL so the unique constraints in 0006 can be
+# created. Such rows are reported by the find_duplicates command.
+
+from django.db import migrations, models
+
+from contacts.normalization import normalize_email, normalize_phone
+
+BATCH_SIZE = 1000
+
+
+def populate_keys(apps, schema_editor):
+    Contact = apps.get_model('contacts', 'Contact')
+    seen_phones, seen_emails = set(), set()
+    batch = []
+    for contact in Contact.objects.order_by('id').only('id', 'phone_number', 'email').iterator(chunk_size=BATCH_SIZE):
+        phone = normalize_phone(contact.phone_number) or None
+        email = normalize_email(contact.email) or None
+        contact.phone_e164 = phone if phone not in seen_phones else None
+        contact.email_normalized = email if email not in seen_emails else None
+        seen_phones.add(phone)
+        seen_emails.add(email)
+        batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            Contact.objects.bulk_update(batch, ['phone_e164', 'email_normalized'])
+            batch = []
+    if batch:
+        Contact.objects.bulk_update(batch, ['phone_e164', 'email_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0004_postgres_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(populate_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0005_contact_normalized_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contact',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=20, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='email',
+            field=models.EmailField(help_text='Email address must be unique', max_length=254, validators=[django.core.validators.EmailValidator()]),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='phone_number',
+            field=models.CharField(help_text='Phone number must be unique', max_length=20, validators=[django.core.validators.RegexValidator(message='Enter a valid phone number (min. 8 characters, digits, spaces, +, -, (, ) allowed)', regex='^[\\+\\d][\\d\\s\\-\\(\\)]{7,}$')]),
+        ),
+    ]
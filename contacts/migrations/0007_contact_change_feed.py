@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0006_contact_normalized_keys_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contact_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['updated_at', 'id'], name='contacts_co_updated_77e922_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacttombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='contacts_co_deleted_51d617_idx'),
+        ),
+    ]
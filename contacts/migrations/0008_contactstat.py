@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:56
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def count_existing_contacts(apps, schema_editor):
+    Contact = apps.get_model('contacts', 'Contact')
+    ContactStat = apps.get_model('contacts', 'ContactStat')
+    contacts = Contact.objects.order_by()
+    stats = [
+        ContactStat(dimension='status', key=str(status_id), count=n)
+        for status_id, n in contacts.values_list('status_id').annotate(n=Count('pk'))
+    ] + [
+        ContactStat(dimension='city', key=city, count=n)
+        for city, n in contacts.values_list('city').annotate(n=Count('pk'))
+    ] + [
+        ContactStat(dimension='day', key=day.isoformat(), count=n)
+        for day, n in contacts.annotate(day=TruncDate('date_added')).values_list('day').annotate(n=Count('pk'))
+    ]
+    ContactStat.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0007_contact_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Status'), ('city', 'City'), ('day', 'Day added')], max_length=10)),
+                ('key', models.CharField(max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='contactstat_dimension_key_unique')],
+            },
+        ),
+        migrations.RunPython(count_existing_contacts, migrations.RunPython.noop),
+    ]
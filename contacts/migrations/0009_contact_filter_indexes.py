@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_contactstat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['status', 'date_added', 'id'], name='contacts_co_status__74d125_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['city', 'date_added', 'id'], name='contacts_co_city_8a12d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['status', 'city', 'date_added', 'id'], name='contacts_co_status__fbf61a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['city', 'last_name', 'id'], name='contacts_co_city_addc7d_idx'),
+        ),
+    ]
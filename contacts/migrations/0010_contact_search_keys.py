@@ -0,0 +1,53 @@
+# Generated by Django 6.0.1 on 2026-10-19 02:41
+#
+# Adds the folded first/last name keys used by the typeahead endpoint and
+# fills them for existing rows before the prefix indexes are built.
+
+from django.db import migrations, models
+
+from contacts.normalization import search_key
+
+BATCH_SIZE = 1000
+
+
+def populate_search_keys(apps, schema_editor):
+    Contact = apps.get_model('contacts', 'Contact')
+    batch = []
+    for contact in Contact.objects.order_by('id').only('id', 'first_name', 'last_name').iterator(chunk_size=BATCH_SIZE):
+        contact.first_name_key = search_key(contact.first_name)
+        contact.last_name_key = search_key(contact.last_name)
+        batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            Contact.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+            batch = []
+    if batch:
+        Contact.objects.bulk_update(batch, ['first_name_key', 'last_name_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0009_contact_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='first_name_key',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='last_name_key',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['last_name_key'], name='contact_last_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['first_name_key'], name='contact_first_name_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:12
+#
+# Adds the Polish-alphabet sort keys for first and last names, fills them
+# for existing rows and moves the name-ordering indexes onto them.
+
+from django.db import migrations, models
+
+from contacts.normalization import sort_key
+
+BATCH_SIZE = 1000
+
+
+def populate_sort_keys(apps, schema_editor):
+    Contact = apps.get_model('contacts', 'Contact')
+    batch = []
+    for contact in Contact.objects.order_by('id').only('id', 'first_name', 'last_name').iterator(chunk_size=BATCH_SIZE):
+        contact.first_name_sort = sort_key(contact.first_name)
+        contact.last_name_sort = sort_key(contact.last_name)
+        batch.append(contact)
+        if len(batch) >= BATCH_SIZE:
+            Contact.objects.bulk_update(batch, ['first_name_sort', 'last_name_sort'])
+            batch = []
+    if batch:
+        Contact.objects.bulk_update(batch, ['first_name_sort', 'last_name_sort'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0010_contact_search_keys'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contact',
+            name='contacts_co_city_addc7d_idx',
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='first_name_sort',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='last_name_sort',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(populate_sort_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['city', 'last_name_sort', 'id'], name='contacts_co_city_7862ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['last_name_sort', 'id'], name='contacts_co_last_na_a3c3ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['first_name_sort', 'id'], name='contacts_co_first_n_defe92_idx'),
+        ),
+    ]
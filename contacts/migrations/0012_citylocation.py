@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0011_contact_name_sort_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('geocoded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['latitude', 'longitude'], name='contacts_ci_latitud_9e20af_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0012_citylocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContact',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(max_length=20)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone_e164', models.CharField(max_length=20, null=True)),
+                ('email_normalized', models.CharField(max_length=254, null=True)),
+                ('city', models.CharField(max_length=100)),
+                ('date_added', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('first_name_sort', models.CharField(default='', max_length=200)),
+                ('last_name_sort', models.CharField(default='', max_length=200)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_contacts', to='contacts.contactstatus')),
+            ],
+            options={
+                'ordering': ['-date_added'],
+                'indexes': [models.Index(fields=['status', 'date_added', 'id'], name='contacts_ar_status__aa9c9b_idx'), models.Index(fields=['date_added', 'id'], name='contacts_ar_date_ad_e6da55_idx')],
+            },
+        ),
+    ]
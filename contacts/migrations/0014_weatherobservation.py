@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0013_archivedcontact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('resolution', models.PositiveIntegerField(default=900)),
+                ('temperature', models.FloatField(null=True)),
+                ('humidity', models.PositiveSmallIntegerField(null=True)),
+                ('wind_speed', models.FloatField(null=True)),
+                ('weather_code', models.PositiveSmallIntegerField(null=True)),
+                ('samples', models.PositiveIntegerField(default=1)),
+                ('location', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='observations', to='contacts.citylocation')),
+            ],
+            options={
+                'ordering': ['location', 'bucket'],
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='weather_resolution_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('location', 'bucket'), name='weather_location_bucket_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0014_weatherobservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['status', 'last_name_sort', 'id'], name='contacts_co_status__ba375a_idx'),
+        ),
+    ]
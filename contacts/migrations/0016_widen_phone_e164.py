@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0015_contact_status_name_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcontact',
+            name='phone_e164',
+            field=models.CharField(max_length=24, null=True),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=24, null=True, unique=True),
+        ),
+    ]
@@ -4,13 +4,24 @@ Models for the contacts application.
 This module defines:
 - ContactStatus: Available status choices for contacts
 - Contact: Main contact model with personal information and status
+- ContactTombstone: Deleted contact ids for the incremental change feed
+- ContactStat: Contact counts per status, city and day, kept in sync on write
+- ArchivedContact: Contacts moved out of the main table (cold storage)
+- CityLocation: Coordinates of the cities contacts live in
+- RequestProfile: On-demand request profiles captured for staff users
 """
 
-from django.db import models
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, router, transaction
 from django.core.validators import EmailValidator, RegexValidator
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from . import caching
+from .normalization import normalize_email, normalize_phone, search_key, sort_key
+
 
 class ContactStatus(models.Model):
     """
@@ -31,6 +42,161 @@ class ContactStatus(models.Model):
         return self.name
 
 
+class ContactQuerySet(models.QuerySet):
+    """
+    QuerySet that keeps derived data in sync on bulk writes.
+    
+    Fills the normalized keys, adjusts the ContactStat counters and writes
+    change-feed tombstones in the same transaction as bulk_create,
+    bulk_update, update and delete, and invalidates cached typeahead
+    suggestions once it commits. update() also stamps updated_at.
+    """
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import stats
+        
+        objs = list(objs)
+        for obj in objs:
+            obj.populate_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = Contact.with_derived_fields(update_fields)
+        
+        with transaction.atomic(using=self.db):
+            deltas = Counter()
+            stored = {}
+            unique_fields = kwargs.get('unique_fields') or []
+            if kwargs.get('update_conflicts') and len(unique_fields) == 1:
+                # Rows about to be overwritten stop counting under their old values
+                unique_field = unique_fields[0]
+                values = [getattr(obj, unique_field) for obj in objs]
+                stored = {
+                    row[0]: stats.stat_keys(*row[1:])
+                    for row in self.model.objects.using(self.db).filter(**{f'{unique_field}__in': values})
+                    .order_by().values_list(unique_field, 'status_id', 'city', 'date_added')
+                }
+                for keys in stored.values():
+                    deltas.subtract(keys.items())
+            created = super().bulk_create(objs, *args, **kwargs)
+            # and count under their new values, which keep the stored ones of
+            # fields the upsert does not overwrite
+            updated = set(kwargs.get('update_fields') or [])
+            for obj in objs:
+                keys = obj.stat_keys()
+                old = stored.get(getattr(obj, unique_fields[0])) if stored else None
+                if old is not None:
+                    keys = {
+                        dimension: keys[dimension] if {source, f'{source}_id'} & updated else old[dimension]
+                        for dimension, source in stats.SOURCE_FIELDS.items()
+                    }
+                deltas.update(keys.items())
+                obj._loaded_stat_keys = keys
+            stats.apply_deltas(deltas, using=self.db)
+            caching.bump_version_on_commit(caching.SUGGEST, using=self.db)
+        return created
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from . import stats
+        
+        objs = list(objs)
+        for obj in objs:
+            obj.populate_derived_fields()
+        dimensions = Contact.stat_dimensions(fields)
+        
+        with transaction.atomic(using=self.db):
+            deltas = Counter()
+            if dimensions:
+                # One query reads the stored values the counters are based on
+                stored = {
+                    pk: stats.stat_keys(status_id, city, date_added)
+                    for pk, status_id, city, date_added in self.model.objects.using(self.db).filter(
+                        pk__in=[obj.pk for obj in objs]
+                    ).values_list('pk', 'status_id', 'city', 'date_added')
+                }
+                for obj in objs:
+                    if obj.pk in stored:
+                        old = stored[obj.pk]
+                        new = {**old, **{d: obj.stat_keys()[d] for d in dimensions}}
+                        deltas.update(stats.diff(old, new))
+            with stats.suspended():
+                rows = super().bulk_update(objs, Contact.with_derived_fields(fields), *args, **kwargs)
+            stats.apply_deltas(deltas, using=self.db)
+            caching.bump_version_on_commit(caching.SUGGEST, using=self.db)
+        return rows
+    
+    def update(self, **kwargs):
+        from . import stats
+        
+        if stats.is_suspended():
+            # Called from bulk_update, which already handled derived data
+            return super().update(**kwargs)
+        
+        # Keep the derived keys in step with constant raw values
+        raw_values = {
+            raw: kwargs[raw] for raw in Contact.DERIVED_FIELDS
+            if raw in kwargs and not hasattr(kwargs[raw], 'resolve_expression')
+        }
+        if raw_values:
+            probe = Contact(**raw_values)
+            probe.populate_derived_fields()
+            for derived in Contact.with_derived_fields(raw_values):
+                kwargs.setdefault(derived, getattr(probe, derived))
+        # Like save() does through auto_now; the change feed and the cached
+        # contact cards are keyed by updated_at
+        kwargs.setdefault('updated_at', timezone.now())
+        caching.bump_version_on_commit(caching.SUGGEST, using=self.db)
+        
+        dimensions = Contact.stat_dimensions(kwargs)
+        if not dimensions:
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            values = {}
+            for dimension in dimensions:
+                source = stats.SOURCE_FIELDS[dimension]
+                values[dimension] = kwargs[source] if source in kwargs else kwargs[f'{source}_id']
+            if any(hasattr(value, 'resolve_expression') for value in values.values()):
+                # Values computed by the database: recount from scratch
+                rows = super().update(**kwargs)
+                stats.rebuild(using=self.db)
+                return rows
+            old = stats.grouped_counts(self, dimensions)
+            rows = super().update(**kwargs)
+            deltas = Counter()
+            deltas.subtract(old)
+            for dimension, value in values.items():
+                deltas[(dimension, stats.value_key(dimension, value))] += rows
+            stats.apply_deltas(deltas, using=self.db)
+        return rows
+    
+    def delete(self):
+        """
+        Delete the contacts with set-based bookkeeping.
+        
+        Counters are adjusted from one GROUP BY per dimension, the
+        change-feed tombstones are inserted in bulk and the rows go with
+        one DELETE. Contacts are never loaded as instances and no
+        post_delete signals are sent (the receivers only repeat this
+        bookkeeping; nothing has a foreign key to Contact).
+        """
+        from . import stats
+        
+        with transaction.atomic(using=self.db):
+            ids = list(self.order_by().values_list('pk', flat=True))
+            deltas = Counter()
+            deltas.subtract(stats.grouped_counts(self.model.objects.using(self.db).filter(pk__in=ids)))
+            ContactTombstone.objects.using(self.db).bulk_create(
+                [ContactTombstone(contact_id=pk) for pk in ids], batch_size=1000
+            )
+            rows = self.model.objects.using(self.db).filter(pk__in=ids)._raw_delete(self.db)
+            stats.apply_deltas(deltas, using=self.db)
+            caching.bump_version_on_commit(caching.SUGGEST, using=self.db)
+        return rows, {self.model._meta.label: rows}
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Contact(models.Model):
     """
     Model representing a contact with personal information and status.
@@ -61,21 +227,35 @@ class Contact(models.Model):
         validators=[name_validator]
     )
     
-    # Unique phone number with validation
+    # Phone number as typed; uniqueness is enforced on phone_e164
     phone_number = models.CharField(
         max_length=20,
-        unique=True,
         validators=[phone_validator],
         help_text="Phone number must be unique"
     )
     
-    # Unique email with built-in validation
+    # Email as entered; uniqueness is enforced on email_normalized
     email = models.EmailField(
-        unique=True,
         validators=[EmailValidator()],
         help_text="Email address must be unique"
     )
     
+    # Canonical keys maintained by populate_derived_fields(), so that
+    # "+48 123-456-789" and "+48123456789" are the same number.
+    # NULL only for legacy rows that collided when the keys were introduced.
+    # 24 leaves room for "+", a country code and a 20-digit local number.
+    phone_e164 = models.CharField(max_length=24, unique=True, null=True, editable=False)
+    email_normalized = models.CharField(max_length=254, unique=True, null=True, editable=False)
+    
+    # Accent- and case-folded names for prefix lookups (typeahead)
+    first_name_key = models.CharField(max_length=100, default='', editable=False)
+    last_name_key = models.CharField(max_length=100, default='', editable=False)
+    
+    # Names spelled so that plain string order is Polish alphabetical
+    # order (see normalization.sort_key); name-ordered listings use these
+    first_name_sort = models.CharField(max_length=200, default='', editable=False)
+    last_name_sort = models.CharField(max_length=200, default='', editable=False)
+    
     city = models.CharField(max_length=100)
     
     # ForeignKey to ContactStatus model as per requirements
@@ -91,6 +271,22 @@ class Contact(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ContactQuerySet.as_manager()
+    
+    # Raw field -> keys derived from it
+    DERIVED_FIELDS = {
+        'phone_number': ('phone_e164',),
+        'email': ('email_normalized',),
+        'first_name': ('first_name_key', 'first_name_sort'),
+        'last_name': ('last_name_key', 'last_name_sort'),
+    }
+    
+    # Raw field -> normalized key that enforces its uniqueness
+    UNIQUE_KEYS = {'phone_number': 'phone_e164', 'email': 'email_normalized'}
+    
+    # Sortable field -> column holding its collation-correct sort key
+    SORT_KEYS = {'first_name': 'first_name_sort', 'last_name': 'last_name_sort'}
+    
     class Meta:
         ordering = ['-date_added']  # Most recent first by default
         indexes = [
@@ -98,11 +294,331 @@ class Contact(models.Model):
             models.Index(fields=['date_added']),
             models.Index(fields=['email']),
             models.Index(fields=['phone_number']),
+            # Change feed: contacts modified after a cursor, in order
+            models.Index(fields=['updated_at', 'id']),
+            # API filters (contacts.filters): equality columns first, then the
+            # ordering/range column and id as tie-breaker. Scanned backwards
+            # for the default newest-first order.
+            models.Index(fields=['status', 'date_added', 'id']),
+            models.Index(fields=['city', 'date_added', 'id']),
+            models.Index(fields=['status', 'city', 'date_added', 'id']),
+            models.Index(fields=['city', 'last_name_sort', 'id']),
+            models.Index(fields=['status', 'last_name_sort', 'id']),
+            # Name-ordered listings walk the sort-key indexes
+            models.Index(fields=['last_name_sort', 'id']),
+            models.Index(fields=['first_name_sort', 'id']),
+            # Typeahead prefix lookups (contacts.suggest); the operator class
+            # lets LIKE 'prefix%' use the index on PostgreSQL, SQLite
+            # ignores it and uses the range condition instead
+            models.Index(fields=['last_name_key'], name='contact_last_name_key_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['first_name_key'], name='contact_first_name_key_idx', opclasses=['varchar_pattern_ops']),
         ]
     
+    # Rows of this model live in the main (hot) table
+    is_archived = False
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
     
     def get_full_name(self):
         """Returns the full name of the contact."""
         return f"{self.first_name} {self.last_name}"
+    
+    @classmethod
+    def with_derived_fields(cls, fields):
+        """Extend a list of field names with the keys derived from them."""
+        fields = list(fields)
+        for raw, derived_fields in cls.DERIVED_FIELDS.items():
+            if raw in fields:
+                fields.extend(derived for derived in derived_fields if derived not in fields)
+        return fields
+    
+    def populate_derived_fields(self):
+        """Recompute the normalized phone and email keys and the name search and sort keys."""
+        self.phone_e164 = normalize_phone(self.phone_number) or None
+        self.email_normalized = normalize_email(self.email) or None
+        self.first_name_key = search_key(self.first_name)
+        self.last_name_key = search_key(self.last_name)
+        self.first_name_sort = sort_key(self.first_name)
+        self.last_name_sort = sort_key(self.last_name)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Counter keys as stored, so save() can move the counts on change
+        if all(f in instance.__dict__ for f in ('status_id', 'city', 'date_added')):
+            instance._loaded_stat_keys = instance.stat_keys()
+        return instance
+    
+    @staticmethod
+    def stat_dimensions(fields):
+        """Stat dimensions whose source fields are among the given field names."""
+        from . import stats
+        
+        return [
+            dimension for dimension, source in stats.SOURCE_FIELDS.items()
+            if source in fields or f'{source}_id' in fields
+        ]
+    
+    def stat_keys(self):
+        """ContactStat counter keys this contact contributes to."""
+        from . import stats
+        
+        return stats.stat_keys(self.status_id, self.city, self.date_added)
+    
+    def save(self, *args, **kwargs):
+        from . import stats
+        
+        self.populate_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = self.with_derived_fields(update_fields)
+        
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            old_keys = None
+            if not self._state.adding:
+                old_keys = getattr(self, '_loaded_stat_keys', None)
+                if old_keys is None:
+                    stored = type(self).objects.using(using).filter(pk=self.pk).values_list(
+                        'status_id', 'city', 'date_added'
+                    ).first()
+                    old_keys = stats.stat_keys(*stored) if stored else None
+            super().save(*args, **kwargs)
+            new_keys = self.stat_keys()
+            if old_keys and update_fields is not None:
+                # Fields outside update_fields were not written
+                unchanged = set(stats.DIMENSIONS) - set(self.stat_dimensions(update_fields))
+                new_keys.update({d: old_keys[d] for d in unchanged})
+            stats.apply_deltas(stats.diff(old_keys, new_keys), using=using)
+        self._loaded_stat_keys = new_keys
+    
+    def validate_unique(self, exclude=None):
+        """
+        Check phone and email uniqueness on the normalized keys.
+        
+        Both keys are checked with a single query.
+        """
+        super().validate_unique(exclude=exclude)
+        exclude = exclude or set()
+        checks = {
+            raw: value for raw, value in (
+                ('phone_number', normalize_phone(self.phone_number)),
+                ('email', normalize_email(self.email)),
+            )
+            if raw not in exclude and value
+        }
+        if not checks:
+            return
+        lookup = models.Q()
+        for raw, value in checks.items():
+            lookup |= models.Q(**{self.UNIQUE_KEYS[raw]: value})
+        taken = Contact.objects.filter(lookup).exclude(pk=self.pk).values_list(
+            'phone_e164', 'email_normalized'
+        )
+        errors = {}
+        for phone_e164, email_normalized in taken:
+            for raw, existing in (('phone_number', phone_e164), ('email', email_normalized)):
+                if raw in checks and existing == checks[raw]:
+                    errors[raw] = [ValidationError(
+                        '%(model_name)s with this %(field_label)s already exists.',
+                        code='unique',
+                        params={
+                            'model_name': self._meta.verbose_name.capitalize(),
+                            'field_label': self._meta.get_field(raw).verbose_name,
+                        },
+                    )]
+        if errors:
+            raise ValidationError(errors)
+
+
+class ContactStat(models.Model):
+    """
+    Number of contacts per status, city or day (date_added).
+    
+    Maintained incrementally by every Contact write path (see
+    contacts.stats), so dashboards read counts without scanning contacts.
+    """
+    DIMENSION_CHOICES = [
+        ('status', 'Status'),
+        ('city', 'City'),
+        ('day', 'Day added'),
+    ]
+    
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=100)  # Status id, city name or ISO date
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='contactstat_dimension_key_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.count}"
+
+
+class ArchivedContact(models.Model):
+    """
+    Contact moved out of the main table by the archive_contacts command.
+    
+    Keeps the contact's id, data and derived keys so restore_contacts can
+    put it back unchanged. Archived contacts are not counted in
+    ContactStat and are listed only with ?include_archived=1.
+    """
+    # Field values copied verbatim from/to Contact by contacts.archive
+    COPIED_FIELDS = [
+        'first_name', 'last_name', 'phone_number', 'email', 'phone_e164', 'email_normalized',
+        'city', 'status_id', 'date_added', 'created_at', 'updated_at',
+        'first_name_sort', 'last_name_sort',
+    ]
+    
+    id = models.BigIntegerField(primary_key=True)  # Contact id, reused on restore
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    phone_number = models.CharField(max_length=20)
+    email = models.EmailField()
+    phone_e164 = models.CharField(max_length=24, null=True)
+    email_normalized = models.CharField(max_length=254, null=True)
+    city = models.CharField(max_length=100)
+    status = models.ForeignKey(
+        ContactStatus,
+        on_delete=models.PROTECT,
+        related_name='archived_contacts'
+    )
+    date_added = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    first_name_sort = models.CharField(max_length=200, default='')
+    last_name_sort = models.CharField(max_length=200, default='')
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    is_archived = True
+    
+    class Meta:
+        ordering = ['-date_added']
+        indexes = [
+            # Restore by status and age, and listings with ?include_archived=1
+            models.Index(fields=['status', 'date_added', 'id']),
+            models.Index(fields=['date_added', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} (archived)"
+    
+    def get_full_name(self):
+        """Returns the full name of the contact."""
+        return f"{self.first_name} {self.last_name}"
+
+
+class CityLocation(models.Model):
+    """
+    Coordinates of a city, keyed by the name as stored in Contact.city.
+    
+    Filled by geocoding (weather lookups and the geocode_cities command)
+    and used by proximity queries (see contacts.geo).
+    """
+    name = models.CharField(max_length=100, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geocoded_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Bounding-box prefilter of proximity queries
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.latitude:.4f}, {self.longitude:.4f})"
+
+
+class WeatherObservation(models.Model):
+    """
+    Weather of a geocoded city during one time bucket.
+    
+    Fresh observations cover 15 minutes; the prune_weather command folds
+    older ones into hourly and then daily averages (see
+    contacts.weather_store), recording the bucket length in resolution.
+    """
+    # The unique (location, bucket) index covers lookups by location
+    location = models.ForeignKey(
+        CityLocation, on_delete=models.CASCADE, related_name='observations', db_index=False
+    )
+    bucket = models.DateTimeField()  # Start of the bucket
+    resolution = models.PositiveIntegerField(default=900)  # Bucket length in seconds
+    temperature = models.FloatField(null=True)  # °C
+    humidity = models.PositiveSmallIntegerField(null=True)  # %
+    wind_speed = models.FloatField(null=True)  # km/h
+    weather_code = models.PositiveSmallIntegerField(null=True)  # WMO code
+    samples = models.PositiveIntegerField(default=1)  # Observations averaged into this row
+    
+    class Meta:
+        ordering = ['location', 'bucket']
+        constraints = [
+            # Also the index of history reads and of the current-bucket lookup
+            models.UniqueConstraint(fields=['location', 'bucket'], name='weather_location_bucket_uniq'),
+        ]
+        indexes = [
+            # Retention scans: oldest buckets of one resolution
+            models.Index(fields=['resolution', 'bucket'], name='weather_resolution_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.location.name} at {self.bucket:%Y-%m-%d %H:%M} ({self.resolution // 60} min)"
+
+
+class ContactTombstone(models.Model):
+    """
+    Marker left behind when a contact is deleted.
+    
+    Lets sync clients of the change feed learn about deletions; written
+    by a post_delete receiver in the same transaction as the delete.
+    """
+    contact_id = models.BigIntegerField()  # Not a ForeignKey: the row is gone
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"Contact #{self.contact_id} deleted at {self.deleted_at:%Y-%m-%d %H:%M:%S}"
+
+
+class RequestProfile(models.Model):
+    """
+    Profile of a single request captured on demand by a staff user.
+    
+    Stores the cProfile output (top functions and call tree), the SQL
+    timeline and the raw stats, which can be downloaded and opened with
+    pstats or snakeviz.
+    """
+    path = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    view_name = models.CharField(max_length=100, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='request_profiles'
+    )
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    query_time_ms = models.FloatField(default=0)
+    top_functions = models.TextField(blank=True)
+    call_tree = models.TextField(blank=True)
+    sql_timeline = models.JSONField(default=list, blank=True)
+    stats = models.BinaryField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
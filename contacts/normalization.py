@@ -0,0 +1,125 @@
+"""
+Canonical keys for contact phone numbers and email addresses.
+
+Includes:
+- normalize_phone: E.164-style form of a phone number ("+48123456789")
+- normalize_email: case-folded, trimmed email address
+- national_number / mailbox_key / name_key: looser keys used to block
+  candidate duplicates in find_duplicates
+- search_key: accent- and case-insensitive form of a name or city, used
+  for prefix (typeahead) lookups
+- sort_key: form of a name whose plain string order is Polish
+  alphabetical order, used for name-ordered listings
+"""
+
+import re
+import unicodedata
+
+from django.conf import settings
+
+NON_DIGITS = re.compile(r'\D')
+
+# Longest national significant number compared across formats
+NATIONAL_NUMBER_DIGITS = 9
+
+# Polish alphabetical order (q, v and x where they are in the Latin one).
+# sort_key() spells each letter as its two-digit position, separators as
+# "00": digit strings order the same under every database collation, so
+# an index on the key returns names in dictionary order.
+SORT_ALPHABET = 'aąbcćdeęfghijklłmnńoópqrsśtuvwxyzźż'
+SORT_CODES = {letter: f'{position:02d}' for position, letter in enumerate(SORT_ALPHABET, start=1)}
+SORT_SEPARATOR, SORT_UNKNOWN = '00', '99'
+
+
+def normalize_phone(value, country_code=None):
+    """
+    Normalize a phone number to E.164 style.
+
+    "+48 123-456-789", "0048 123 456 789" and "123 456 789" all become
+    "+48123456789"; numbers without an international prefix get the
+    default country code (CONTACTS_DEFAULT_COUNTRY_CODE).
+
+    Args:
+        value: Phone number as typed
+        country_code: Country calling code for local numbers
+
+    Returns:
+        str: Normalized number, or '' if the value has no digits
+    """
+    value = (value or '').strip()
+    digits = NON_DIGITS.sub('', value)
+    if not digits:
+        return ''
+    if value.startswith('+'):
+        return f'+{digits}'
+    if digits.startswith('00'):
+        return f'+{digits[2:]}'
+    if country_code is None:
+        country_code = getattr(settings, 'CONTACTS_DEFAULT_COUNTRY_CODE', '48')
+    return f'+{country_code}{digits.lstrip("0")}'
+
+
+def normalize_email(value):
+    """Return the email address trimmed and case-folded."""
+    return (value or '').strip().casefold()
+
+
+def national_number(phone_e164):
+    """Last digits of a normalized number, ignoring the country code."""
+    return NON_DIGITS.sub('', phone_e164 or '')[-NATIONAL_NUMBER_DIGITS:]
+
+
+def mailbox_key(email_normalized):
+    """
+    Looser email key: drops "+tag" suffixes and dots in the local part.
+
+    "jan.kowalski+crm@example.com" and "jankowalski@example.com" share
+    the key "jankowalski@example.com".
+    """
+    local, _, domain = (email_normalized or '').partition('@')
+    local = local.split('+', 1)[0].replace('.', '')
+    return f'{local}@{domain}' if domain else ''
+
+
+def fold(text):
+    """Strip accents (including Polish "ł") and case-fold."""
+    text = unicodedata.normalize('NFKD', (text or '').replace('ł', 'l').replace('Ł', 'L'))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+
+
+def name_key(first_name, last_name, city):
+    """Accent- and case-insensitive full name plus city."""
+    text = fold(f'{first_name} {last_name}|{city}')
+    return ' '.join(text.replace('-', ' ').split())
+
+
+def search_key(value):
+    """
+    Prefix-searchable form of a name or city.
+
+    "Łódź" and "lodz" both become "lodz", so a typed prefix matches
+    regardless of accents and case.
+    """
+    return ' '.join(fold(value).split())
+
+
+def sort_key(value):
+    """
+    Key whose string order is the Polish alphabetical order of a name.
+
+    Case is ignored and letters outside the Polish alphabet sort as their
+    unaccented form; a space, hyphen or apostrophe sorts before any
+    letter, so "Anna Maria" comes before "Annabel".
+
+    Returns:
+        str: Two digits per character, e.g. sort_key("Łoś") == "162026"
+    """
+    key = []
+    for ch in ' '.join((value or '').split()).lower():
+        if ch in SORT_CODES:
+            key.append(SORT_CODES[ch])
+        elif ch in " -'":
+            key.append(SORT_SEPARATOR)
+        else:
+            key.extend(SORT_CODES.get(base, SORT_UNKNOWN) for base in fold(ch))
+    return ''.join(key)
@@ -0,0 +1,142 @@
+"""
+On-demand request profiling for staff users.
+
+A request is profiled when a staff user adds ``?_profile=1`` to the URL
+or sends the ``X-Profile: 1`` header. The request runs under cProfile
+with every SQL query timed, and the result is stored as a RequestProfile
+that can be browsed in the admin or downloaded as a .prof file.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .models import RequestProfile
+
+QUERY_PARAM = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+
+
+def _switched_on(request):
+    """Whether the request carries the profiling switch (user not checked)."""
+    if not getattr(settings, 'REQUEST_PROFILER_ENABLED', True):
+        return False
+    meta = request.META
+    if QUERY_PARAM not in meta.get('QUERY_STRING', '') and HEADER not in meta:
+        return False
+    return (
+        meta.get(HEADER, '') not in ('', '0')
+        or request.GET.get(QUERY_PARAM, '') not in ('', '0')
+    )
+
+
+def _is_staff(user):
+    return bool(user is not None and user.is_active and user.is_staff)
+
+
+def is_profiling_requested(request):
+    """
+    Check whether the request asks to be profiled.
+
+    Only the raw query string and headers are inspected, so requests
+    without the switch pay nothing beyond a substring check.
+    """
+    return _switched_on(request) and _is_staff(getattr(request, 'user', None))
+
+
+async def ais_profiling_requested(request):
+    """Async is_profiling_requested(); loads the user with request.auser()."""
+    if not _switched_on(request):
+        return False
+    auser = getattr(request, 'auser', None)
+    return _is_staff(await auser() if auser else None)
+
+
+class SQLTimeline:
+    """Database execute wrapper recording the timing of every query."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.queries = []
+
+    def wrap(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                end = time.perf_counter()
+                self.queries.append({
+                    'alias': alias,
+                    'start_ms': round((start - self.origin) * 1000, 3),
+                    'duration_ms': round((end - start) * 1000, 3),
+                    'sql': sql,
+                    'many': many,
+                })
+        return wrapper
+
+
+def profile_request(request, get_response):
+    """
+    Run the rest of the request cycle under cProfile and store the result.
+
+    Returns:
+        tuple: (response, RequestProfile)
+    """
+    origin = time.perf_counter()
+    timeline = SQLTimeline(origin)
+    profiler = cProfile.Profile()
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timeline.wrap(connection.alias)))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration_ms = (time.perf_counter() - origin) * 1000
+
+    stats = pstats.Stats(profiler)
+    limit = getattr(settings, 'REQUEST_PROFILER_TOP_FUNCTIONS', 40)
+
+    top_out = io.StringIO()
+    stats.stream = top_out
+    stats.sort_stats('cumulative').print_stats(limit)
+
+    tree_out = io.StringIO()
+    stats.stream = tree_out
+    stats.sort_stats('cumulative').print_callees(limit)
+
+    match = getattr(request, 'resolver_match', None)
+    profile = RequestProfile.objects.create(
+        path=request.get_full_path()[:255],
+        method=request.method,
+        view_name=(match.view_name if match else '')[:100],
+        status_code=response.status_code,
+        user=request.user if request.user.is_authenticated else None,
+        duration_ms=duration_ms,
+        query_count=len(timeline.queries),
+        query_time_ms=sum(q['duration_ms'] for q in timeline.queries),
+        top_functions=top_out.getvalue(),
+        call_tree=tree_out.getvalue(),
+        sql_timeline=timeline.queries,
+        stats=marshal.dumps(stats.stats),
+    )
+    _prune_old_profiles()
+    return response, profile
+
+
+def _prune_old_profiles():
+    """Keep only the most recent REQUEST_PROFILER_MAX_PROFILES profiles."""
+    keep = getattr(settings, 'REQUEST_PROFILER_MAX_PROFILES', 200)
+    stale = RequestProfile.objects.order_by('-created_at').values_list('pk', flat=True)[keep:]
+    stale_ids = list(stale)
+    if stale_ids:
+        RequestProfile.objects.filter(pk__in=stale_ids).delete()
@@ -2,8 +2,10 @@
 REST API serializers for the contacts application.
 """
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import Contact, ContactStatus
+from .uniqueness import UNIQUE_FIELDS, check_unique, constraint_first_enabled, unique_violations_as_errors
 
 
 class ContactStatusSerializer(serializers.ModelSerializer):
@@ -39,6 +41,38 @@ class ContactSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['date_added', 'created_at', 'updated_at']
     
+    def validate(self, attrs):
+        """Check email and phone uniqueness on the normalized keys."""
+        attrs = super().validate(attrs)
+        if constraint_first_enabled():
+            return attrs
+        fields = [name for name in UNIQUE_FIELDS if name in attrs]
+        if fields:
+            candidate = Contact(pk=getattr(self.instance, 'pk', None), **{name: attrs[name] for name in fields})
+            try:
+                check_unique(candidate, fields)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.message_dict)
+        return attrs
+    
+    def create(self, validated_data):
+        if not constraint_first_enabled():
+            return super().create(validated_data)
+        try:
+            with unique_violations_as_errors():
+                return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+    
+    def update(self, instance, validated_data):
+        if not constraint_first_enabled():
+            return super().update(instance, validated_data)
+        try:
+            with unique_violations_as_errors():
+                return super().update(instance, validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+    
     def validate_phone_number(self, value):
         """Ensure phone number is properly formatted."""
         if len(value.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')) < 8:
@@ -62,3 +96,14 @@ class ContactListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = ['id', 'first_name', 'last_name', 'city', 'status_name', 'date_added']
+
+
+class CombinedContactListSerializer(ContactListSerializer):
+    """
+    List serializer for ?include_archived=1, where rows are Contact or
+    ArchivedContact objects; adds whether each one is archived.
+    """
+    archived = serializers.BooleanField(source='is_archived', read_only=True)
+    
+    class Meta(ContactListSerializer.Meta):
+        fields = ContactListSerializer.Meta.fields + ['archived']
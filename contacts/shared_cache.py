@@ -0,0 +1,371 @@
+"""
+Cache backend shared by the worker processes of a host.
+
+Includes:
+- SQLiteCache: Django cache backend keeping entries in one SQLite file,
+  bounded by entry count and total size with least-recently-used eviction
+
+LocMemCache keeps a separate copy per process that is lost on restart,
+so every worker geocodes a city and fetches its weather on its own. This
+backend stores entries in a WAL-mode SQLite file instead: reads never
+block each other or a writer, and no cache server has to run.
+
+add() and incr() are single statements, so they are atomic across
+processes and can back locks and version counters (see contacts.caching).
+Integers are stored as SQLite integers (incr() adds in place), everything
+else is pickled and zlib-compressed when that makes it smaller.
+
+Recency is tracked to ACCESS_RESOLUTION seconds: a read only writes the
+access time back when the stored one is older than that, so hot keys are
+read without taking the write lock.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Blob prefixes telling how a value was serialized
+PICKLED = b'p'
+COMPRESSED = b'z'
+
+# Pickles at least this large are compressed if that saves space
+COMPRESS_MIN_BYTES = 512
+
+# SQLite stores integers in at most 8 bytes
+MIN_INTEGER, MAX_INTEGER = -2**63, 2**63 - 1
+
+# Variables per statement in get_many() / delete_many()
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed);
+CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires) WHERE expires IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS cache_usage (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_usage VALUES (1, 0, 0);
+
+CREATE TRIGGER IF NOT EXISTS cache_entries_inserted AFTER INSERT ON cache_entries BEGIN
+    UPDATE cache_usage SET entries = entries + 1, bytes = bytes + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_updated AFTER UPDATE OF size ON cache_entries BEGIN
+    UPDATE cache_usage SET bytes = bytes - OLD.size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_deleted AFTER DELETE ON cache_entries BEGIN
+    UPDATE cache_usage SET entries = entries - 1, bytes = bytes - OLD.size;
+END;
+"""
+
+UPSERT = """
+INSERT INTO cache_entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, size = excluded.size, expires = excluded.expires, accessed = excluded.accessed
+"""
+
+# Stores a new entry or replaces an expired one, leaves a live one alone
+ADD = UPSERT + """WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?
+"""
+
+# Evicts the least recently used entries until both bounds are met
+EVICT = """
+DELETE FROM cache_entries WHERE key IN (
+    SELECT key FROM (
+        SELECT key, size, ROW_NUMBER() OVER recency AS position, SUM(size) OVER recency AS running
+        FROM cache_entries
+        WINDOW recency AS (ORDER BY accessed ROWS UNBOUNDED PRECEDING)
+    )
+    WHERE position <= ? OR running - size < ?
+)
+"""
+
+LIVE = '(expires IS NULL OR expires > ?)'
+
+# Pooled connections a forked process inherited; kept referenced so that
+# garbage collection does not close them under the parent
+_inherited = []
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache in a SQLite file shared by every process that opens it.
+
+    LOCATION is the file path. OPTIONS: MAX_ENTRIES and CULL_FREQUENCY as
+    for Django's own backends (once a bound is exceeded, the least
+    recently used 1/CULL_FREQUENCY of it is evicted), MAX_BYTES for the
+    total size of keys and values (0: no limit), ACCESS_RESOLUTION.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = Path(location)
+        self._max_bytes = int(options.get('MAX_BYTES', 0))
+        self._access_resolution = float(options.get('ACCESS_RESOLUTION', 1.0))
+        self._lock = threading.Lock()
+        self._pool = []
+        self._pid = None
+        self._ready_pid = None
+
+    # Connections
+
+    @contextmanager
+    def _connection(self):
+        # A pool per process rather than a connection per thread: Django runs
+        # the sync code of each ASGI request on a new thread, which would pay
+        # for opening a connection on its first cache call
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: never use (or close) the parent's connections
+                _inherited.extend(self._pool)
+                self._pool, self._pid = [], os.getpid()
+            connection = self._pool.pop() if self._pool else None
+        if connection is None:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                if self._pid == os.getpid():
+                    self._pool.append(connection)
+
+    def _connect(self):
+        if self._ready_pid != os.getpid():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+        # A cache can lose its last writes on power failure
+        connection.execute('PRAGMA synchronous = NORMAL')
+        connection.execute('PRAGMA mmap_size = 67108864')
+        self._ensure_schema(connection)
+        return connection
+
+    def _ensure_schema(self, connection):
+        """Create the tables once per process; only a new file takes the write lock."""
+        with self._lock:
+            if self._ready_pid == os.getpid():
+                return
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache_usage'"
+            ).fetchone()
+            if not exists:
+                connection.execute('PRAGMA journal_mode = WAL')  # Stored in the file
+                connection.executescript(SCHEMA)
+            self._ready_pid = os.getpid()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-then-write
+        # sequences are not interleaved with other processes
+        with self._connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    # Serialization
+
+    def _encode(self, value):
+        if type(value) is int and MIN_INTEGER <= value <= MAX_INTEGER:
+            return value, 8
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            compressed = zlib.compress(data, 1)
+            if len(compressed) < len(data):
+                return COMPRESSED + compressed, len(compressed) + 1
+        return PICKLED + data, len(data) + 1
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        if value[:1] == COMPRESSED:
+            return pickle.loads(zlib.decompress(value[1:]))
+        return pickle.loads(value[1:])
+
+    def _row(self, key, value, timeout, now):
+        value, size = self._encode(value)
+        return key, value, size + len(key), self.get_backend_timeout(timeout), now
+
+    # Eviction
+
+    def _cull(self, connection, now):
+        """Evict expired, then least recently used entries once over a bound."""
+        entries, size = connection.execute('SELECT entries, bytes FROM cache_usage').fetchone()
+        if entries <= self._max_entries and (not self._max_bytes or size <= self._max_bytes):
+            return
+        if self._cull_frequency == 0:
+            connection.execute('DELETE FROM cache_entries')
+            return
+        connection.execute('DELETE FROM cache_entries WHERE expires <= ?', (now,))
+        entries, size = connection.execute('SELECT entries, bytes FROM cache_usage').fetchone()
+        # Evict down to (1 - 1/CULL_FREQUENCY) of each bound that is exceeded
+        excess_entries, excess_bytes = 0, 0
+        if entries > self._max_entries:
+            excess_entries = entries - (self._max_entries - self._max_entries // self._cull_frequency)
+        if self._max_bytes and size > self._max_bytes:
+            excess_bytes = size - (self._max_bytes - self._max_bytes // self._cull_frequency)
+        if excess_entries or excess_bytes:
+            connection.execute(EVICT, (excess_entries, excess_bytes))
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                f'SELECT value, accessed FROM cache_entries WHERE key = ? AND {LIVE}', (key, now)
+            ).fetchone()
+            if row is None:
+                return default
+            value, accessed = row
+            if now - accessed >= self._access_resolution:
+                self._mark_accessed(connection, [key], now)
+        return self._decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        now = time.time()
+        found, stale = {}, []
+        names = list(keys)
+        with self._connection() as connection:
+            for start in range(0, len(names), CHUNK_SIZE):
+                chunk = names[start:start + CHUNK_SIZE]
+                rows = connection.execute(
+                    f'SELECT key, value, accessed FROM cache_entries '
+                    f'WHERE key IN ({", ".join("?" * len(chunk))}) AND {LIVE}',
+                    (*chunk, now),
+                )
+                for key, value, accessed in rows:
+                    found[keys[key]] = self._decode(value)
+                    if now - accessed >= self._access_resolution:
+                        stale.append(key)
+            if stale:
+                self._mark_accessed(connection, stale, now)
+        return found
+
+    def _mark_accessed(self, connection, keys, now):
+        try:
+            connection.execute(
+                f'UPDATE cache_entries SET accessed = ? WHERE key IN ({", ".join("?" * len(keys))})',
+                (now, *keys),
+            )
+        except sqlite3.OperationalError:
+            # Busy: recency is a hint, the read has its value already
+            pass
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._connection() as connection:
+            row = connection.execute(
+                f'SELECT 1 FROM cache_entries WHERE key = ? AND {LIVE}', (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(UPSERT, self._row(key, value, timeout, now))
+            self._cull(connection, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [self._row(self.make_and_validate_key(key, version=version), value, timeout, now)
+                for key, value in data.items()]
+        with self._transaction() as connection:
+            connection.executemany(UPSERT, rows)
+            self._cull(connection, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Store value unless key holds a live entry; True if it was stored."""
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(ADD, (*self._row(key, value, timeout, now), now))
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(connection, now)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        """Add delta to an integer value in one statement; ValueError if missing."""
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                f"UPDATE cache_entries SET value = value + ?, accessed = ? "
+                f"WHERE key = ? AND typeof(value) = 'integer' AND value + ? BETWEEN ? AND ? AND {LIVE} "
+                f"RETURNING value",
+                (delta, now, key, delta, MIN_INTEGER, MAX_INTEGER, now),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+        # Missing, or a value SQLite cannot add to in place (pickled)
+        with self._transaction() as connection:
+            row = connection.execute(
+                f'SELECT value FROM cache_entries WHERE key = ? AND {LIVE}', (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self._decode(row[0]) + delta
+            encoded, size = self._encode(value)
+            connection.execute(
+                'UPDATE cache_entries SET value = ?, size = ?, accessed = ? WHERE key = ?',
+                (encoded, size + len(key), now, key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                f'UPDATE cache_entries SET expires = ?, accessed = ? WHERE key = ? AND {LIVE}',
+                (self.get_backend_timeout(timeout), now, key, now),
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._connection() as connection:
+            cursor = connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        names = [self.make_and_validate_key(key, version=version) for key in keys]
+        with self._connection() as connection:
+            for start in range(0, len(names), CHUNK_SIZE):
+                chunk = names[start:start + CHUNK_SIZE]
+                connection.execute(
+                    f'DELETE FROM cache_entries WHERE key IN ({", ".join("?" * len(chunk))})', chunk
+                )
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM cache_entries')
+
+    def usage(self):
+        """Entry count and total size in bytes (expired entries included)."""
+        with self._connection() as connection:
+            entries, size = connection.execute('SELECT entries, bytes FROM cache_usage').fetchone()
+        return {'entries': entries, 'bytes': size}
@@ -0,0 +1,48 @@
+"""
+Signal receivers for the contacts application.
+
+Includes:
+- Tombstones for deleted contacts, consumed by the change feed
+- ContactStat counters decremented for deleted contacts
+- Cached typeahead suggestions invalidated when a contact changes
+- Cached contact cards invalidated when a status is renamed or removed
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, stats
+from .models import Contact, ContactStatus, ContactTombstone
+
+
+@receiver(post_delete, sender=Contact)
+def record_tombstone(sender, instance, using, **kwargs):
+    """Remember the deleted contact's id for sync clients."""
+    if stats.is_suspended():
+        return  # QuerySet.delete() writes the tombstones in bulk
+    ContactTombstone.objects.using(using).create(contact_id=instance.pk)
+
+
+@receiver(post_delete, sender=Contact)
+def decrement_stats(sender, instance, using, **kwargs):
+    """Stop counting the deleted contact (runs inside the delete transaction)."""
+    if stats.is_suspended():
+        return  # QuerySet.delete() adjusts the counters in bulk
+    old_keys = getattr(instance, '_loaded_stat_keys', None) or instance.stat_keys()
+    stats.apply_deltas(stats.diff(old_keys, None), using=using)
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def invalidate_suggestions(sender, using, **kwargs):
+    """Drop cached suggestions once the write commits."""
+    if stats.is_suspended():
+        return  # Bulk writes bump the version once
+    caching.bump_version_on_commit(caching.SUGGEST, using=using)
+
+
+@receiver(post_save, sender=ContactStatus)
+@receiver(post_delete, sender=ContactStatus)
+def invalidate_contact_cards(sender, using, **kwargs):
+    """Drop cached contact cards (they show the status name) once the write commits."""
+    caching.bump_version_on_commit(caching.STATUSES, using=using)
@@ -0,0 +1,194 @@
+"""
+Incrementally maintained contact counts for dashboards.
+
+Includes:
+- stat_keys: the (dimension, key) counters a contact contributes to
+- apply_deltas: add/subtract counts in the ContactStat summary table
+- grouped_counts: counters of the contacts in a queryset, with GROUP BY
+- rebuild: recompute the whole table from Contact (repairs drift)
+- total: number of contacts, without a COUNT over the contacts table
+- summary: dashboard payload read straight from the summary table
+
+Every write path of Contact (save, delete, bulk_create, bulk_update and
+QuerySet.update) adjusts the counters in the same transaction as the
+write, so reading the counts never scans the contacts table.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+STATUS, CITY, DAY = 'status', 'city', 'day'
+DIMENSIONS = (STATUS, CITY, DAY)
+
+# Contact field each dimension is derived from
+SOURCE_FIELDS = {STATUS: 'status', CITY: 'city', DAY: 'date_added'}
+
+# Set while a caller accounts for the counters (and other per-row
+# bookkeeping) itself, e.g. bulk_update, which runs QuerySet.update()
+# internally
+_suspended = ContextVar('contact_stats_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """Skip automatic counter maintenance in QuerySet.update() and post_delete."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def is_suspended():
+    return _suspended.get()
+
+
+def day_key(value):
+    """Calendar day (in the current time zone) of a date_added value."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().isoformat()
+
+
+def stat_keys(status_id, city, date_added):
+    """Counter key per dimension that one contact contributes to."""
+    return {STATUS: str(status_id), CITY: city, DAY: day_key(date_added)}
+
+
+def diff(old_keys, new_keys):
+    """Deltas moving a contact from old_keys to new_keys (either may be None)."""
+    deltas = Counter()
+    for key in (new_keys or {}).items():
+        deltas[key] += 1
+    for key in (old_keys or {}).items():
+        deltas[key] -= 1
+    return deltas
+
+
+def value_key(dimension, value):
+    """Counter key for a value assigned to a dimension's source field."""
+    if dimension == STATUS:
+        return str(getattr(value, 'pk', value))
+    if dimension == DAY:
+        return day_key(value)
+    return value
+
+
+def apply_deltas(deltas, using=None):
+    """
+    Add the deltas to the summary table.
+
+    Each counter is one UPDATE ... SET count = count + delta, so concurrent
+    writers never overwrite each other's increments.
+
+    Args:
+        deltas: Mapping of (dimension, key) to a count change
+        using: Database alias
+    """
+    from .models import ContactStat
+
+    manager = ContactStat.objects.db_manager(using)
+    for (dimension, key), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        rows = manager.filter(dimension=dimension, key=key)
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic(using=manager.db):
+                manager.create(dimension=dimension, key=key, count=delta)
+        except IntegrityError:
+            # Created concurrently; add to the row the other writer made
+            rows.update(count=F('count') + delta)
+
+
+def grouped_counts(queryset, dimensions=DIMENSIONS):
+    """
+    Count the contacts of a queryset per dimension key.
+
+    Returns:
+        Counter: (dimension, key) -> number of contacts
+    """
+    counts = Counter()
+    queryset = queryset.order_by()
+    for dimension in dimensions:
+        if dimension == DAY:
+            rows = queryset.annotate(value=TruncDate('date_added')).values('value')
+        else:
+            rows = queryset.values(value=F(SOURCE_FIELDS[dimension]))
+        for row in rows.annotate(n=Count('pk')).values_list('value', 'n'):
+            value, n = row
+            key = value.isoformat() if dimension == DAY else str(value)
+            counts[(dimension, key)] += n
+    return counts
+
+
+def rebuild(using=None):
+    """
+    Recompute every counter from the contacts table.
+
+    Returns:
+        int: Number of counters that had drifted
+    """
+    from .models import Contact, ContactStat
+
+    with transaction.atomic(using=using):
+        manager = ContactStat.objects.db_manager(using)
+        current = {
+            (dimension, key): count
+            for dimension, key, count in manager.select_for_update().values_list('dimension', 'key', 'count')
+        }
+        expected = grouped_counts(Contact.objects.db_manager(using).all())
+        drifted = sum(
+            1 for key in current.keys() | expected.keys()
+            if current.get(key, 0) != expected.get(key, 0)
+        )
+        manager.all().delete()
+        manager.bulk_create(
+            [ContactStat(dimension=dimension, key=key, count=count) for (dimension, key), count in expected.items()],
+            batch_size=1000,
+        )
+    return drifted
+
+
+def total(using=None):
+    """Number of contacts, summed from the per-status counters."""
+    from .models import ContactStat
+
+    counters = ContactStat.objects.using(using).filter(dimension=STATUS, count__gt=0)
+    return counters.aggregate(total=Sum('count'))['total'] or 0
+
+
+def summary(days=30, cities=50):
+    """
+    Dashboard counts read from the summary table.
+
+    Args:
+        days: How many recent days to include in by_day
+        cities: How many of the largest cities to include in by_city
+
+    Returns:
+        dict: total, by_status (status name), by_city and by_day
+    """
+    from .models import ContactStat, ContactStatus
+
+    stats = ContactStat.objects.filter(count__gt=0)
+    status_names = dict(ContactStatus.objects.values_list('id', 'name'))
+    by_status = {
+        status_names.get(int(key), key): count
+        for key, count in stats.filter(dimension=STATUS).values_list('key', 'count')
+    }
+    since = (timezone.localdate() - timedelta(days=days - 1)).isoformat()
+    return {
+        'total': total(),
+        'by_status': by_status,
+        'by_city': dict(stats.filter(dimension=CITY).order_by('-count', 'key').values_list('key', 'count')[:cities]),
+        'by_day': dict(stats.filter(dimension=DAY, key__gte=since).order_by('key').values_list('key', 'count')),
+    }
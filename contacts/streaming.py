@@ -0,0 +1,54 @@
+"""
+Streaming responses that stream under both WSGI and ASGI.
+
+Includes:
+- aiterate: an async iterator over a sync one, advanced in the request's
+  sync thread
+- streaming_response: StreamingHttpResponse over a sync iterator, wrapped
+  with aiterate when the request came in over ASGI
+
+Under ASGI Django consumes a sync streaming iterator with one
+sync_to_async(list) call, so the whole response is built in memory and
+sent at the end. Iterators that write or read the database (ingest,
+exports) must not run on the event loop either; aiterate advances them
+one item at a time with thread_sensitive sync_to_async, i.e. in the same
+thread (and on the same connection) as the rest of the request.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+_DONE = object()
+
+
+async def aiterate(iterator):
+    """
+    Yield the items of a sync iterator without blocking the event loop.
+
+    Items should be reasonably large (a batch summary, a chunk of CSV
+    rows): each one costs a thread switch.
+    """
+    iterator = iter(iterator)
+    advance = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (item := await advance(iterator, _DONE)) is not _DONE:
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def streaming_response(request, content, **kwargs):
+    """
+    StreamingHttpResponse over content (a sync iterator) for this request.
+
+    Args:
+        request: The HttpRequest (or DRF Request) being answered
+        content: Iterator of str or bytes chunks
+        **kwargs: Passed to StreamingHttpResponse (content_type, ...)
+    """
+    # Only ASGIRequest carries the ASGI scope
+    if getattr(request, 'scope', None) is not None:
+        content = aiterate(content)
+    return StreamingHttpResponse(content, **kwargs)
@@ -0,0 +1,127 @@
+"""
+Typeahead suggestions for the contact search box.
+
+Includes:
+- prefix_lookup: index-friendly "starts with" condition on a key column
+- city_index: sorted array of (folded city, city, count) built from the
+  ContactStat counters
+- suggest: contacts whose last name, first name or email starts with a
+  prefix, plus matching cities, cached per prefix
+
+Names are matched on the folded first_name_key/last_name_key columns and
+emails on email_normalized, so every lookup is a range scan of an index
+that stops after `limit` rows. Cached results are keyed by a version
+counter that every contact write bumps (see contacts.caching).
+"""
+
+from bisect import bisect_left
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import caching, stats
+from .models import Contact, ContactStat
+from .normalization import normalize_email, search_key
+
+# Matched field -> key column it is looked up by, in result order
+PREFIX_FIELDS = {
+    'last_name': 'last_name_key',
+    'first_name': 'first_name_key',
+    'email': 'email_normalized',
+}
+
+CONTACT_FIELDS = ['id', 'first_name', 'last_name', 'email', 'city']
+
+MAX_LIMIT = 50
+
+
+def prefix_lookup(field, prefix):
+    """
+    Condition matching values of field that start with prefix.
+
+    The range (prefix <= value < next prefix) is what lets SQLite walk the
+    index (its LIKE is case-insensitive and cannot); startswith keeps the
+    match exact under any collation and uses the varchar_pattern_ops index
+    on PostgreSQL.
+    """
+    lookup = Q(**{f'{field}__gte': prefix, f'{field}__startswith': prefix})
+    if ord(prefix[-1]) < 0x10FFFF:
+        lookup &= Q(**{f'{field}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)})
+    return lookup
+
+
+def _timeout():
+    return getattr(settings, 'CONTACTS_SUGGEST_CACHE_SECONDS', 60)
+
+
+def city_index():
+    """
+    Cities with at least one contact as a sorted array of
+    (folded name, name, count), cached until the next contact write.
+    """
+    key = caching.cache_key(caching.SUGGEST, 'cities')
+    index = cache.get(key)
+    if index is None:
+        index = sorted(
+            (search_key(city), city, count)
+            for city, count in ContactStat.objects.filter(
+                dimension=stats.CITY, count__gt=0
+            ).values_list('key', 'count')
+        )
+        cache.set(key, index, _timeout())
+    return index
+
+
+def _matching_cities(prefix, limit):
+    index = city_index()
+    matches = []
+    for folded, city, count in index[bisect_left(index, (prefix,)):]:
+        if not folded.startswith(prefix):
+            break
+        matches.append({'city': city, 'count': count})
+    matches.sort(key=lambda match: (-match['count'], match['city']))
+    return matches[:limit]
+
+
+def suggest(query, limit=10):
+    """
+    Contacts and cities starting with the typed text.
+
+    Args:
+        query: Text typed so far
+        limit: Maximum number of contacts and of cities returned
+
+    Returns:
+        dict: query, contacts (each with the field it matched on) and
+        cities (with their contact counts, largest first)
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    name_prefix, email_prefix = search_key(query), normalize_email(query)
+    if not name_prefix and not email_prefix:
+        return {'query': query, 'contacts': [], 'cities': []}
+
+    key = caching.cache_key(caching.SUGGEST, limit, quote(name_prefix), quote(email_prefix))
+    result = cache.get(key)
+    if result is not None:
+        return {**result, 'query': query}
+
+    contacts, seen = [], set()
+    for matched, field in PREFIX_FIELDS.items():
+        prefix = email_prefix if field == 'email_normalized' else name_prefix
+        if not prefix or len(contacts) >= limit:
+            continue
+        rows = Contact.objects.filter(prefix_lookup(field, prefix)).order_by(field, 'id').values(*CONTACT_FIELDS)
+        for row in rows[:limit]:
+            if row['id'] not in seen and len(contacts) < limit:
+                seen.add(row['id'])
+                contacts.append({**row, 'matched': matched})
+
+    result = {
+        'query': query,
+        'contacts': contacts,
+        'cities': _matching_cities(name_prefix, limit) if name_prefix else [],
+    }
+    cache.set(key, result, _timeout())
+    return result
@@ -7,7 +7,9 @@ Tests cover:
 - Contact creation and data integrity
 """
 
-from django.test import TestCase
+import unittest
+
+from django.test import LiveServerTestCase, TestCase, override_settings
 from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
 from rest_framework.test import APITestCase
@@ -186,3 +188,1950 @@ class ContactAPITest(APITestCase):
         response = self.client.post(self.list_url, duplicate_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('email', response.data)
+
+
+class MetricsTest(TestCase):
+    """Test metrics collection and the Prometheus endpoint."""
+    
+    def test_counters_aggregate_across_processes(self):
+        """Test snapshots from several workers are summed."""
+        import tempfile
+        from .metrics import MetricsRegistry, HTTP_LATENCY
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            worker_a = MetricsRegistry(directory=tmp)
+            worker_b = MetricsRegistry(directory=tmp)
+            worker_a.inc('contacts_import_rows_total', {'result': 'imported'}, 3)
+            worker_b.inc('contacts_import_rows_total', {'result': 'imported'}, 4)
+            worker_a.observe(HTTP_LATENCY, 0.02, {'view': 'contact_list', 'method': 'GET'})
+            worker_b.observe(HTTP_LATENCY, 0.2, {'view': 'contact_list', 'method': 'GET'})
+            worker_b.flush()
+            
+            state = worker_a.collect()
+        
+        self.assertEqual(state['counters'][('contacts_import_rows_total', (('result', 'imported'),))], 7)
+        histogram = state['histograms'][(HTTP_LATENCY, (('method', 'GET'), ('view', 'contact_list')))]
+        self.assertEqual(sum(histogram['counts']), 2)
+    
+    def test_metrics_endpoint_exposes_view_latency(self):
+        """Test /metrics/ reports latency histograms per URL name."""
+        self.client.get(reverse('contact_list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('contacts_http_request_duration_seconds_bucket{method="GET",view="contact_list",le="+Inf"}', body)
+    
+    def test_upstream_errors_are_counted(self):
+        """Test failed Nominatim calls show up in the error ratio."""
+        from unittest import mock
+        from django.core.cache import cache
+        from . import metrics
+        from .weather_views import get_city_coordinates
+        
+        cache.clear()
+        with mock.patch('contacts.weather_views.requests.get', side_effect=OSError('down')):
+            self.assertEqual(get_city_coordinates('Nowhere'), (None, None))
+        
+        body = metrics.render_prometheus(metrics.registry.collect())
+        self.assertIn('contacts_upstream_errors_total{upstream="nominatim"}', body)
+        self.assertIn('contacts_upstream_error_ratio{upstream="nominatim"}', body)
+
+
+class RequestProfilerTest(TestCase):
+    """Test the on-demand request profiler."""
+    
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.staff = User.objects.create_user('staff', password='secret', is_staff=True, is_superuser=True)
+        self.user = User.objects.create_user('regular', password='secret')
+        status_obj = ContactStatus.objects.create(name="new")
+        Contact.objects.create(
+            first_name="John",
+            last_name="Doe",
+            phone_number="+48123456789",
+            email="john@example.com",
+            city="Warsaw",
+            status=status_obj
+        )
+    
+    def test_staff_can_profile_list_view(self):
+        """Test ?_profile=1 stores a profile with the SQL timeline."""
+        from .models import RequestProfile
+        
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('contact_list'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertGreater(profile.query_count, 0)
+        self.assertIn('contacts_contact', ' '.join(q['sql'] for q in profile.sql_timeline))
+        self.assertIn('function calls', profile.top_functions)
+        self.assertIn('called...', profile.call_tree)
+        
+        download = self.client.get(reverse('admin:contacts_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(bytes(download.content), bytes(profile.stats))
+    
+    def test_header_switch_profiles_api(self):
+        """Test the X-Profile header works for DRF viewsets."""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('contact-list'), HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-Id', response)
+    
+    def test_non_staff_is_not_profiled(self):
+        """Test regular users cannot trigger profiling."""
+        from .models import RequestProfile
+        
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('contact_list'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+class SQLitePerformanceModeTest(TestCase):
+    """Test the opt-in SQLite profile and lock retry policy."""
+    
+    def test_pragmas_applied_when_enabled(self):
+        """Test connection_created applies the performance pragmas."""
+        import os
+        import tempfile
+        from django.db import connection, connections
+        from django.test import override_settings
+        
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with tempfile.TemporaryDirectory() as tmp:
+            settings_dict = {**connection.settings_dict, 'NAME': os.path.join(tmp, 'pragmas.sqlite3')}
+            wrapper = type(connections['default'])(settings_dict, alias='pragma_test')
+            with override_settings(SQLITE_PERFORMANCE_MODE=True, SQLITE_PRAGMAS={'busy_timeout': 1234}):
+                wrapper.connect()
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 1234)
+            finally:
+                wrapper.close()
+    
+    def test_retry_on_locked_retries_lock_errors(self):
+        """Test lock contention is retried and other errors are not."""
+        from unittest import mock
+        from django.db import OperationalError
+        from .db import retry_on_locked
+        
+        calls = []
+        
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+        
+        # TestCase wraps each test in a transaction, so simulate a top-level call
+        with mock.patch('contacts.db.connections') as mock_connections, \
+                mock.patch('contacts.db.transaction.atomic'), \
+                mock.patch('contacts.db.time.sleep'):
+            mock_connections.__getitem__.return_value.in_atomic_block = False
+            self.assertEqual(retry_on_locked(flaky)(), 'ok')
+            self.assertEqual(len(calls), 3)
+            
+            broken = retry_on_locked(mock.Mock(side_effect=OperationalError('no such table')))
+            with self.assertRaises(OperationalError):
+                broken()
+            self.assertEqual(broken.__wrapped__.call_count, 1)
+
+
+class PostgreSQLSearchIndexTest(TestCase):
+    """Test trigram search indexes (PostgreSQL only)."""
+    
+    def test_trigram_indexes_exist(self):
+        """Test every search field has a GIN trigram index."""
+        from django.db import connection
+        
+        if connection.vendor != 'postgresql':
+            self.skipTest('PostgreSQL only')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = 'contacts_contact' AND indexdef LIKE %s",
+                ['%gin_trgm_ops%']
+            )
+            definitions = ' '.join(row[0] for row in cursor.fetchall())
+        for field in ['first_name', 'last_name', 'email', 'phone_number', 'city']:
+            self.assertIn(field, definitions)
+
+
+class ReadReplicaRouterTest(unittest.TestCase):
+    """
+    Test read/write routing with two SQLite files as primary and replica.
+    
+    A plain unittest case, since the aliases only exist while it runs.
+    """
+    
+    aliases = ('primary_test', 'replica_test')
+    
+    @classmethod
+    def setUpClass(cls):
+        import copy
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from django.db import connections
+        
+        cls.tmp = tempfile.TemporaryDirectory()
+        for alias in cls.aliases:
+            settings_dict = copy.deepcopy(connections.settings['default'])
+            settings_dict['NAME'] = os.path.join(cls.tmp.name, f'{alias}.sqlite3')
+            settings_dict['ENGINE'] = 'django.db.backends.sqlite3'
+            connections.settings[alias] = settings_dict
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        from django.db import connections
+        
+        super().tearDownClass()
+        for alias in cls.aliases:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.tmp.cleanup()
+    
+    def make_router(self):
+        from .db_routers import PrimaryReplicaRouter
+        return PrimaryReplicaRouter(primary='primary_test', replicas=['replica_test'])
+    
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        """Test plain reads hit the replica until the context writes."""
+        from contextvars import copy_context
+        from django.test import override_settings
+        
+        def scenario():
+            ContactStatus.objects.using('replica_test').create(name="replicated")
+            self.assertEqual(ContactStatus.objects.count(), 1)
+            self.assertEqual(ContactStatus.objects.get().name, "replicated")
+            
+            ContactStatus.objects.create(name="new")
+            self.assertEqual(ContactStatus.objects.using('primary_test').count(), 1)
+            # Read-your-writes: after writing, reads stay on the primary
+            self.assertEqual(ContactStatus.objects.get().name, "new")
+        
+        with override_settings(DATABASE_ROUTERS=[self.make_router()]):
+            copy_context().run(scenario)
+    
+    def test_pinning_and_transactions_use_primary(self):
+        """Test pinned contexts and open transactions read from the primary."""
+        from contextvars import copy_context
+        from django.db import transaction
+        from .db_routers import primary_pinned
+        
+        router = self.make_router()
+        
+        def scenario():
+            self.assertEqual(router.db_for_read(Contact), 'replica_test')
+            with primary_pinned():
+                self.assertEqual(router.db_for_read(Contact), 'primary_test')
+            with transaction.atomic(using='primary_test'):
+                self.assertEqual(router.db_for_read(Contact), 'primary_test')
+            router.mark_unhealthy('replica_test')
+            self.assertEqual(router.db_for_read(Contact), 'primary_test')
+        
+        copy_context().run(scenario)
+    
+
+
+class ReplicaPinningMiddlewareTest(APITestCase):
+    """Test clients are pinned to the primary after writing."""
+    
+    def test_write_request_sets_pin_cookie(self):
+        """Test a request that writes pins the client to the primary."""
+        from django.test import override_settings
+        from .db_routers import PrimaryReplicaRouter
+        
+        status_obj = ContactStatus.objects.create(name="new")
+        with override_settings(DATABASE_ROUTERS=[PrimaryReplicaRouter(replicas=[])]):
+            response = self.client.post(reverse('contact-list'), {
+                "first_name": "Jane",
+                "last_name": "Smith",
+                "phone_number": "+48987654321",
+                "email": "jane.smith@example.com",
+                "city": "Krakow",
+                "status": status_obj.id
+            })
+            self.assertEqual(response.status_code, 201)
+            self.assertIn('pin_primary', response.cookies)
+            self.assertNotIn('pin_primary', self.client.get(reverse('contact-list')).cookies)
+
+
+class SeedContactsCommandTest(TestCase):
+    """Test the synthetic dataset generator."""
+    
+    def test_seed_creates_valid_contacts(self):
+        """Test generated contacts pass model validation and spread across statuses."""
+        import io
+        from django.core.management import call_command
+        
+        call_command('seed_contacts', count=300, batch_size=100, seed=1, stdout=io.StringIO())
+        call_command('seed_contacts', count=50, seed=1, stdout=io.StringIO())
+        
+        self.assertEqual(Contact.objects.count(), 350)
+        self.assertEqual(ContactStatus.objects.count(), 4)
+        self.assertGreater(Contact.objects.values('city').distinct().count(), 5)
+        for contact in Contact.objects.all()[:100]:
+            contact.full_clean()
+
+
+class ConstraintFirstWritesTest(APITestCase):
+    """Test uniqueness enforced by database constraints instead of SELECTs."""
+    
+    def setUp(self):
+        """Create a status and an existing contact to collide with."""
+        self.status = ContactStatus.objects.create(name="new")
+        Contact.objects.create(
+            first_name="John",
+            last_name="Doe",
+            phone_number="+48123456789",
+            email="john.doe@example.com",
+            city="Warsaw",
+            status=self.status
+        )
+        self.data = {
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "phone_number": "+48987654321",
+            "email": "jane.doe@example.com",
+            "city": "Krakow",
+            "status": self.status.id
+        }
+    
+    def test_api_duplicate_email_maps_to_field_error(self):
+        """Test a duplicate email returns the form's message without a pre-flight query."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .forms import ContactForm
+        
+        with self.settings(CONTACTS_CONSTRAINT_FIRST_WRITES=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse('contact-list'), {**self.data, "email": "john.doe@example.com"}, format='json'
+                )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['email'], [ContactForm.Meta.error_messages['email']['unique']])
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT 1') for q in queries.captured_queries
+        ))
+        self.assertEqual(Contact.objects.count(), 1)
+    
+    def test_api_create_skips_uniqueness_queries(self):
+        """Test a successful create saves the uniqueness SELECT."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as checked:
+            self.client.post(reverse('contact-list'), self.data, format='json')
+        with self.settings(CONTACTS_CONSTRAINT_FIRST_WRITES=True):
+            with CaptureQueriesContext(connection) as constrained:
+                response = self.client.post(
+                    reverse('contact-list'),
+                    {**self.data, "phone_number": "+48555000111", "email": "jane2@example.com"},
+                    format='json'
+                )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        def statements(ctx):
+            return [
+                q for q in ctx.captured_queries
+                if 'SAVEPOINT' not in q['sql'] and 'contacts_contactstat' not in q['sql']
+            ]
+        
+        self.assertEqual(len(statements(constrained)), len(statements(checked)) - 1)
+    
+    def test_form_view_duplicate_phone_maps_to_field_error(self):
+        """Test the HTML create view shows the phone message after a constraint violation."""
+        from .forms import ContactForm
+        
+        with self.settings(CONTACTS_CONSTRAINT_FIRST_WRITES=True):
+            response = self.client.post(reverse('contact_create'), {**self.data, "phone_number": "+48123456789"})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].errors['phone_number'],
+            [ContactForm.Meta.error_messages['phone_number']['unique']]
+        )
+        self.assertEqual(Contact.objects.count(), 1)
+
+
+class UpsertImportTest(APITestCase):
+    """Test upsert mode for CSV import and the bulk API."""
+    
+    def setUp(self):
+        """Create two existing contacts to match against."""
+        self.status = ContactStatus.objects.create(name="new")
+        self.john = Contact.objects.create(
+            first_name="John", last_name="Doe", phone_number="+48123456789",
+            email="john.doe@example.com", city="Warsaw", status=self.status
+        )
+        self.jane = Contact.objects.create(
+            first_name="Jane", last_name="Smith", phone_number="+48987654321",
+            email="jane.smith@example.com", city="Krakow", status=self.status
+        )
+    
+    def test_bulk_api_reports_each_outcome(self):
+        """Test inserted, updated, unchanged and rejected rows are counted."""
+        rows = [
+            # Unchanged: same data as John
+            {"first_name": "John", "last_name": "Doe", "phone_number": "+48123456789",
+             "email": "john.doe@example.com", "city": "Warsaw", "status": "new"},
+            # Updated: Jane matched by phone, moves city and status
+            {"first_name": "Jane", "last_name": "Smith", "phone_number": "+48987654321",
+             "email": "JANE.SMITH@example.com", "city": "Gdansk", "status": "lost"},
+            # Inserted
+            {"first_name": "Adam", "last_name": "Nowak", "phone_number": "+48500100200",
+             "email": "adam.nowak@example.com", "city": "Lodz", "status": "new"},
+            # Rejected: John's email with Jane's phone
+            {"first_name": "Mix", "last_name": "Up", "phone_number": "+48987654321",
+             "email": "john.doe@example.com", "city": "Lodz", "status": "new"},
+            # Rejected: invalid email
+            {"first_name": "Bad", "last_name": "Row", "phone_number": "+48500100300",
+             "email": "not-an-email", "city": "Lodz", "status": "new"},
+        ]
+        
+        response = self.client.post(reverse('contact-bulk'), rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {k: response.data[k] for k in ('inserted', 'updated', 'unchanged', 'rejected')},
+            {'inserted': 1, 'updated': 1, 'unchanged': 1, 'rejected': 2}
+        )
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4])
+        self.jane.refresh_from_db()
+        self.assertEqual(self.jane.city, "Gdansk")
+        self.assertEqual(self.jane.status.name, "lost")
+        self.assertGreater(self.jane.updated_at, self.jane.created_at)
+        self.assertTrue(Contact.objects.filter(email="adam.nowak@example.com").exists())
+    
+    def test_bulk_api_query_count_does_not_grow_with_rows(self):
+        """Test a batch is written with a fixed number of queries."""
+        rows = [
+            {"first_name": "Anna", "last_name": "Nowak", "phone_number": f"+48600000{i:03d}",
+             "email": f"anna{i}@example.com", "city": "Lodz", "status": "new"}
+            for i in range(50)
+        ]
+        rows.append({**rows[0], "first_name": "John", "last_name": "Doe",
+                     "phone_number": "+48123456789", "email": "john.doe@example.com",
+                     "city": "Poznan"})
+        
+        # statuses, existing contacts, INSERT, UPDATE, plus one counter
+        # update per distinct stat key (and savepoints) - none of it per row
+        with self.assertNumQueries(23):
+            response = self.client.post(reverse('contact-bulk'), rows, format='json')
+        
+        self.assertEqual(response.data['inserted'], 50)
+        self.assertEqual(response.data['updated'], 1)
+    
+    def test_bulk_api_rejects_non_list(self):
+        """Test the bulk endpoint expects a list."""
+        response = self.client.post(reverse('contact-bulk'), {"email": "x@example.com"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_csv_upsert_mode(self):
+        """Test re-importing an export updates rows instead of failing them."""
+        import io
+        
+        upload = io.BytesIO(
+            b"first_name,last_name,phone_number,email,city,status\n"
+            b"John,Doe,+48123456789,john.doe@example.com,Sopot,new\n"
+            b"Jane,Smith,+48987654321,jane.smith@example.com,Krakow,new\n"
+            b"Adam,Nowak,+48500100200,adam.nowak@example.com,Lodz,new\n"
+            b"Adam,Nowak,+48500100201,adam.nowak@example.com,Lodz,new\n"
+        )
+        upload.name = 'contacts.csv'
+        
+        response = self.client.post(reverse('import_csv'), {'csv_file': upload, 'mode': 'upsert'}, follow=True)
+        
+        texts = [str(m) for m in response.context['messages']]
+        self.assertIn('1 inserted, 1 updated, 1 unchanged, 1 rejected', texts[0])
+        self.assertIn('Row 5: Duplicate of row 4', texts[1])
+        self.john.refresh_from_db()
+        self.assertEqual(self.john.city, "Sopot")
+        self.assertEqual(Contact.objects.count(), 3)
+
+
+class NormalizedKeysTest(APITestCase):
+    """Test normalized phone/email keys and duplicate detection."""
+    
+    def setUp(self):
+        """Create a status and one contact."""
+        self.status = ContactStatus.objects.create(name="new")
+        self.contact = Contact.objects.create(
+            first_name="John", last_name="Doe", phone_number="+48 123-456-789",
+            email="John.Doe@Example.com", city="Warsaw", status=self.status
+        )
+    
+    def test_keys_are_normalized_on_save(self):
+        """Test formatting variants of a number map to one E.164 key."""
+        from .normalization import normalize_phone
+        
+        self.assertEqual(self.contact.phone_e164, "+48123456789")
+        self.assertEqual(self.contact.email_normalized, "john.doe@example.com")
+        for variant in ("+48123456789", "0048 123 456 789", "123 456 789", "(12) 345-67-89"):
+            self.assertEqual(normalize_phone(variant), "+48123456789")
+    
+    def test_longest_local_number_fits_the_key(self):
+        """Test a 20-digit local number keeps its country code within phone_e164."""
+        from .models import ArchivedContact
+        
+        contact = Contact.objects.create(
+            first_name="Long", last_name="Number", phone_number="98765432109876543210",
+            email="long@example.com", city="Warsaw", status=self.status
+        )
+        
+        self.assertEqual(contact.phone_e164, "+4898765432109876543210")
+        contact.full_clean()
+        self.assertLessEqual(len(contact.phone_e164), ArchivedContact._meta.get_field('phone_e164').max_length)
+    
+    def test_formatting_variants_are_duplicates(self):
+        """Test uniqueness is enforced on the normalized keys."""
+        with self.assertRaises(IntegrityError):
+            Contact.objects.create(
+                first_name="Jane", last_name="Doe", phone_number="123456789",
+                email="jane@example.com", city="Warsaw", status=self.status
+            )
+    
+    def test_api_reports_normalized_duplicates(self):
+        """Test the API rejects an email that differs only in case."""
+        response = self.client.post(reverse('contact-list'), {
+            "first_name": "Jane", "last_name": "Doe", "phone_number": "+48 987 654 321",
+            "email": "JOHN.DOE@example.com", "city": "Warsaw", "status": self.status.id
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+        self.assertNotIn('phone_number', response.data)
+    
+    def test_search_by_phone_uses_normalized_key(self):
+        """Test searching a differently formatted number finds the contact."""
+        response = self.client.get(reverse('contact_list'), {'search': '123 456 789'})
+        self.assertEqual(list(response.context['contacts']), [self.contact])
+        
+        response = self.client.get(reverse('contact_list'), {'search': '456-78'})
+        self.assertEqual(list(response.context['contacts']), [self.contact])
+    
+    def test_search_finds_foreign_numbers_without_prefix(self):
+        """Test a non-Polish number is found when searched without its "+"."""
+        foreign = Contact.objects.create(
+            first_name="Sam", last_name="Smith", phone_number="+1 212 555 0100",
+            email="sam@example.com", city="New York", status=self.status
+        )
+        named = Contact.objects.create(
+            first_name="Ann", last_name="Lee", phone_number="+48 700 800 900",
+            email="room2125550100@example.com", city="Lodz", status=self.status
+        )
+        
+        for query in ("212 555 0100", "12125550100", "+1 212 555 0100", "001 212 555 0100"):
+            response = self.client.get(reverse('contact_list'), {'search': query})
+            self.assertIn(foreign, list(response.context['contacts']), query)
+        response = self.client.get(reverse('contact_list'), {'search': '2125550100'})
+        self.assertEqual(set(response.context['contacts']), {foreign, named})
+    
+    def test_search_with_digits_in_names_or_emails_skips_phones(self):
+        """Test email and name searches with digits do not match by phone number."""
+        lost = ContactStatus.objects.create(name="lost")
+        mailbox = Contact.objects.create(
+            first_name="Ula", last_name="Lis", phone_number="+48 500 600 700",
+            email="user1@example.com", city="Opole", status=self.status
+        )
+        named = Contact.objects.create(
+            first_name="Ewa", last_name="Nowak2", phone_number="+48 555 666 777",
+            email="ewa@example.com", city="Opole", status=self.status
+        )
+        
+        for query, expected in [("user1@example.com", mailbox), ("user1", mailbox), ("Nowak2", named)]:
+            response = self.client.get(reverse('contact_list'), {'search': query})
+            self.assertEqual(list(response.context['contacts']), [expected], query)
+        response = self.client.get(reverse('contact_list'), {'search': '2'})
+        self.assertEqual(list(response.context['contacts']), [named])
+        
+        response = self.client.post(reverse('contact-transition'), {
+            'filter': {'search': 'user1@example.com'}, 'to': 'lost', 'dry_run': True,
+        }, format='json')
+        self.assertEqual(response.data['count'], 1)
+        
+        self.client.post(reverse('contact_bulk_action'), {
+            'action': 'set_status', 'all_matching': '1', 'search': 'Nowak2', 'status': lost.pk,
+        })
+        self.assertEqual(list(Contact.objects.filter(status=lost)), [named])
+    
+    def test_find_duplicates_clusters_by_blocking_keys(self):
+        """Test contacts sharing a mailbox or national number are clustered."""
+        import io
+        import json
+        from django.core.management import call_command
+        
+        mailbox = Contact.objects.create(
+            first_name="Jan", last_name="Doe", phone_number="+48 500 600 700",
+            email="johndoe+crm@example.com", city="Warsaw", status=self.status
+        )
+        foreign = Contact.objects.create(
+            first_name="J", last_name="Doe", phone_number="+49 500 600 700",
+            email="jd@example.org", city="Berlin", status=self.status
+        )
+        Contact.objects.create(
+            first_name="Other", last_name="Person", phone_number="+48 111 222 333",
+            email="other@example.com", city="Lodz", status=self.status
+        )
+        
+        out = io.StringIO()
+        call_command('find_duplicates', '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        
+        self.assertEqual(report['contacts_scanned'], 4)
+        self.assertEqual(report['clusters'], 1)
+        self.assertEqual(report['results'][0]['ids'], sorted([self.contact.pk, mailbox.pk, foreign.pk]))
+        self.assertEqual(report['results'][0]['matched_on'], ['email', 'phone'])
+
+
+@override_settings(CONTACTS_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTest(APITestCase):
+    """Test the incremental change feed."""
+    
+    def setUp(self):
+        """Create a status and three contacts."""
+        self.status = ContactStatus.objects.create(name="new")
+        self.contacts = [
+            Contact.objects.create(
+                first_name="Anna", last_name=f"Nowak{'x' * i}", phone_number=f"+48500000{i:03d}",
+                email=f"anna{i}@example.com", city="Lodz", status=self.status
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('contact-changes')
+    
+    def sync(self, cursor=None, limit=2):
+        """Follow next_cursor until the feed is drained."""
+        upserted, deleted = [], []
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['since'] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            upserted += [c['id'] for c in response.data['upserted']]
+            deleted += [d['id'] for d in response.data['deleted']]
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                return upserted, deleted, cursor
+    
+    def test_initial_sync_pages_through_everything(self):
+        """Test a client without a cursor receives every contact once."""
+        upserted, deleted, cursor = self.sync()
+        
+        self.assertEqual(upserted, [c.pk for c in self.contacts])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync(cursor), ([], [], cursor))
+    
+    def test_updates_and_deletes_after_cursor(self):
+        """Test only changes since the cursor are returned, including deletions."""
+        from .importers import upsert_contacts
+        
+        _, _, cursor = self.sync()
+        deleted_pk = self.contacts[0].pk
+        self.client.delete(reverse('contact-detail', kwargs={'pk': deleted_pk}))
+        # bulk_update gives both rows the same updated_at; paging must split them correctly
+        upsert_contacts([
+            {"first_name": "Anna", "last_name": "Changed", "phone_number": c.phone_number,
+             "email": c.email, "city": "Lodz", "status": "new"}
+            for c in self.contacts[1:]
+        ])
+        
+        upserted, deleted, _ = self.sync(cursor, limit=1)
+        
+        self.assertEqual(sorted(upserted), [c.pk for c in self.contacts[1:]])
+        self.assertEqual(deleted, [deleted_pk])
+    
+    def test_recent_changes_are_held_back(self):
+        """Test changes inside the settle window are not returned yet."""
+        with self.settings(CONTACTS_CHANGES_SETTLE_SECONDS=60):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['upserted'], [])
+        self.assertIsNone(response.data['next_cursor'])
+    
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ContactStatsTest(APITestCase):
+    """Test the incrementally maintained contact counts."""
+    
+    def setUp(self):
+        """Create statuses and a few contacts through different write paths."""
+        self.new = ContactStatus.objects.create(name="new")
+        self.lost = ContactStatus.objects.create(name="lost")
+        self.contacts = [
+            Contact.objects.create(
+                first_name="Anna", last_name="Nowak", phone_number=f"+48500000{i:03d}",
+                email=f"anna{i}@example.com", city="Lodz" if i % 2 else "Warsaw", status=self.new
+            )
+            for i in range(4)
+        ]
+    
+    def assertStatsConsistent(self):
+        """The summary table matches a full GROUP BY over contacts."""
+        from .models import ContactStat
+        from .stats import grouped_counts
+        
+        stored = {
+            (dimension, key): count
+            for dimension, key, count in ContactStat.objects.filter(count__gt=0).values_list('dimension', 'key', 'count')
+        }
+        self.assertEqual(stored, dict(grouped_counts(Contact.objects.all())))
+        self.assertFalse(ContactStat.objects.filter(count__lt=0).exists())
+    
+    def test_counts_follow_every_write_path(self):
+        """Test save, delete, bulk_create, bulk_update and update keep counts exact."""
+        from .importers import upsert_contacts
+        
+        self.assertStatsConsistent()
+        
+        contact = self.contacts[0]
+        contact.city = "Gdansk"
+        contact.save()
+        self.contacts[1].delete()
+        self.assertStatsConsistent()
+        
+        upsert_contacts([
+            {"first_name": "Anna", "last_name": "Nowak", "phone_number": "+48500000002",
+             "email": "anna2@example.com", "city": "Sopot", "status": "lost"},
+            {"first_name": "Jan", "last_name": "Kowalski", "phone_number": "+48600000001",
+             "email": "jan@example.com", "city": "Sopot", "status": "new"},
+        ])
+        self.assertStatsConsistent()
+        
+        Contact.objects.filter(city="Sopot").update(status=self.lost)
+        Contact.objects.filter(pk=self.contacts[3].pk).update(city="Gdansk")
+        Contact.objects.filter(city="Gdansk").delete()
+        self.assertStatsConsistent()
+    
+    def test_conflicting_upsert_keeps_stored_day(self):
+        """Test an upsert that overwrites a row counts it under the day it keeps."""
+        from datetime import datetime, timezone as dt_timezone
+        from .importers import UPSERT_FIELDS
+        
+        Contact.objects.filter(pk=self.contacts[0].pk).update(date_added=datetime(2023, 5, 1, tzinfo=dt_timezone.utc))
+        Contact.objects.filter(pk=self.contacts[0].pk).update(city="Lodz")  # Counters follow the old day
+        self.assertStatsConsistent()
+        
+        # As the importer does when another writer inserted the email first
+        Contact.objects.bulk_create(
+            [Contact(first_name="Anna", last_name="Nowak", phone_number="+48500000000",
+                     email="ANNA0@example.com", city="Sopot", status=self.lost)],
+            update_conflicts=True,
+            unique_fields=['email_normalized'],
+            update_fields=[f for f in UPSERT_FIELDS if f != 'email'] + ['updated_at'],
+        )
+        
+        self.assertEqual(Contact.objects.get(pk=self.contacts[0].pk).date_added.year, 2023)
+        self.assertStatsConsistent()
+    
+    def test_stats_endpoint(self):
+        """Test the endpoint reads counts from the summary table."""
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('contact-stats'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['by_status'], {'new': 4})
+        self.assertEqual(response.data['by_city'], {'Lodz': 2, 'Warsaw': 2})
+        self.assertEqual(sum(response.data['by_day'].values()), 4)
+    
+    def test_rebuild_command_repairs_drift(self):
+        """Test the rebuild command fixes counters changed behind its back."""
+        import io
+        from django.core.management import call_command
+        from .models import ContactStat
+        
+        ContactStat.objects.filter(dimension='city', key='Lodz').update(count=99)
+        out = io.StringIO()
+        call_command('rebuild_contact_stats', stdout=out)
+        
+        self.assertIn('Corrected 1 drifted counters', out.getvalue())
+        self.assertStatsConsistent()
+
+
+class ContactFilterTest(APITestCase):
+    """Test API list filters and the indexes behind them."""
+    
+    COMBINATIONS = [
+        {},
+        {'status': 'new'},
+        {'city': 'Lodz'},
+        {'status': 'new', 'city': 'Lodz'},
+        {'date_added_after': '2024-01-01', 'date_added_before': '2024-02-01'},
+        {'status': 'new', 'date_added_after': '2024-01-01'},
+        {'city': 'Lodz', 'date_added_before': '2024-02-01T12:00:00'},
+        {'status': 'new', 'city': 'Lodz', 'date_added_after': '2024-01-01', 'ordering': 'date_added'},
+        {'city': 'Lodz', 'ordering': 'last_name'},
+        {'city': 'Lodz', 'ordering': '-last_name'},
+        {'status': 'new', 'ordering': 'last_name'},
+        {'status': 'new', 'ordering': '-last_name'},
+        {'status': 'new', 'date_added_after': '2024-01-01', 'ordering': 'last_name'},
+        {'date_added_after': '2024-01-01', 'ordering': 'last_name'},
+        {'date_added_after': '2024-01-01', 'date_added_before': '2024-02-01', 'ordering': '-last_name'},
+        {'status': 'new', 'city': 'Lodz', 'ordering': 'last_name'},
+    ]
+    
+    def setUp(self):
+        """Create contacts across statuses, cities and dates."""
+        from datetime import datetime, timezone as dt_timezone
+        
+        self.new = ContactStatus.objects.create(name="new")
+        self.lost = ContactStatus.objects.create(name="lost")
+        for i, (city, status_obj, month) in enumerate([
+            ("Lodz", self.new, 1), ("Lodz", self.lost, 1), ("Warsaw", self.new, 1),
+            ("Lodz", self.new, 3), ("Warsaw", self.lost, 3),
+        ]):
+            Contact.objects.create(
+                first_name="Anna", last_name=f"Nowak{'x' * i}", phone_number=f"+48500000{i:03d}",
+                email=f"anna{i}@example.com", city=city, status=status_obj,
+                date_added=datetime(2024, month, 10, tzinfo=dt_timezone.utc)
+            )
+    
+    def test_filters_combine(self):
+        """Test status, city and date range filters narrow the list together."""
+        url = reverse('contact-list')
+        
+        def ids(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [row['last_name'] for row in response.data['results']]
+        
+        self.assertEqual(ids({'status': 'new', 'city': 'Lodz'}), ['Nowakxxx', 'Nowak'])
+        self.assertEqual(ids({'status': f'{self.lost.pk}'}), ['Nowakxxxx', 'Nowakx'])
+        self.assertEqual(ids({'city': 'Warsaw,Lodz', 'date_added_before': '2024-02-01'}), ['Nowakxx', 'Nowakx', 'Nowak'])
+        self.assertEqual(ids({'date_added_after': '2024-03-01', 'ordering': 'last_name'}), ['Nowakxxx', 'Nowakxxxx'])
+        for value in ['soon', '2024-02-30', '2024-02-30T10:00']:
+            self.assertEqual(self.client.get(url, {'date_added_after': value}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'ordering': 'email'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_every_combination_uses_an_index(self):
+        """Test EXPLAIN shows an index search without a sort step for each combination."""
+        from django.db import connection
+        from .filters import filter_contacts
+        
+        for params in self.COMBINATIONS:
+            with self.subTest(params=params):
+                queryset = filter_contacts(Contact.objects.select_related('status'), params)[:100]
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                    plan = queryset.explain()
+                    self.assertIn('Index', plan)
+                    self.assertNotIn('Seq Scan on contacts_contact', plan)
+                else:
+                    plan = queryset.explain()
+                    contact_steps = [line for line in plan.splitlines() if 'contacts_contact ' in line]
+                    self.assertTrue(contact_steps, plan)
+                    self.assertTrue(all('USING' in line and 'INDEX' in line for line in contact_steps), plan)
+                    # Rows come out of the index in order: no separate sort step
+                    self.assertNotIn('USE TEMP B-TREE', plan)
+
+
+class SuggestTest(APITestCase):
+    """Test the typeahead endpoint and its prefix indexes."""
+    
+    def setUp(self):
+        """Create contacts with Polish names and cities."""
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.status_obj = ContactStatus.objects.create(name="new")
+        for i, (first, last, city) in enumerate([
+            ("Łukasz", "Łącki", "Łódź"),
+            ("Anna", "Kowalska", "Kraków"),
+            ("Jan", "Kowalski", "Kraków"),
+            ("Kornelia", "Nowak", "Kołobrzeg"),
+        ]):
+            Contact.objects.create(
+                first_name=first, last_name=last, phone_number=f"+48600000{i:03d}",
+                email=f"{first.lower()}.{i}@example.com", city=city, status=self.status_obj
+            )
+        self.url = reverse('contact-suggest')
+    
+    def test_prefix_matches_ignore_case_and_accents(self):
+        """Test names, emails and cities match a folded prefix."""
+        response = self.client.get(self.url, {'q': 'KOW'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(c['last_name'], c['matched']) for c in response.data['contacts']],
+            [('Kowalska', 'last_name'), ('Kowalski', 'last_name')]
+        )
+        
+        response = self.client.get(self.url, {'q': 'lo'})
+        self.assertEqual(response.data['cities'], [{'city': 'Łódź', 'count': 1}])
+        
+        response = self.client.get(self.url, {'q': 'k', 'limit': 2})
+        self.assertEqual([c['last_name'] for c in response.data['contacts']], ['Kowalska', 'Kowalski'])
+        self.assertEqual(
+            response.data['cities'],
+            [{'city': 'Kraków', 'count': 2}, {'city': 'Kołobrzeg', 'count': 1}]
+        )
+        
+        response = self.client.get(self.url, {'q': 'kornelia.3@'})
+        self.assertEqual([(c['last_name'], c['matched']) for c in response.data['contacts']], [('Nowak', 'email')])
+        
+        self.assertEqual(self.client.get(self.url, {'q': ' '}).data['contacts'], [])
+        self.assertEqual(self.client.get(self.url, {'q': 'a', 'limit': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_results_cached_until_a_write(self):
+        """Test repeated prefixes skip the database and writes invalidate them."""
+        from .suggest import suggest
+        
+        self.assertEqual(suggest('zi')['contacts'], [])
+        with self.assertNumQueries(0):
+            suggest('zi')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.create(
+                first_name="Ewa", last_name="Zielińska", phone_number="+48600000999",
+                email="ewa@example.com", city="Łódź", status=self.status_obj
+            )
+        self.assertEqual([c['last_name'] for c in suggest('zi')['contacts']], ['Zielińska'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.filter(last_name="Zielińska").update(last_name="Zając")
+        self.assertEqual(suggest('zi')['contacts'], [])
+        self.assertEqual([c['last_name'] for c in suggest('zaj')['contacts']], ['Zając'])
+    
+    def test_prefix_lookup_uses_index(self):
+        """Test name and email prefix lookups are index range scans without a sort."""
+        from django.db import connection
+        from .suggest import PREFIX_FIELDS, prefix_lookup
+        
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan shape checked on SQLite')
+        for field in PREFIX_FIELDS.values():
+            with self.subTest(field=field):
+                plan = Contact.objects.filter(prefix_lookup(field, 'ko')).order_by(field, 'id')[:10].explain()
+                self.assertIn('USING INDEX', plan)
+                self.assertIn(f'{field}>?', plan.replace(' ', ''))
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+class NameSortKeyTest(TestCase):
+    """Test Polish-alphabet name ordering through the stored sort keys."""
+    
+    NAMES = ["Żak", "Zając", "Łata", "Lis", "Ślusarz", "Sowa", "Ąbel", "Adamczyk"]
+    
+    def setUp(self):
+        """Create one contact per last name."""
+        self.status_obj = ContactStatus.objects.create(name="new")
+        Contact.objects.bulk_create([
+            Contact(
+                first_name="Anna", last_name=name, phone_number=f"+48700000{i:03d}",
+                email=f"sort{i}@example.com", city="Lodz", status=self.status_obj
+            )
+            for i, name in enumerate(self.NAMES)
+        ])
+    
+    def test_list_view_sorts_in_polish_order(self):
+        """Test ą, ł and ś sort after a, l and s instead of after z."""
+        expected = ["Adamczyk", "Ąbel", "Lis", "Łata", "Sowa", "Ślusarz", "Zając", "Żak"]
+        response = self.client.get(reverse('contact_list'), {'sort': 'last_name'})
+        self.assertEqual([c.last_name for c in response.context['contacts']], expected)
+        response = self.client.get(reverse('contact_list'), {'sort': '-last_name'})
+        self.assertEqual([c.last_name for c in response.context['contacts']], expected[::-1])
+        response = self.client.get(reverse('contact-list'), {'ordering': 'last_name'})
+        self.assertEqual([c['last_name'] for c in response.data['results']], expected)
+    
+    def test_keys_follow_every_write_path(self):
+        """Test save, bulk_update and update() keep the sort keys current."""
+        from .normalization import sort_key
+        
+        contact = Contact.objects.get(last_name="Lis")
+        contact.last_name = "Łoś"
+        contact.save(update_fields=['last_name'])
+        self.assertEqual(Contact.objects.get(pk=contact.pk).last_name_sort, sort_key("Łoś"))
+        
+        contact.first_name = "Ela"
+        Contact.objects.bulk_update([contact], ['first_name'])
+        self.assertEqual(Contact.objects.get(pk=contact.pk).first_name_sort, sort_key("Ela"))
+        
+        Contact.objects.filter(pk=contact.pk).update(first_name="Świętosława")
+        self.assertEqual(Contact.objects.get(pk=contact.pk).first_name_sort, sort_key("Świętosława"))
+    
+    def test_name_ordering_uses_index(self):
+        """Test name-ordered pages are index scans without a sort step."""
+        from django.db import connection
+        from .filters import order_by_fields
+        
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan shape checked on SQLite')
+        for ordering in ['last_name', '-last_name', 'first_name', '-first_name']:
+            with self.subTest(ordering=ordering):
+                plan = Contact.objects.order_by(*order_by_fields(ordering))[40:60].explain()
+                self.assertIn('USING INDEX', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+
+class NearbyTest(APITestCase):
+    """Test proximity queries over geocoded cities."""
+    
+    def setUp(self):
+        """Create contacts in cities around Kraków."""
+        from datetime import datetime, timezone as dt_timezone
+        from .models import CityLocation
+        
+        for name, lat, lon in [
+            ("Kraków", 50.0647, 19.9450),
+            ("Wieliczka", 49.9870, 20.0647),
+            ("Katowice", 50.2649, 19.0238),
+            ("Warszawa", 52.2297, 21.0122),
+        ]:
+            CityLocation.objects.create(name=name, latitude=lat, longitude=lon)
+        status_obj = ContactStatus.objects.create(name="new")
+        for i, city in enumerate(["Kraków", "Kraków", "Wieliczka", "Katowice", "Warszawa", "Nowhere"]):
+            Contact.objects.create(
+                first_name="Anna", last_name=f"Nowak{'x' * i}", phone_number=f"+48800000{i:03d}",
+                email=f"near{i}@example.com", city=city, status=status_obj,
+                date_added=datetime(2024, 1, i + 1, tzinfo=dt_timezone.utc)
+            )
+        self.url = reverse('contact-nearby')
+    
+    def test_contacts_within_radius(self):
+        """Test only cities inside the circle match, nearest first."""
+        response = self.client.get(self.url, {'lat': 50.0647, 'lon': 19.9450, 'radius_km': 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['city'] for c in response.data['cities']], ["Kraków", "Wieliczka"])
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([c['last_name'] for c in response.data['results']], ["Nowakx", "Nowak", "Nowakxx"])
+        self.assertEqual(response.data['results'][0]['distance_km'], 0)
+        
+        response = self.client.get(self.url, {'lat': 50.0647, 'lon': 19.9450, 'radius_km': 100, 'limit': 1})
+        self.assertEqual([c['city'] for c in response.data['cities']], ["Kraków", "Wieliczka", "Katowice"])
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(len(response.data['results']), 1)
+        
+        for params in [{'lat': 50}, {'lat': 91, 'lon': 0}, {'lat': 50, 'lon': 20, 'radius_km': 0}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_distance_and_bounding_box(self):
+        """Test haversine distances and boxes crossing the antimeridian or a pole."""
+        from .geo import bounding_box, haversine_km
+        
+        self.assertAlmostEqual(haversine_km(50.0647, 19.9450, 52.2297, 21.0122), 252, delta=2)
+        
+        min_lat, max_lat, lon_ranges = bounding_box(0, 179.9, 50)
+        self.assertEqual(len(lon_ranges), 2)
+        self.assertAlmostEqual(max_lat - min_lat, 0.9, delta=0.01)
+        self.assertEqual(bounding_box(89.9, 0, 50)[2], [(-180.0, 180.0)])
+    
+    def test_geocode_cities_command(self):
+        """Test cities without coordinates are geocoded and stored."""
+        import io
+        from unittest import mock
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from .models import CityLocation
+        
+        cache.clear()
+        upstream = mock.Mock(status_code=200)
+        upstream.json.return_value = [{'lat': '51.0', 'lon': '17.0'}]
+        with mock.patch('contacts.weather_views.requests.get', return_value=upstream) as get:
+            call_command('geocode_cities', delay=0, stdout=io.StringIO())
+        
+        self.assertEqual(get.call_count, 1)
+        location = CityLocation.objects.get(name="Nowhere")
+        self.assertEqual((location.latitude, location.longitude), (51.0, 17.0))
+
+
+class ArchiveTest(APITestCase):
+    """Test moving contacts between the main table and the archive."""
+    
+    def setUp(self):
+        """Create old and recent contacts in hot and cold statuses."""
+        from datetime import datetime, timezone as dt_timezone
+        
+        new = ContactStatus.objects.create(name="new")
+        lost = ContactStatus.objects.create(name="lost")
+        outdated = ContactStatus.objects.create(name="outdated")
+        old = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+        self.contacts = {}
+        for i, (last_name, status_obj, date_added) in enumerate([
+            ("Adamczyk", lost, old),
+            ("Łoś", outdated, old),
+            ("Nowak", lost, None),
+            ("Zając", new, old),
+        ]):
+            contact = Contact(
+                first_name="Anna", last_name=last_name, phone_number=f"+48900000{i:03d}",
+                email=f"arch{i}@example.com", city="Lodz", status=status_obj
+            )
+            if date_added:
+                contact.date_added = date_added
+            contact.save()
+            self.contacts[last_name] = contact
+    
+    def test_archive_and_restore_round_trip(self):
+        """Test old cold contacts move out and back with ids and counts intact."""
+        import io
+        from django.core.management import call_command
+        from . import stats
+        from .models import ArchivedContact, ContactTombstone
+        
+        call_command('archive_contacts', chunk_size=1, stdout=io.StringIO())
+        
+        archived_ids = {self.contacts["Adamczyk"].pk, self.contacts["Łoś"].pk}
+        self.assertEqual(set(ArchivedContact.objects.values_list('pk', flat=True)), archived_ids)
+        self.assertEqual(set(Contact.objects.values_list('last_name', flat=True)), {"Nowak", "Zając"})
+        self.assertEqual(set(ContactTombstone.objects.values_list('contact_id', flat=True)), archived_ids)
+        self.assertEqual(stats.rebuild(), 0)
+        
+        call_command('restore_contacts', all=True, stdout=io.StringIO())
+        
+        restored = Contact.objects.get(pk=self.contacts["Łoś"].pk)
+        self.assertEqual(restored.created_at, self.contacts["Łoś"].created_at)
+        self.assertEqual(restored.last_name_sort, self.contacts["Łoś"].last_name_sort)
+        self.assertFalse(ArchivedContact.objects.exists())
+        self.assertEqual(stats.rebuild(), 0)
+    
+    def test_archiving_a_chunk_costs_the_same_queries_for_any_size(self):
+        """Test a chunk is deleted with set-based statements and no per-row signals."""
+        from django.db import connection
+        from django.db.models.signals import post_delete
+        from django.test.utils import CaptureQueriesContext
+        from . import stats
+        from .archive import archive_queryset
+        
+        lost = self.contacts["Adamczyk"].status
+        for i in range(20):
+            Contact.objects.create(
+                first_name="Ola", last_name="Stara", phone_number=f"+48901000{i:03d}",
+                email=f"old{i}@example.com", city="Lodz", status=lost
+            )
+        deleted = []
+        post_delete.connect(lambda sender, **kwargs: deleted.append(kwargs['instance']), sender=Contact, weak=False,
+                            dispatch_uid='archive-test')
+        self.addCleanup(post_delete.disconnect, sender=Contact, dispatch_uid='archive-test')
+        
+        counts = []
+        for selection in [Contact.objects.filter(last_name="Adamczyk"), Contact.objects.filter(last_name="Stara")]:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(archive_queryset(selection, chunk_size=100).chunks, 1)
+            counts.append(len(queries.captured_queries))
+        
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(deleted, [])
+        self.assertEqual(stats.rebuild(), 0)
+    
+    def test_restore_skips_taken_email(self):
+        """Test a contact whose email was reused meanwhile stays archived."""
+        from datetime import datetime, timezone as dt_timezone
+        from .archive import archive_contacts, restore_contacts
+        from .models import ArchivedContact
+        
+        archive_contacts(["lost"], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        Contact.objects.create(
+            first_name="Ewa", last_name="Nowa", phone_number="+48900000999",
+            email="ARCH0@example.com", city="Lodz", status=self.contacts["Zając"].status
+        )
+        
+        result = restore_contacts(ArchivedContact.objects.all())
+        self.assertEqual(result.skipped, [(self.contacts["Adamczyk"].pk, 'email')])
+        self.assertTrue(ArchivedContact.objects.filter(pk=self.contacts["Adamczyk"].pk).exists())
+    
+    def test_include_archived_listings(self):
+        """Test ?include_archived=1 merges both tables in the requested order."""
+        from datetime import datetime, timezone as dt_timezone
+        from .archive import archive_contacts
+        
+        archive_contacts(["lost", "outdated"], datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        url = reverse('contact-list')
+        
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get(url, {'include_archived': '1', 'ordering': 'last_name'})
+        self.assertEqual(
+            [(row['last_name'], row['archived']) for row in response.data['results']],
+            [("Adamczyk", True), ("Łoś", True), ("Nowak", False), ("Zając", False)]
+        )
+        response = self.client.get(url, {'include_archived': '1', 'status': 'outdated'})
+        self.assertEqual([row['last_name'] for row in response.data['results']], ["Łoś"])
+        
+        response = self.client.get(reverse('contact_list'), {'include_archived': '1', 'search': 'oś'})
+        self.assertEqual([c.last_name for c in response.context['contacts']], ["Łoś"])
+        self.assertContains(response, 'Archived')
+
+
+class BulkActionTest(TestCase):
+    """Test the set-based bulk actions of the list page and the admin."""
+    
+    def setUp(self):
+        """Create contacts in two cities and a staff user."""
+        from django.contrib.auth.models import User
+        
+        self.new = ContactStatus.objects.create(name="new")
+        self.lost = ContactStatus.objects.create(name="lost")
+        self.contacts = [
+            Contact.objects.create(
+                first_name="Jan", last_name=f"Bulk{chr(65 + i)}", phone_number=f"+48910000{i:03d}",
+                email=f"bulk{i}@example.com", city="Kraków" if i % 2 else "Gdańsk", status=self.new
+            )
+            for i in range(5)
+        ]
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    
+    def test_set_status_in_chunks(self):
+        """Test set_status updates every chunk and keeps the counters and feed in step."""
+        from . import stats
+        from .bulk import set_status
+        
+        before = {c.pk: c.updated_at for c in self.contacts}
+        selection = Contact.objects.filter(city="Kraków") | Contact.objects.filter(last_name="BulkA")
+        updated = set_status(selection, self.lost, chunk_size=2)
+        
+        self.assertEqual(updated, 3)
+        changed = Contact.objects.filter(status=self.lost)
+        self.assertEqual(set(changed.values_list('last_name', flat=True)), {"BulkA", "BulkB", "BulkD"})
+        self.assertTrue(all(c.updated_at > before[c.pk] for c in changed))
+        self.assertEqual(stats.rebuild(), 0)
+    
+    def test_list_page_bulk_actions(self):
+        """Test the list page toolbar sets status, archives and exports checked contacts."""
+        from .models import ArchivedContact
+        
+        url = reverse('contact_bulk_action')
+        ids = [self.contacts[0].pk, self.contacts[1].pk]
+        
+        response = self.client.post(url, {
+            'action': 'set_status', 'ids': ids, 'status': self.lost.pk, 'next': '/?sort=last_name',
+        })
+        self.assertRedirects(response, '/?sort=last_name', fetch_redirect_response=False)
+        self.assertEqual(Contact.objects.filter(status=self.lost).count(), 2)
+        
+        response = self.client.post(url, {'action': 'export', 'all_matching': '1', 'search': 'Kraków'})
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'first_name,last_name,phone_number,email,city,status')
+        self.assertEqual(len(lines), 3)
+        
+        response = self.client.post(url, {'action': 'archive', 'ids': ids, 'next': 'https://evil.example/'})
+        self.assertRedirects(response, reverse('contact_list'), fetch_redirect_response=False)
+        self.assertEqual(set(ArchivedContact.objects.values_list('pk', flat=True)), set(ids))
+        
+        response = self.client.post(url, {'action': 'set_status', 'ids': [self.contacts[2].pk]})
+        self.assertEqual(Contact.objects.get(pk=self.contacts[2].pk).status, self.new)
+    
+    def test_admin_changelist_and_actions(self):
+        """Test the changelist skips COUNT(*) and DISTINCT city scans and runs status actions."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:contacts_contact_changelist')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Kraków (2)')
+        contact_table = Contact._meta.db_table
+        self.assertFalse([
+            q['sql'] for q in queries.captured_queries
+            if f'FROM "{contact_table}"' in q['sql'] and ('COUNT(' in q['sql'] or 'DISTINCT' in q['sql'])
+        ])
+        
+        response = self.client.post(url, {
+            'action': f'set_status_{self.lost.pk}',
+            '_selected_action': [self.contacts[3].pk, self.contacts[4].pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(Contact.objects.filter(status=self.lost).values_list('pk', flat=True)),
+            {self.contacts[3].pk, self.contacts[4].pk}
+        )
+
+
+class StatusTransitionTest(APITestCase):
+    """Test moving all contacts matching a filter to another status."""
+    
+    def setUp(self):
+        """Create old and recent new contacts."""
+        from datetime import datetime, timezone as dt_timezone
+        
+        self.new = ContactStatus.objects.create(name="new")
+        self.outdated = ContactStatus.objects.create(name="outdated")
+        old = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+        for i, (city, date_added) in enumerate([("Lodz", old), ("Lodz", old), ("Lodz", None), ("Opole", old)]):
+            contact = Contact(
+                first_name="Ola", last_name=f"Trans{chr(65 + i)}", phone_number=f"+48920000{i:03d}",
+                email=f"trans{i}@example.com", city=city, status=self.new
+            )
+            if date_added:
+                contact.date_added = date_added
+            contact.save()
+        self.url = reverse('contact-transition')
+    
+    def test_dry_run_then_transition(self):
+        """Test a dry run only counts and the real run moves contacts in one UPDATE."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from . import stats
+        
+        body = {
+            'filter': {'status': 'new', 'date_added_before': '2024-01-01', 'search': 'lodz'},
+            'to': 'outdated',
+            'dry_run': True,
+        }
+        response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.data, {'count': 2, 'to': 'outdated', 'dry_run': True})
+        self.assertFalse(Contact.objects.filter(status=self.outdated).exists())
+        
+        body['dry_run'] = False
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.data['count'], 2)
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "contacts_contact"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(Contact.objects.filter(status=self.outdated).values_list('last_name', flat=True)),
+            {"TransA", "TransB"}
+        )
+        self.assertEqual(stats.rebuild(), 0)
+        
+        # Contacts already in the target status are not matched again
+        response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_rejects_missing_or_unknown_filters(self):
+        """Test an empty, blank or mistyped filter never updates every contact."""
+        for body in [
+            {'filter': {}, 'to': 'outdated'},
+            {'filter': {'stauts': 'new'}, 'to': 'outdated'},
+            {'filter': {'city': ''}, 'to': 'outdated'},
+            {'filter': {'status': '  '}, 'to': 'outdated'},
+            {'filter': {'city': ' , '}, 'to': 'outdated'},
+            {'filter': {'date_added_before': '2024-02-30'}, 'to': 'outdated'},
+            {'filter': {'search': None, 'status': 'new'}, 'to': 'outdated'},
+            {'filter': {'status': 'new'}, 'to': 'missing'},
+        ]:
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Contact.objects.filter(status=self.outdated).exists())
+
+
+class ContactCardCacheTest(TestCase):
+    """Test the cached contact card fragments of the list page."""
+    
+    def setUp(self):
+        """Create a contact and start from an empty cache."""
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.status = ContactStatus.objects.create(name="new")
+        self.contact = Contact.objects.create(
+            first_name="Jan", last_name="Karta", phone_number="+48930000001",
+            email="card@example.com", city="Lodz", status=self.status
+        )
+    
+    def test_cards_cached_until_contact_or_status_changes(self):
+        """Test unchanged cards come from the cache and edits show up at once."""
+        from django.db import connection
+        
+        url = reverse('contact_list')
+        self.assertContains(self.client.get(url), "Jan Karta")
+        
+        # A write that bypasses the ORM leaves updated_at alone: the cached card is served
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {Contact._meta.db_table} SET first_name = %s', ["Raw"])
+        self.assertContains(self.client.get(url), "Jan Karta")
+        
+        Contact.objects.filter(pk=self.contact.pk).update(last_name="Kartka")
+        self.assertContains(self.client.get(url), "Raw Kartka")
+        
+        self.status.name = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.save()
+        self.assertContains(self.client.get(url), "renamed")
+    
+    @override_settings(CONTACTS_CARD_CACHE_SECONDS=0)
+    def test_fragment_caching_can_be_turned_off(self):
+        """Test cards are rendered on every request when caching is off."""
+        from django.db import connection
+        
+        url = reverse('contact_list')
+        self.client.get(url)
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {Contact._meta.db_table} SET first_name = %s', ["Raw"])
+        self.assertContains(self.client.get(url), "Raw Karta")
+
+
+class CompressionTest(APITestCase):
+    """Test hashed, precompressed static files and compressed API responses."""
+    
+    def test_api_page_is_gzipped(self):
+        """Test a 100-row API page is gzipped when the client accepts it."""
+        import gzip
+        
+        status_obj = ContactStatus.objects.create(name="new")
+        Contact.objects.bulk_create([
+            Contact(
+                first_name="Anna", last_name=f"Gzip{i}", phone_number=f"+48940000{i:03d}",
+                email=f"gzip{i}@example.com", city="Lodz", status=status_obj
+            )
+            for i in range(100)
+        ])
+        url = reverse('contact-list')
+        
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(len(plain.data['results']), 100)
+        
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content) / 5)
+    
+    def test_small_responses_are_not_compressed(self):
+        """Test responses below CONTACTS_COMPRESS_MIN_BYTES go out as they are."""
+        response = self.client.get(reverse('contact-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+    
+    def test_collected_static_files_are_hashed_and_precompressed(self):
+        """Test collectstatic output is served compressed with far-future caching."""
+        import gzip
+        import io
+        import tempfile
+        from pathlib import Path
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        from django.core.management import call_command
+        
+        # Only the project's own files; admin and DRF assets make it slow
+        finders = ['django.contrib.staticfiles.finders.FileSystemFinder']
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root, STATICFILES_FINDERS=finders):
+            call_command('collectstatic', interactive=False, stdout=io.StringIO())
+            url = staticfiles_storage.url('js/script.js')
+            self.assertRegex(url, r'^/static/js/script\.[0-9a-f]{12}\.js$')
+            source = (Path(root) / 'js' / 'script.js').read_bytes()
+            
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertTrue(response['Content-Type'].startswith('text/javascript'))
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), source)
+            
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+            if (Path(root) / 'js' / 'script.js.br').exists():
+                self.assertEqual(response['Content-Encoding'], 'br')
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(b''.join(response.streaming_content), source)
+            
+            response = self.client.get('/static/js/script.js')
+            self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+            self.assertContains(self.client.get(reverse('contact_list')), url)
+
+
+class WeatherStoreTest(TestCase):
+    """Test the local weather observation store and its retention."""
+    
+    def setUp(self):
+        """Start from an empty cache with one geocoded city."""
+        from django.core.cache import cache
+        from .models import CityLocation
+        
+        cache.clear()
+        self.location = CityLocation.objects.create(name="Gdańsk", latitude=54.35, longitude=18.65)
+    
+    def test_weather_is_stored_and_read_back(self):
+        """Test a lookup stores the observation and the next one skips Open-Meteo."""
+        from unittest import mock
+        from django.core.cache import cache
+        from .models import WeatherObservation
+        
+        upstream = mock.Mock(status_code=200)
+        upstream.json.return_value = {
+            'current_weather': {'temperature': 7.5, 'windspeed': 20.0, 'weathercode': 61},
+            'hourly': {'relativehumidity_2m': [88]},
+        }
+        url = reverse('get_weather', kwargs={'city': "Gdańsk"})
+        with mock.patch('contacts.weather_views.requests.get', return_value=upstream) as get:
+            self.client.get(url)
+            cache.clear()
+            response = self.client.get(url)
+        
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(response.json()['weather']['temperature'], 7.5)
+        observation = WeatherObservation.objects.get()
+        self.assertEqual((observation.humidity, observation.weather_code), (88, 61))
+        
+        response = self.client.get(reverse('get_weather_history', kwargs={'city': "Gdańsk"}))
+        self.assertEqual([o['temperature'] for o in response.json()['observations']], [7.5])
+        self.assertEqual(self.client.get(reverse('get_weather_history', kwargs={'city': "Nowhere"})).status_code, 404)
+        for day in ['May 1st', '2024-02-30']:
+            response = self.client.get(reverse('get_weather_history', kwargs={'city': "Gdańsk"}), {'date': day})
+            self.assertEqual(response.status_code, 400)
+    
+    def test_prune_downsamples_and_expires(self):
+        """Test old observations fold into weighted hourly/daily averages and expire."""
+        import io
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from .models import WeatherObservation
+        from .weather_store import DAILY, HOURLY, RAW, bucket_start
+        
+        now = timezone.now()
+        hour = bucket_start(now - timedelta(days=5), HOURLY)
+        day = bucket_start(now - timedelta(days=40), DAILY)
+        rows = [
+            WeatherObservation(
+                location=self.location, bucket=hour + timedelta(minutes=15 * i), temperature=temperature, weather_code=code
+            )
+            for i, (temperature, code) in enumerate([(10, 0), (12, 3), (14, 61), (16, 2)])
+        ]
+        rows.append(WeatherObservation(location=self.location, bucket=now - timedelta(minutes=5), temperature=20))
+        rows += [
+            WeatherObservation(
+                location=self.location, bucket=day + timedelta(hours=i), resolution=HOURLY,
+                temperature=temperature, samples=samples
+            )
+            for i, (temperature, samples) in enumerate([(0, 1), (3, 2)])
+        ]
+        rows.append(WeatherObservation(location=self.location, bucket=now - timedelta(days=400), resolution=DAILY))
+        WeatherObservation.objects.bulk_create(rows)
+        
+        call_command('prune_weather', stdout=io.StringIO())
+        
+        stored = {(o.resolution, o.bucket): o for o in WeatherObservation.objects.all()}
+        self.assertEqual(len(stored), 3)
+        hourly = stored[(HOURLY, hour)]
+        self.assertEqual((hourly.temperature, hourly.weather_code, hourly.samples), (13.0, 61, 4))
+        daily = stored[(DAILY, day)]
+        self.assertEqual((daily.temperature, daily.samples), (2.0, 3))
+        self.assertEqual(sum(1 for resolution, _ in stored if resolution == RAW), 1)
+
+
+class IngestTest(APITestCase):
+    """Test the streaming NDJSON ingest endpoint."""
+    
+    def setUp(self):
+        """Create a status and one existing contact."""
+        self.status = ContactStatus.objects.create(name="new")
+        Contact.objects.create(
+            first_name="John", last_name="Doe", phone_number="+48123456789",
+            email="john.doe@example.com", city="Warsaw", status=self.status
+        )
+    
+    def _rows(self, count):
+        return [
+            {"first_name": "Anna", "last_name": "Nowak", "phone_number": f"+48600000{i:03d}",
+             "email": f"anna{i}@example.com", "city": "Lodz", "status": "new"}
+            for i in range(count)
+        ]
+    
+    def _post(self, body, query='', **headers):
+        import json
+        
+        response = self.client.post(
+            reverse('contact-ingest') + query, body, content_type='application/x-ndjson', headers=headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+    
+    def test_streams_a_summary_per_batch(self):
+        """Test rows are written in batches with one summary line each."""
+        import json
+        
+        rows = self._rows(5)
+        rows.append({"first_name": "John", "last_name": "Doe", "phone_number": "+48123456789",
+                     "email": "john.doe@example.com", "city": "Poznan", "status": "new"})
+        body = '\n'.join(json.dumps(row) for row in rows) + '\n'
+        
+        summaries = self._post(body.encode(), '?batch_size=4')
+        
+        self.assertEqual([s['batch'] for s in summaries[:-1]], [1, 2])
+        self.assertEqual((summaries[0]['first_line'], summaries[0]['last_line']), (1, 4))
+        self.assertEqual((summaries[1]['inserted'], summaries[1]['updated']), (1, 1))
+        totals = summaries[-1]
+        self.assertTrue(totals['done'])
+        self.assertEqual((totals['inserted'], totals['updated'], totals['lines']), (5, 1, 6))
+        self.assertEqual(Contact.objects.get(email="john.doe@example.com").city, "Poznan")
+    
+    def test_bad_lines_are_rejected_by_line_number(self):
+        """Test invalid JSON, non-objects and invalid contacts do not stop the upload."""
+        import json
+        
+        good, invalid = self._rows(2)
+        invalid["email"] = "not-an-email"
+        body = '\n'.join([json.dumps(good), '{"first_name": ', '', '[1, 2]', json.dumps(invalid)])
+        
+        summaries = self._post(body.encode())
+        
+        errors = summaries[0]['errors']
+        self.assertEqual([e['line'] for e in errors], [2, 4, 5])
+        self.assertIn('Invalid JSON', errors[0]['error'])
+        self.assertEqual((summaries[-1]['inserted'], summaries[-1]['rejected']), (1, 3))
+    
+    def test_gzip_body(self):
+        """Test a gzip-compressed body is decompressed while it is read."""
+        import gzip
+        import json
+        
+        body = gzip.compress(''.join(json.dumps(row) + '\n' for row in self._rows(3)).encode())
+        
+        summaries = self._post(body, **{'Content-Encoding': 'gzip'})
+        
+        self.assertEqual(summaries[-1]['inserted'], 3)
+        self.assertNotIn('error', summaries[-1])
+    
+    def test_rejects_other_content_types(self):
+        """Test only NDJSON bodies are accepted."""
+        response = self.client.post(reverse('contact-ingest'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        
+        response = self.client.post(
+            reverse('contact-ingest') + '?batch_size=0', b'', content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncViewsTest(TestCase):
+    """Test the async views and the ASGI request path."""
+    
+    def setUp(self):
+        """Create contacts to list and start from an empty cache."""
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.status = ContactStatus.objects.create(name="new")
+        self.lost = ContactStatus.objects.create(name="lost")
+        self.contacts = [
+            Contact.objects.create(
+                first_name=f"Anna{i}", last_name="Nowak", phone_number=f"+48600000{i:03d}",
+                email=f"anna{i}@example.com", city="Lodz", status=self.lost if i == 0 else self.status
+            )
+            for i in range(3)
+        ]
+    
+    def test_views_are_async(self):
+        """Test the list page, API list/retrieve and weather resolve to coroutine views."""
+        from asgiref.sync import iscoroutinefunction
+        from django.urls import resolve
+        
+        for url in [reverse('contact_list'), reverse('contact-list'),
+                    reverse('contact-detail', kwargs={'pk': 1}), reverse('get_weather', kwargs={'city': 'Lodz'})]:
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+        # Other actions keep DRF's sync dispatch behind the same view
+        self.assertFalse(iscoroutinefunction(resolve(reverse('contact-stats')).func))
+    
+    async def test_list_page_and_api_over_asgi(self):
+        """Test the async views answer through the ASGI handler."""
+        response = await self.async_client.get(reverse('contact_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['contacts']), 3)
+        self.assertEqual(response.context['paginator'].count, 3)
+        
+        response = await self.async_client.get(reverse('contact-list'), {'status': 'new'})
+        self.assertEqual(response.json()['count'], 2)
+        
+        pk = self.contacts[0].pk
+        response = await self.async_client.get(reverse('contact-detail', kwargs={'pk': pk}))
+        self.assertEqual(response.json()['status_name'], 'lost')
+        response = await self.async_client.get(reverse('contact-detail', kwargs={'pk': 99999}))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('contact-list'), {'page': 5})
+        self.assertEqual(response.status_code, 404)
+        
+        # Writes on the same route still go through the sync dispatch
+        response = await self.async_client.post(reverse('contact-list'), {
+            "first_name": "Jan", "last_name": "Nowak", "phone_number": "+48600000999",
+            "email": "jan@example.com", "city": "Lodz", "status": self.status.pk,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+    
+    async def test_weather_over_asgi(self):
+        """Test the async weather view geocodes, fetches and stores without blocking."""
+        from unittest import mock
+        from .models import CityLocation, WeatherObservation
+        
+        geocoded = mock.Mock(status_code=200)
+        geocoded.json.return_value = [{'lat': '51.76', 'lon': '19.46'}]
+        current = mock.Mock(status_code=200)
+        current.json.return_value = {
+            'current_weather': {'temperature': 3.5, 'windspeed': 12.0, 'weathercode': 2},
+            'hourly': {'relativehumidity_2m': [80]},
+        }
+        url = reverse('get_weather', kwargs={'city': 'Lodz'})
+        with mock.patch('contacts.weather_views.requests.get', side_effect=[geocoded, current]):
+            response = await self.async_client.get(url)
+        
+        self.assertEqual(response.json()['weather']['temperature'], 3.5)
+        self.assertTrue(await CityLocation.objects.filter(name='Lodz').aexists())
+        self.assertEqual(await WeatherObservation.objects.acount(), 1)
+    
+    async def test_weather_for_other_cities_is_not_stored(self):
+        """Test a city no contact lives in is served from the cache without database writes."""
+        from unittest import mock
+        from .models import CityLocation, WeatherObservation
+        
+        geocoded = mock.Mock(status_code=200)
+        geocoded.json.return_value = [{'lat': '50.06', 'lon': '19.94'}]
+        current = mock.Mock(status_code=200)
+        current.json.return_value = {
+            'current_weather': {'temperature': 4.0, 'windspeed': 8.0, 'weathercode': 1},
+            'hourly': {'relativehumidity_2m': [75]},
+        }
+        url = reverse('get_weather', kwargs={'city': 'Krakow'})
+        with mock.patch('contacts.weather_views.requests.get', side_effect=[geocoded, current]) as get:
+            response = await self.async_client.get(url)
+            response = await self.async_client.get(url)
+        
+        self.assertEqual(response.json()['weather']['temperature'], 4.0)
+        self.assertEqual(get.call_count, 2)
+        self.assertFalse(await CityLocation.objects.aexists())
+        self.assertFalse(await WeatherObservation.objects.aexists())
+    
+    async def test_cache_is_not_used_on_the_event_loop(self):
+        """Test the async views reach the cache through its async methods."""
+        import asyncio
+        from unittest import mock
+        from django.core.cache import cache
+        
+        on_loop = []
+        
+        def tracked(method):
+            original = getattr(cache, method)
+            
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(method)
+                except RuntimeError:
+                    pass
+                return original(*args, **kwargs)
+            return call
+        
+        geocoded = mock.Mock(status_code=200)
+        geocoded.json.return_value = [{'lat': '51.76', 'lon': '19.46'}]
+        current = mock.Mock(status_code=200)
+        current.json.return_value = {'current_weather': {'temperature': 3.5}}
+        with mock.patch.object(cache, 'get', tracked('get')), mock.patch.object(cache, 'set', tracked('set')), \
+                mock.patch.object(cache, 'get_or_set', tracked('get_or_set')), \
+                mock.patch('contacts.weather_views.requests.get', side_effect=[geocoded, current]):
+            for _ in range(2):
+                response = await self.async_client.get(reverse('get_weather', kwargs={'city': 'Lodz'}))
+                self.assertEqual(response.status_code, 200)
+            response = await self.async_client.get(reverse('contact_list'))
+            self.assertEqual(response.status_code, 200)
+        
+        self.assertEqual(on_loop, [])
+    
+    async def test_streaming_responses_iterate_asynchronously(self):
+        """Test the NDJSON ingest streams through an async iterator under ASGI."""
+        import json
+        
+        rows = [{"first_name": "Ola", "last_name": "Lis", "phone_number": f"+48700000{i:03d}",
+                 "email": f"ola{i}@example.com", "city": "Lodz", "status": "new"} for i in range(3)]
+        body = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+        
+        response = await self.async_client.post(
+            reverse('contact-ingest') + '?batch_size=2', body, content_type='application/x-ndjson'
+        )
+        
+        self.assertTrue(response.is_async)
+        lines = [json.loads(line) async for line in response.streaming_content]
+        self.assertEqual([line.get('batch') for line in lines], [1, 2, None])
+        self.assertEqual(lines[-1]['inserted'], 3)
+    
+    def test_serve_command_starts_uvicorn(self):
+        """Test the serve command passes worker and concurrency settings to uvicorn."""
+        import io
+        from unittest import mock
+        from django.core.management import call_command
+        
+        with mock.patch('uvicorn.run') as run:
+            call_command('serve', '--workers', '3', '--limit-concurrency', '50', '--max-requests', '1000',
+                         stdout=io.StringIO())
+        
+        args, kwargs = run.call_args
+        self.assertEqual(args, ('contacts_project.asgi:application',))
+        self.assertEqual((kwargs['workers'], kwargs['limit_concurrency']), (3, 50))
+        self.assertEqual((kwargs['limit_max_requests'], kwargs['limit_max_requests_jitter']), (1000, 100))
+
+
+class SharedCacheTest(TestCase):
+    """Test the SQLite cache backend shared by worker processes."""
+    
+    def make_cache(self, **options):
+        import tempfile
+        from contacts.shared_cache import SQLiteCache
+        
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        return SQLiteCache(f'{root.name}/cache.sqlite3', {'OPTIONS': {'ACCESS_RESOLUTION': 0, **options}})
+    
+    def test_values_round_trip_compactly(self):
+        """Test integers stay native and large pickles are compressed."""
+        cache = self.make_cache()
+        weather = {'temperature': 3.5, 'hourly': [80] * 500}
+        
+        cache.set_many({'count': 7, 'flag': True, 'weather': weather, 'city': 'Łódź'})
+        
+        self.assertEqual(cache.get_many(['count', 'flag', 'weather', 'city', 'missing']),
+                         {'count': 7, 'flag': True, 'weather': weather, 'city': 'Łódź'})
+        self.assertLess(cache.usage()['bytes'], 200)
+        cache.set('gone', 1, 0)
+        self.assertIsNone(cache.get('gone'))
+        self.assertEqual(cache.get_or_set('gone', 2), 2)
+    
+    def test_add_and_incr(self):
+        """Test add only replaces expired entries and incr updates in place."""
+        cache = self.make_cache()
+        
+        self.assertTrue(cache.add('lock', 'a', 30))
+        self.assertFalse(cache.add('lock', 'b', 30))
+        cache.touch('lock', 0)
+        self.assertTrue(cache.add('lock', 'c', 30))
+        self.assertEqual(cache.get('lock'), 'c')
+        
+        cache.set('version', 1)
+        self.assertEqual(cache.incr('version', 10), 11)
+        self.assertEqual(cache.decr('version'), 10)
+        cache.set('huge', 2 ** 63 - 1)
+        self.assertEqual(cache.incr('huge'), 2 ** 63)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+    
+    def test_workers_share_entries_atomically(self):
+        """Test forked processes see each other's writes and never lose an increment."""
+        import multiprocessing
+        cache = self.make_cache()
+        cache.set('counter', 0)
+        
+        def work():
+            for i in range(50):
+                cache.incr('counter')
+                cache.add(f'lock:{i}', 'taken')
+        
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=work) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        self.assertEqual(cache.get('counter'), 150)
+        self.assertEqual(len(cache.get_many([f'lock:{i}' for i in range(50)])), 50)
+    
+    def test_threads_share_pooled_connections(self):
+        """Test a new thread reuses an idle connection instead of opening one."""
+        import threading
+        from unittest import mock
+        cache = self.make_cache()
+        cache.set('city', 'Lodz')
+        
+        with mock.patch.object(cache, '_connect', wraps=cache._connect) as connect:
+            for _ in range(3):
+                thread = threading.Thread(target=cache.get, args=('city',))
+                thread.start()
+                thread.join()
+        
+        self.assertEqual(connect.call_count, 0)
+    
+    def test_evicts_least_recently_used(self):
+        """Test entry and size bounds evict the least recently read entries first."""
+        cache = self.make_cache(MAX_ENTRIES=9, CULL_FREQUENCY=3)
+        for i in range(9):
+            cache.set(f'key{i}', i)
+        cache.get('key0')
+        
+        cache.set('key9', 9)
+        
+        # Down to 6 entries: key1-key4 were the least recently used
+        self.assertEqual(sorted(cache.get_many([f'key{i}' for i in range(10)])),
+                         ['key0', 'key5', 'key6', 'key7', 'key8', 'key9'])
+        
+        cache = self.make_cache(MAX_BYTES=3000)
+        for i in range(10):
+            cache.set(f'page{i}', str(i) * 400)
+        self.assertLessEqual(cache.usage()['bytes'], 3000)
+        self.assertTrue(cache.has_key('page9'))
+        self.assertFalse(cache.has_key('page0'))
+
+
+class LoadgenConnectionTest(unittest.IsolatedAsyncioTestCase):
+    """Test the load generator's keep-alive connection handling."""
+    
+    async def asyncSetUp(self):
+        """Start a server that answers one request, then drops every connection."""
+        import asyncio
+        
+        self.connections = 0
+        
+        async def handle(reader, writer):
+            self.connections += 1
+            await reader.readuntil(b'\r\n\r\n')
+            if self.connections == 1:
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+                await writer.drain()
+                await reader.readuntil(b'\r\n\r\n')
+            writer.close()
+        
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+    
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def test_closed_connection_is_retried_once_for_safe_methods(self):
+        """Test a GET is re-sent on one fresh connection only and a POST is not re-sent."""
+        from .loadgen import HTTPConnection
+        
+        for method, connections in [('GET', 2), ('POST', 1)]:
+            self.connections = 0
+            connection = HTTPConnection('127.0.0.1', self.port, use_ssl=False, timeout=5)
+            response = await connection.request('GET', '/')
+            self.assertEqual(response.body, b'ok')
+            with self.assertRaises(ConnectionError):
+                await connection.request(method, '/', b'{}')
+            connection.close()
+            self.assertEqual(self.connections, connections, method)
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    """Test the HTTP load generator against a live server."""
+    
+    def test_loadtest_reports_per_endpoint_latency(self):
+        """Test a short run reports throughput and percentiles per endpoint."""
+        import asyncio
+        import io
+        import json
+        from .loadgen import LoadTest
+        
+        ContactStatus.objects.create(name="new")
+        record = io.StringIO()
+        test = LoadTest(
+            self.live_server_url,
+            rate=30,
+            concurrency=3,
+            duration=1,
+            mix={'list_page': 2, 'api_list': 1, 'api_create': 1},
+            record=record,
+        )
+        report = asyncio.run(test.run())
+        
+        self.assertGreater(report['total']['requests'], 10)
+        self.assertEqual(report['total']['error_rate'], 0)
+        self.assertIn('list_page', report['endpoints'])
+        self.assertGreater(report['endpoints']['list_page']['p99_ms'], 0)
+        self.assertEqual(len(record.getvalue().splitlines()), report['total']['requests'])
+        self.assertIn(json.loads(record.getvalue().splitlines()[0])['method'], ('GET', 'POST'))
@@ -0,0 +1,91 @@
+"""
+Constraint-first uniqueness handling for contact writes.
+
+By default ContactForm and ContactSerializer check email and phone number
+uniqueness with a SELECT on the normalized keys before the INSERT/UPDATE.
+With CONTACTS_CONSTRAINT_FIRST_WRITES enabled that query is skipped: the
+write goes straight to the database and a unique-constraint violation is
+mapped back to the same field error that ContactForm.Meta.error_messages
+defines. This saves a query per write and closes the race between the
+check and the write.
+"""
+
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+
+# Form field -> column whose unique constraint enforces it, in match order
+UNIQUE_FIELDS = {'phone_number': 'phone_e164', 'email': 'email_normalized'}
+
+
+def constraint_first_enabled():
+    """Check whether writes should rely on database constraints for uniqueness."""
+    return getattr(settings, 'CONTACTS_CONSTRAINT_FIRST_WRITES', False)
+
+
+def unique_error_message(field_name):
+    """Return the user-facing duplicate message for a unique field."""
+    from .forms import ContactForm
+    return ContactForm.Meta.error_messages[field_name]['unique']
+
+
+def unique_field_from_error(exc):
+    """
+    Work out which unique field an IntegrityError refers to.
+
+    PostgreSQL reports the constraint name (e.g.
+    contacts_contact_email_normalized_key), SQLite the column
+    ("UNIQUE constraint failed: contacts_contact.email_normalized").
+
+    Returns:
+        str: Field name, or None if the error is not a known unique violation
+    """
+    cause = exc.__cause__
+    diag = getattr(cause, 'diag', None)
+    candidates = [getattr(diag, 'constraint_name', None) or '', str(exc)]
+    for text in candidates:
+        for field_name, column in UNIQUE_FIELDS.items():
+            if column in text:
+                return field_name
+    return None
+
+
+def check_unique(instance, fields):
+    """
+    Pre-flight uniqueness check for the given fields of an unsaved instance.
+
+    Raises:
+        ValidationError: keyed by field, with the ContactForm messages
+    """
+    exclude = {f.name for f in instance._meta.fields} - set(fields)
+    try:
+        instance.validate_unique(exclude=exclude)
+    except ValidationError as e:
+        raise ValidationError({
+            field_name: [unique_error_message(field_name)] for field_name in e.message_dict
+        }, code='unique')
+
+
+@contextmanager
+def unique_violations_as_errors():
+    """
+    Run a write and turn unique violations into a ValidationError.
+
+    Inside a transaction the write gets a savepoint so the transaction stays
+    usable after the violation; in autocommit mode the failed statement has
+    nothing to roll back and runs on its own.
+
+    Raises:
+        ValidationError: keyed by the offending field, with the same message
+            as the pre-flight check would produce.
+    """
+    try:
+        with transaction.atomic() if connection.in_atomic_block else nullcontext():
+            yield
+    except IntegrityError as e:
+        field_name = unique_field_from_error(e)
+        if field_name is None:
+            raise
+        raise ValidationError({field_name: [unique_error_message(field_name)]}, code='unique')
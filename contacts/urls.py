@@ -8,15 +8,20 @@ from .views import (
     ContactCreateView,
     ContactUpdateView,
     ContactDeleteView,
+    contact_bulk_action,
     import_contacts_csv,
 )
-from .weather_views import get_weather
+from .weather_views import get_weather, get_weather_history
+from .metrics_views import metrics_view
 
 urlpatterns = [
     path('', ContactListView.as_view(), name='contact_list'),
     path('contact/new/', ContactCreateView.as_view(), name='contact_create'),
     path('contact/<int:pk>/edit/', ContactUpdateView.as_view(), name='contact_edit'),
     path('contact/<int:pk>/delete/', ContactDeleteView.as_view(), name='contact_delete'),
+    path('contacts/bulk/', contact_bulk_action, name='contact_bulk_action'),
     path('import-csv/', import_contacts_csv, name='import_csv'),
     path('weather/<str:city>/', get_weather, name='get_weather'),
+    path('weather/<str:city>/history/', get_weather_history, name='get_weather_history'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
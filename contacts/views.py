@@ -2,28 +2,45 @@
 Views for the contacts application.
 
 Includes:
-- Contact list with sorting
+- Contact list with sorting (async)
 - Contact creation, editing, and deletion
-- CSV import functionality
+- CSV import functionality (create-only or upsert)
+- Bulk actions on selected contacts (set status, archive, export)
 """
 
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q
+from django.core.exceptions import ValidationError
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
+from django.utils.http import url_has_allowed_host_and_scheme
 import csv
 import io
+import time
 
-from .models import Contact, ContactStatus
-from .forms import ContactForm, CSVImportForm
+from . import archive, bulk, caching, metrics
+from .db import retry_on_locked
+from .filters import order_by_fields, search_contacts
+from .importers import upsert_contacts
+from .models import ArchivedContact, Contact, ContactStatus
+from .forms import BulkActionForm, ContactForm, CSVImportForm
 
 
 class ContactListView(ListView):
     """
     Display list of contacts with search and sorting functionality.
+    
+    Archived contacts are listed too with ?include_archived=1. Each
+    contact card is a cached template fragment keyed by the contact's id
+    and updated_at and by the statuses version (see contacts.caching), so
+    a page of unchanged contacts is mostly assembled from the cache.
+    
+    The view is async: the count and the page are loaded with the async
+    ORM, and the template is rendered by the handler afterwards (in a
+    worker thread under ASGI).
     """
     model = Contact
     template_name = 'contacts/contact_list.html'
@@ -35,27 +52,51 @@ class ContactListView(ListView):
         
         # Search functionality
         search_query = self.request.GET.get('search', '')
-        if search_query:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(phone_number__icontains=search_query) |
-                Q(city__icontains=search_query)
-            )
+        queryset = search_contacts(queryset, search_query)
         
         # Sorting functionality
         sort_by = self.request.GET.get('sort', '-date_added')
         allowed_sorts = ['last_name', '-last_name', 'date_added', '-date_added', 'first_name', '-first_name']
-        if sort_by in allowed_sorts:
-            queryset = queryset.order_by(sort_by)
+        if sort_by not in allowed_sorts:
+            sort_by = '-date_added'  # The model's default ordering
+        # Names sort by their indexed Polish-alphabet keys
+        ordering = order_by_fields(sort_by)
         
-        return queryset
+        if archive.include_archived(self.request.GET):
+            archived = search_contacts(ArchivedContact.objects.all(), search_query)
+            return archive.combined_rows(queryset, archived, ordering)
+        return queryset.order_by(*ordering)
+    
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        self.count = await queryset.acount()
+        # Page slicing and validation only; the page itself is still lazy
+        paginator, page, rows, is_paginated = self.paginate_queryset(queryset, self.paginate_by)
+        if archive.include_archived(request.GET):
+            # Combined rows only carry ids; load the page's contacts
+            contacts = await archive.ahydrate([row async for row in rows.aiterator()])
+        else:
+            contacts = [contact async for contact in rows.aiterator()]
+        page.object_list = self.object_list = contacts
+        context = await self.aget_context_data(
+            paginator=paginator, page_obj=page, is_paginated=is_paginated
+        )
+        return self.render_to_response(context)
+    
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        paginator.count = self.count  # Counted with acount() in get()
+        return paginator
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    async def aget_context_data(self, **kwargs):
+        context = {'view': self, 'object_list': self.object_list, 'contacts': self.object_list, **kwargs}
         context['search_query'] = self.request.GET.get('search', '')
         context['current_sort'] = self.request.GET.get('sort', '-date_added')
+        context['include_archived'] = archive.include_archived(self.request.GET)
+        context['statuses'] = [status async for status in ContactStatus.objects.order_by('name')]
+        context['card_cache_seconds'] = settings.CONTACTS_CARD_CACHE_SECONDS
+        if context['card_cache_seconds']:
+            context['card_version'] = await caching.aget_version(caching.STATUSES)
         return context
 
 
@@ -67,8 +108,14 @@ class ContactCreateView(CreateView):
     success_url = reverse_lazy('contact_list')
     
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except ValidationError as e:
+            # Duplicate email/phone caught by the database (constraint-first mode)
+            form.add_error(None, e)
+            return self.form_invalid(form)
         messages.success(self.request, 'Contact created successfully!')
-        return super().form_valid(form)
+        return response
     
     def form_invalid(self, form):
         messages.error(self.request, 'Please correct the errors below.')
@@ -83,8 +130,14 @@ class ContactUpdateView(UpdateView):
     success_url = reverse_lazy('contact_list')
     
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except ValidationError as e:
+            # Duplicate email/phone caught by the database (constraint-first mode)
+            form.add_error(None, e)
+            return self.form_invalid(form)
         messages.success(self.request, 'Contact updated successfully!')
-        return super().form_valid(form)
+        return response
     
     def form_invalid(self, form):
         messages.error(self.request, 'Please correct the errors below.')
@@ -102,6 +155,83 @@ class ContactDeleteView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+@require_http_methods(["POST"])
+def contact_bulk_action(request):
+    """
+    Apply a bulk action to the contacts selected on the list page.
+    
+    Set status and archive run set-based (see contacts.bulk); export
+    answers with the CSV download itself.
+    """
+    next_url = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse_lazy('contact_list')
+    
+    form = BulkActionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, ' '.join(errors))
+        return redirect(next_url)
+    
+    if form.cleaned_data['all_matching']:
+        queryset = search_contacts(Contact.objects.all(), form.cleaned_data['search'])
+    else:
+        queryset = Contact.objects.filter(pk__in=form.cleaned_data['ids'])
+    
+    action = form.cleaned_data['action']
+    if action == 'export':
+        return bulk.export_csv(queryset, request=request)
+    if action == 'archive':
+        result = bulk.archive_selected(queryset)
+        messages.success(request, f'Archived {result.moved} contacts.')
+    else:
+        status = form.cleaned_data['status']
+        updated = bulk.set_status(queryset, status)
+        messages.success(request, f'Set status to "{status.name}" for {updated} contacts.')
+    return redirect(next_url)
+
+
+@retry_on_locked
+def _import_row(row):
+    """Create a single contact from a CSV row."""
+    # Get or create status
+    status_name = row.get('status', '').strip()
+    if not status_name:
+        raise ValueError('Status is required')
+    
+    status, _ = ContactStatus.objects.get_or_create(
+        name=status_name,
+        defaults={'description': f'Status: {status_name}'}
+    )
+    
+    # Create contact
+    Contact.objects.create(
+        first_name=row.get('first_name', '').strip(),
+        last_name=row.get('last_name', '').strip(),
+        phone_number=row.get('phone_number', '').strip(),
+        email=row.get('email', '').strip().lower(),
+        city=row.get('city', '').strip(),
+        status=status
+    )
+
+
+def _upsert_csv(request, reader):
+    """Import CSV rows in upsert mode and report the outcome."""
+    started = time.perf_counter()
+    result = upsert_contacts(reader, start=2)  # Row 1 is the header
+    metrics.record_import(result.accepted, result.rejected, time.perf_counter() - started)
+    
+    messages.success(
+        request,
+        f'Imported contacts: {result.inserted} inserted, {result.updated} updated, '
+        f'{result.unchanged} unchanged, {result.rejected} rejected.'
+    )
+    if result.errors:
+        errors = [f"Row {row_num}: {message}" for row_num, message in result.errors[:5]]
+        messages.warning(request, 'First 5 errors: ' + '; '.join(errors))
+    return redirect('contact_list')
+
+
 @require_http_methods(["GET", "POST"])
 def import_contacts_csv(request):
     """
@@ -121,37 +251,25 @@ def import_contacts_csv(request):
                 io_string = io.StringIO(decoded_file)
                 reader = csv.DictReader(io_string)
                 
+                if form.cleaned_data['mode'] == 'upsert':
+                    return _upsert_csv(request, reader)
+                
                 success_count = 0
                 error_count = 0
                 errors = []
+                started = time.perf_counter()
                 
                 for row_num, row in enumerate(reader, start=2):  # Start from 2 (header is row 1)
                     try:
-                        # Get or create status
-                        status_name = row.get('status', '').strip()
-                        if not status_name:
-                            raise ValueError('Status is required')
-                        
-                        status, _ = ContactStatus.objects.get_or_create(
-                            name=status_name,
-                            defaults={'description': f'Status: {status_name}'}
-                        )
-                        
-                        # Create contact
-                        Contact.objects.create(
-                            first_name=row.get('first_name', '').strip(),
-                            last_name=row.get('last_name', '').strip(),
-                            phone_number=row.get('phone_number', '').strip(),
-                            email=row.get('email', '').strip().lower(),
-                            city=row.get('city', '').strip(),
-                            status=status
-                        )
+                        _import_row(row)
                         success_count += 1
                         
                     except Exception as e:
                         error_count += 1
                         errors.append(f"Row {row_num}: {str(e)}")
                 
+                metrics.record_import(success_count, error_count, time.perf_counter() - started)
+                
                 # Show results
                 if success_count > 0:
                     messages.success(request, f'Successfully imported {success_count} contacts.')
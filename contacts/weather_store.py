@@ -0,0 +1,168 @@
+"""
+Local time series of weather observations.
+
+Includes:
+- bucket_start: start of the time bucket a moment falls in
+- current / record (and acurrent / arecord): the observation of the
+  current 15-minute bucket
+- history: observations of a city over a time range
+- downsample / prune: fold old observations into hourly and daily
+  averages and drop the oldest ones
+
+Each city keeps one row per 15 minutes for RAW_DAYS, one per hour up to
+HOURLY_DAYS and one per day up to KEEP_DAYS, so a city looked up around
+the clock stays at roughly 190 + 670 + 335 rows however long the app
+runs. Weather lookups read the current bucket here before calling
+Open-Meteo, and history is served from this table only.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import WeatherObservation
+
+RAW, HOURLY, DAILY = 900, 3600, 86400  # Bucket lengths in seconds
+
+RAW_DAYS = 2
+HOURLY_DAYS = 30
+KEEP_DAYS = 365
+
+# Averaged fields; weather_code keeps the most severe (highest) code
+AVERAGED_FIELDS = ['temperature', 'humidity', 'wind_speed']
+
+
+def bucket_start(moment, resolution=RAW):
+    """Start (UTC) of the bucket of the given length containing moment."""
+    seconds = int(moment.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % resolution, tz=dt_timezone.utc)
+
+
+def as_dict(observation):
+    """Weather fields of an observation, as get_weather_data returns them."""
+    return {
+        'temperature': observation.temperature,
+        'wind_speed': observation.wind_speed,
+        'humidity': observation.humidity,
+        'weather_code': observation.weather_code,
+    }
+
+
+def _current(location, now):
+    return WeatherObservation.objects.filter(location=location, bucket=bucket_start(now or timezone.now()))
+
+
+def current(location, now=None):
+    """Observation of the current 15-minute bucket, or None."""
+    return _current(location, now).first()
+
+
+async def acurrent(location, now=None):
+    """Async current()."""
+    return await _current(location, now).afirst()
+
+
+def _observation_fields(weather):
+    return {
+        'resolution': RAW,
+        'temperature': weather.get('temperature'),
+        'humidity': None if weather.get('humidity') is None else round(weather['humidity']),
+        'wind_speed': weather.get('wind_speed'),
+        'weather_code': weather.get('weather_code'),
+        'samples': 1,
+    }
+
+
+def record(location, weather, now=None):
+    """Store weather (a get_weather_data dict) as the current bucket's observation."""
+    observation, _ = WeatherObservation.objects.update_or_create(
+        location=location, bucket=bucket_start(now or timezone.now()), defaults=_observation_fields(weather)
+    )
+    return observation
+
+
+async def arecord(location, weather, now=None):
+    """Async record()."""
+    observation, _ = await WeatherObservation.objects.aupdate_or_create(
+        location=location, bucket=bucket_start(now or timezone.now()), defaults=_observation_fields(weather)
+    )
+    return observation
+
+
+def history(location, since, until):
+    """Observations of a location with since <= bucket < until, oldest first."""
+    return WeatherObservation.objects.filter(
+        location=location, bucket__gte=since, bucket__lt=until
+    ).order_by('bucket')
+
+
+def downsample(source, target, older_than):
+    """
+    Replace observations of one resolution by averages over longer buckets.
+
+    Only whole target buckets before older_than are folded, so a bucket is
+    never split between resolutions. Averages are weighted by samples.
+
+    Args:
+        source: Resolution (seconds) of the rows to fold
+        target: Resolution (seconds) of the rows written
+        older_than: Cutoff datetime
+
+    Returns:
+        tuple: (rows removed, rows written)
+    """
+    cutoff = bucket_start(older_than, target)
+    rows = WeatherObservation.objects.filter(resolution=source, bucket__lt=cutoff)
+    kind = 'hour' if target == HOURLY else 'day'
+    sums = {}
+    for name in AVERAGED_FIELDS:
+        sums[f'{name}_sum'] = Sum(F(name) * F('samples'))
+        sums[f'{name}_weight'] = Sum('samples', filter=Q(**{f'{name}__isnull': False}))
+
+    with transaction.atomic():
+        groups = list(
+            rows.annotate(period=Trunc('bucket', kind, tzinfo=dt_timezone.utc))
+            .values('location_id', 'period')
+            .annotate(**sums, max_code=Max('weather_code'), total_samples=Sum('samples'))
+            .order_by()
+        )
+        if not groups:
+            return 0, 0
+        folded = []
+        for group in groups:
+            averages = {
+                name: group[f'{name}_sum'] / group[f'{name}_weight'] if group[f'{name}_weight'] else None
+                for name in AVERAGED_FIELDS
+            }
+            if averages['humidity'] is not None:
+                averages['humidity'] = round(averages['humidity'])
+            folded.append(WeatherObservation(
+                location_id=group['location_id'],
+                bucket=group['period'],
+                resolution=target,
+                weather_code=group['max_code'],
+                samples=group['total_samples'],
+                **averages,
+            ))
+        removed, _ = rows.delete()
+        WeatherObservation.objects.bulk_create(folded, batch_size=1000)
+    return removed, len(folded)
+
+
+def prune(raw_days=RAW_DAYS, hourly_days=HOURLY_DAYS, keep_days=KEEP_DAYS, now=None):
+    """
+    Apply the retention policy.
+
+    Returns:
+        dict: rows folded into hourly and daily buckets and rows deleted
+    """
+    if not raw_days <= hourly_days <= keep_days:
+        raise ValueError('Expected raw_days <= hourly_days <= keep_days.')
+    now = now or timezone.now()
+    folded_hourly, _ = downsample(RAW, HOURLY, now - timedelta(days=raw_days))
+    folded_daily, _ = downsample(HOURLY, DAILY, now - timedelta(days=hourly_days))
+    deleted, _ = WeatherObservation.objects.filter(bucket__lt=now - timedelta(days=keep_days)).delete()
+    return {'folded_hourly': folded_hourly, 'folded_daily': folded_daily, 'deleted': deleted}
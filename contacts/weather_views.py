@@ -5,15 +5,26 @@ Integrates with:
 1. OpenStreetMap Nominatim API - for geocoding city names to coordinates
 2. Open-Meteo API - for fetching current weather data
 
-Implements caching to reduce API requests.
+Implements caching to reduce API requests. Coordinates of contact cities
+are also stored in CityLocation, where proximity queries (contacts.geo) use them,
+and weather observations in WeatherObservation (contacts.weather_store),
+which is read before Open-Meteo and serves the weather history.
 """
 
+from datetime import datetime, time, timedelta
+
 import requests
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_http_methods
 import logging
 
+from . import metrics, weather_store
+from .models import CityLocation, Contact
+
 logger = logging.getLogger(__name__)
 
 # API endpoints
@@ -24,11 +35,75 @@ OPEN_METEO_API = "https://api.open-meteo.com/v1/forecast"
 CACHE_TIMEOUT = 1800
 
 
+def _fetch_coordinates(city_name):
+    """Ask Nominatim for a city; (lat, lon) or None. Raises on HTTP errors."""
+    headers = {
+        'User-Agent': 'ContactsApp/1.0'  # Nominatim requires User-Agent
+    }
+    params = {
+        'q': city_name,
+        'format': 'json',
+        'limit': 1
+    }
+    
+    with metrics.track_upstream('nominatim'):
+        response = requests.get(NOMINATIM_API, params=params, headers=headers, timeout=5)
+        response.raise_for_status()
+    
+    data = response.json()
+    if data and len(data) > 0:
+        return float(data[0]['lat']), float(data[0]['lon'])
+    return None
+
+
+def _fetch_weather(latitude, longitude):
+    """Ask Open-Meteo for the current weather; a dict or None. Raises on HTTP errors."""
+    params = {
+        'latitude': latitude,
+        'longitude': longitude,
+        'current_weather': 'true',
+        'hourly': 'relativehumidity_2m',
+        'forecast_days': 1
+    }
+    
+    with metrics.track_upstream('open_meteo'):
+        response = requests.get(OPEN_METEO_API, params=params, timeout=5)
+        response.raise_for_status()
+    
+    data = response.json()
+    if 'current_weather' not in data:
+        return None
+    current = data['current_weather']
+    # Get current humidity from hourly data
+    humidity = None
+    if 'hourly' in data and 'relativehumidity_2m' in data['hourly']:
+        humidity = data['hourly']['relativehumidity_2m'][0]
+    
+    return {
+        'temperature': current.get('temperature'),
+        'wind_speed': current.get('windspeed'),
+        'humidity': humidity,
+        'weather_code': current.get('weathercode')
+    }
+
+
+def _storable(city_name):
+    """Only contact cities are stored; other lookups stay in the cache."""
+    return (len(city_name) <= CityLocation._meta.get_field('name').max_length
+            and Contact.objects.filter(city=city_name).exists())
+
+
+async def _astorable(city_name):
+    return (len(city_name) <= CityLocation._meta.get_field('name').max_length
+            and await Contact.objects.filter(city=city_name).aexists())
+
+
 def get_city_coordinates(city_name):
     """
     Get latitude and longitude for a city using OpenStreetMap Nominatim API.
     
-    Results are cached to reduce API calls.
+    Results are cached to reduce API calls. Cities contacts live in are also
+    stored in CityLocation, which is consulted before calling the API.
     
     Args:
         city_name (str): Name of the city
@@ -39,33 +114,63 @@ def get_city_coordinates(city_name):
     # Check cache first
     cache_key = f"coords_{city_name.lower()}"
     cached_coords = cache.get(cache_key)
+    metrics.record_cache_lookup('coords', bool(cached_coords))
     if cached_coords:
         return cached_coords
     
+    stored = CityLocation.objects.filter(name=city_name).values_list('latitude', 'longitude').first()
+    if stored:
+        cache.set(cache_key, stored, CACHE_TIMEOUT)
+        return stored
+    
     try:
-        # Request to Nominatim API
-        headers = {
-            'User-Agent': 'ContactsApp/1.0'  # Nominatim requires User-Agent
-        }
-        params = {
-            'q': city_name,
-            'format': 'json',
-            'limit': 1
-        }
+        coords = _fetch_coordinates(city_name)
+        if coords is None:
+            return None, None
         
-        response = requests.get(NOMINATIM_API, params=params, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        data = response.json()
-        if data and len(data) > 0:
-            lat = float(data[0]['lat'])
-            lon = float(data[0]['lon'])
-            
-            # Cache the result
-            cache.set(cache_key, (lat, lon), CACHE_TIMEOUT)
-            return lat, lon
+        # Cache the result and keep it for proximity queries
+        lat, lon = coords
+        cache.set(cache_key, coords, CACHE_TIMEOUT)
+        if _storable(city_name):
+            CityLocation.objects.update_or_create(name=city_name, defaults={'latitude': lat, 'longitude': lon})
+        return coords
         
+    except Exception as e:
+        logger.error(f"Error fetching coordinates for {city_name}: {str(e)}")
         return None, None
+
+
+async def aget_city_coordinates(city_name):
+    """
+    Async get_city_coordinates().
+    
+    The database is read and written with the async ORM and the Nominatim
+    call runs in a thread pool, so a slow upstream does not hold the event
+    loop. The cache is used through its async methods too: the default
+    SQLiteCache reads and writes a file and may wait on another worker's
+    write lock.
+    """
+    cache_key = f"coords_{city_name.lower()}"
+    cached_coords = await cache.aget(cache_key)
+    metrics.record_cache_lookup('coords', bool(cached_coords))
+    if cached_coords:
+        return cached_coords
+    
+    stored = await CityLocation.objects.filter(name=city_name).values_list('latitude', 'longitude').afirst()
+    if stored:
+        await cache.aset(cache_key, stored, CACHE_TIMEOUT)
+        return stored
+    
+    try:
+        coords = await sync_to_async(_fetch_coordinates, thread_sensitive=False)(city_name)
+        if coords is None:
+            return None, None
+        
+        lat, lon = coords
+        await cache.aset(cache_key, coords, CACHE_TIMEOUT)
+        if await _astorable(city_name):
+            await CityLocation.objects.aupdate_or_create(name=city_name, defaults={'latitude': lat, 'longitude': lon})
+        return coords
         
     except Exception as e:
         logger.error(f"Error fetching coordinates for {city_name}: {str(e)}")
@@ -76,7 +181,9 @@ def get_weather_data(latitude, longitude):
     """
     Get current weather data for given coordinates using Open-Meteo API.
     
-    Results are cached to reduce API calls.
+    Results are cached to reduce API calls. For geocoded cities the
+    observation of the current 15-minute bucket is read from (and stored
+    in) WeatherObservation before calling the API.
     
     Args:
         latitude (float): Latitude
@@ -88,43 +195,58 @@ def get_weather_data(latitude, longitude):
     # Check cache first
     cache_key = f"weather_{latitude}_{longitude}"
     cached_weather = cache.get(cache_key)
+    metrics.record_cache_lookup('weather', bool(cached_weather))
     if cached_weather:
         return cached_weather
     
+    # Coordinates come from CityLocation, so they match exactly
+    location = CityLocation.objects.filter(latitude=latitude, longitude=longitude).first()
+    observation = weather_store.current(location) if location else None
+    if observation:
+        weather_data = weather_store.as_dict(observation)
+        cache.set(cache_key, weather_data, 900)
+        return weather_data
+    
     try:
-        # Request to Open-Meteo API
-        params = {
-            'latitude': latitude,
-            'longitude': longitude,
-            'current_weather': 'true',
-            'hourly': 'relativehumidity_2m',
-            'forecast_days': 1
-        }
+        weather_data = _fetch_weather(latitude, longitude)
+        if weather_data is None:
+            return None
         
-        response = requests.get(OPEN_METEO_API, params=params, timeout=5)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if 'current_weather' in data:
-            current = data['current_weather']
-            # Get current humidity from hourly data
-            humidity = None
-            if 'hourly' in data and 'relativehumidity_2m' in data['hourly']:
-                humidity = data['hourly']['relativehumidity_2m'][0]
-            
-            weather_data = {
-                'temperature': current.get('temperature'),
-                'wind_speed': current.get('windspeed'),
-                'humidity': humidity,
-                'weather_code': current.get('weathercode')
-            }
-            
-            # Cache the result (shorter timeout for weather - 15 minutes)
-            cache.set(cache_key, weather_data, 900)
-            return weather_data
+        # Cache the result (shorter timeout for weather - 15 minutes)
+        cache.set(cache_key, weather_data, 900)
+        if location:
+            weather_store.record(location, weather_data)
+        return weather_data
         
+    except Exception as e:
+        logger.error(f"Error fetching weather for {latitude}, {longitude}: {str(e)}")
         return None
+
+
+async def aget_weather_data(latitude, longitude):
+    """Async get_weather_data() (see aget_city_coordinates)."""
+    cache_key = f"weather_{latitude}_{longitude}"
+    cached_weather = await cache.aget(cache_key)
+    metrics.record_cache_lookup('weather', bool(cached_weather))
+    if cached_weather:
+        return cached_weather
+    
+    location = await CityLocation.objects.filter(latitude=latitude, longitude=longitude).afirst()
+    observation = await weather_store.acurrent(location) if location else None
+    if observation:
+        weather_data = weather_store.as_dict(observation)
+        await cache.aset(cache_key, weather_data, 900)
+        return weather_data
+    
+    try:
+        weather_data = await sync_to_async(_fetch_weather, thread_sensitive=False)(latitude, longitude)
+        if weather_data is None:
+            return None
+        
+        await cache.aset(cache_key, weather_data, 900)
+        if location:
+            await weather_store.arecord(location, weather_data)
+        return weather_data
         
     except Exception as e:
         logger.error(f"Error fetching weather for {latitude}, {longitude}: {str(e)}")
@@ -132,12 +254,13 @@ def get_weather_data(latitude, longitude):
 
 
 @require_http_methods(["GET"])
-def get_weather(request, city):
+async def get_weather(request, city):
     """
     API endpoint to get weather data for a city.
     
     Returns JSON with temperature, humidity, and wind speed.
-    Implements caching to minimize API requests.
+    Implements caching to minimize API requests. Async, so requests
+    waiting on Nominatim or Open-Meteo do not tie up a worker thread.
     
     Args:
         request: HTTP request
@@ -150,7 +273,7 @@ def get_weather(request, city):
         return JsonResponse({'error': 'City parameter is required'}, status=400)
     
     # Get coordinates
-    lat, lon = get_city_coordinates(city)
+    lat, lon = await aget_city_coordinates(city)
     if lat is None or lon is None:
         return JsonResponse({
             'error': 'City not found',
@@ -158,7 +281,7 @@ def get_weather(request, city):
         }, status=404)
     
     # Get weather data
-    weather_data = get_weather_data(lat, lon)
+    weather_data = await aget_weather_data(lat, lon)
     if weather_data is None:
         return JsonResponse({
             'error': 'Weather data not available',
@@ -181,3 +304,63 @@ def get_weather(request, city):
             'wind_speed_unit': 'km/h'
         }
     })
+
+
+@require_http_methods(["GET"])
+def get_weather_history(request, city):
+    """
+    Stored weather observations of a city, served without calling any API.
+    
+    Query parameters:
+        date: A day (YYYY-MM-DD, local time) to return
+        hours: Otherwise the last N hours (default 24, at most 8784)
+    
+    Older observations are hourly or daily averages (see the prune_weather
+    command); each carries its resolution and number of samples.
+    
+    Returns:
+        JsonResponse: city and observations, oldest first
+    """
+    location = CityLocation.objects.filter(name=city).first()
+    if location is None:
+        return JsonResponse({'error': 'No weather stored for this city', 'city': city}, status=404)
+    
+    if request.GET.get('date'):
+        try:
+            day = parse_date(request.GET['date'])
+        except ValueError:
+            # Well-formed but impossible, e.g. 2024-02-30
+            day = None
+        if day is None:
+            return JsonResponse({'error': 'date must be YYYY-MM-DD'}, status=400)
+        since = timezone.make_aware(datetime.combine(day, time.min))
+        until = since + timedelta(days=1)
+    else:
+        try:
+            hours = int(request.GET.get('hours', 24))
+            if not 1 <= hours <= 8784:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({'error': 'hours must be between 1 and 8784'}, status=400)
+        until = timezone.now()
+        since = until - timedelta(hours=hours)
+    
+    observations = weather_store.history(location, since, until)
+    return JsonResponse({
+        'city': location.name,
+        'coordinates': {
+            'latitude': location.latitude,
+            'longitude': location.longitude
+        },
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'observations': [
+            {
+                'time': observation.bucket.isoformat(),
+                'resolution_minutes': observation.resolution // 60,
+                'samples': observation.samples,
+                **weather_store.as_dict(observation),
+            }
+            for observation in observations
+        ],
+    })
@@ -2,6 +2,7 @@
 Django settings for contacts_project project.
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -34,13 +35,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'contacts.middleware.MetricsMiddleware',
+    'contacts.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'contacts.middleware.StaticFilesMiddleware',
+    'contacts.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'contacts.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'contacts_project.urls'
@@ -67,12 +73,110 @@ WSGI_APPLICATION = 'contacts_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE selects the backend: "sqlite" (default) or "postgresql".
+# PostgreSQL is configured from the same POSTGRES_* variables as the
+# official Docker image.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # With DB_POOL=1 (default) connections come from a psycopg pool shared by
+    # the worker's threads; Django requires CONN_MAX_AGE=0 in that case.
+    # Without the pool, connections persist for DB_CONN_MAX_AGE seconds.
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'contacts'),
+            'USER': os.environ.get('POSTGRES_USER', 'contacts'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
-}
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Opt-in SQLite profile for concurrent writers: WAL journaling, relaxed
+# fsync and larger caches (see contacts.db), and BEGIN IMMEDIATE for every
+# transaction so writers queue on busy_timeout instead of failing with
+# "database is locked".
+SQLITE_PERFORMANCE_MODE = os.environ.get('SQLITE_PERFORMANCE_MODE', '0') == '1'
+if SQLITE_PERFORMANCE_MODE and DB_ENGINE == 'sqlite':
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+    }
+
+# Country calling code assumed for phone numbers typed without one
+# (used to build the normalized phone_e164 key)
+CONTACTS_DEFAULT_COUNTRY_CODE = os.environ.get('CONTACTS_DEFAULT_COUNTRY_CODE', '48')
+
+# Change feed (/api/contacts/changes/): changes younger than this are held
+# back so transactions that commit out of order are not skipped
+CONTACTS_CHANGES_SETTLE_SECONDS = float(os.environ.get('CONTACTS_CHANGES_SETTLE_SECONDS', '2'))
+
+# Typeahead (/api/contacts/suggest/): how long results are cached per prefix.
+# Contact writes invalidate them earlier (see contacts.caching).
+CONTACTS_SUGGEST_CACHE_SECONDS = int(os.environ.get('CONTACTS_SUGGEST_CACHE_SECONDS', '60'))
+
+# Contact list page: how long each rendered contact card is cached (0 turns
+# fragment caching off). Keys change with the contact's updated_at and the
+# statuses version, so edits never show a stale card.
+CONTACTS_CARD_CACHE_SECONDS = int(os.environ.get('CONTACTS_CARD_CACHE_SECONDS', '3600'))
+
+# Constraint-first writes: skip the uniqueness SELECTs for email and phone
+# number and map unique-constraint violations back to field errors instead
+# (see contacts.uniqueness).
+CONTACTS_CONSTRAINT_FIRST_WRITES = os.environ.get('CONTACTS_CONSTRAINT_FIRST_WRITES', '0') == '1'
+
+# Retry policy for writes wrapped in contacts.db.retry_on_locked
+DB_LOCK_RETRY_ATTEMPTS = 5
+DB_LOCK_RETRY_DELAY = 0.05
+
+# Read replicas
+# SQLITE_REPLICA_PATHS or POSTGRES_REPLICA_HOSTS (comma-separated) add
+# replica1, replica2, ... aliases. When any exist, contacts.db_routers sends
+# reads to them and keeps writes, transactions and recently-writing clients
+# on the primary.
+if DB_ENGINE == 'postgresql':
+    _replica_overrides = [
+        {'HOST': host.strip()}
+        for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()
+    ]
+else:
+    _replica_overrides = [
+        {'NAME': path.strip()}
+        for path in os.environ.get('SQLITE_REPLICA_PATHS', '').split(',') if path.strip()
+    ]
+
+DATABASE_REPLICAS = []
+for _index, _overrides in enumerate(_replica_overrides, start=1):
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        **_overrides,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['contacts.db_routers.PrimaryReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_PIN_SECONDS = 5
+REPLICA_HEALTH_CHECK_INTERVAL = 10
 
 
 # Password validation
@@ -111,7 +215,32 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-# STATICFILES_DIRS = [BASE_DIR / 'static']  # Not needed - using Bootstrap CDN
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic writes content-hashed copies plus .gz/.br variants, which
+# contacts.middleware.StaticFilesMiddleware serves with far-future caching
+# (see contacts.static_assets)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'contacts.static_assets.CompressedManifestStaticFilesStorage'},
+}
+
+# Cache lifetime in seconds of static files without a content hash
+CONTACTS_STATIC_MAX_AGE = int(os.environ.get('CONTACTS_STATIC_MAX_AGE', '300'))
+
+# JSON and HTML responses at least this large are gzipped
+CONTACTS_COMPRESS_MIN_BYTES = int(os.environ.get('CONTACTS_COMPRESS_MIN_BYTES', '1024'))
+
+# ASGI server started by `python manage.py serve` (uvicorn). Each worker is
+# a process with one event loop. ASGI_LIMIT_CONCURRENCY caps the requests a
+# worker serves at once (the rest get 503); each of them may hold a database
+# connection, so with PostgreSQL requests beyond DB_POOL_MAX_SIZE wait up to
+# DB_POOL_TIMEOUT for one. ASGI_MAX_REQUESTS=0 never recycles workers.
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', str(os.cpu_count() or 1)))
+ASGI_LIMIT_CONCURRENCY = int(os.environ.get('ASGI_LIMIT_CONCURRENCY', '100'))
+ASGI_BACKLOG = int(os.environ.get('ASGI_BACKLOG', '2048'))
+ASGI_KEEPALIVE_SECONDS = int(os.environ.get('ASGI_KEEPALIVE_SECONDS', '5'))
+ASGI_MAX_REQUESTS = int(os.environ.get('ASGI_MAX_REQUESTS', '0'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -127,3 +256,38 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
 }
+
+# Cache
+# One SQLite file shared by all worker processes on a host (see
+# contacts.shared_cache), so weather, geocoding and typeahead entries are
+# fetched once per host and survive restarts. Bounded by CACHE_MAX_ENTRIES
+# and CACHE_MAX_BYTES with least-recently-used eviction.
+# Set CACHE_PATH to an empty string for a per-process LocMemCache (always
+# the case under contacts_project.test_settings).
+CACHE_PATH = os.environ.get('CACHE_PATH', str(BASE_DIR / 'var' / 'cache' / 'cache.sqlite3'))
+if CACHE_PATH:
+    CACHES = {
+        'default': {
+            'BACKEND': 'contacts.shared_cache.SQLiteCache',
+            'LOCATION': CACHE_PATH,
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '50000')),
+                'MAX_BYTES': int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+            },
+        }
+    }
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Metrics
+# Snapshot directory shared by all worker processes on a host.
+# Set METRICS_DIR to an empty string to keep metrics per process only
+# (always the case under contacts_project.test_settings).
+METRICS_DIR = os.environ.get('METRICS_DIR', str(BASE_DIR / 'var' / 'metrics')) or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+
+# Request profiler
+# Staff users can profile any request with ?_profile=1 or an "X-Profile: 1"
+# header; results are listed in the admin under "Request profiles".
+REQUEST_PROFILER_ENABLED = os.environ.get('REQUEST_PROFILER_ENABLED', '1') == '1'
+REQUEST_PROFILER_MAX_PROFILES = 200
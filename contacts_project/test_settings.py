@@ -0,0 +1,15 @@
+"""
+Django settings for test runs.
+
+Tests run next to real workers on the same host: they keep their metrics
+and cache to themselves instead of using the workers' shared files (tests
+clear the cache). `manage.py test` selects this module; other runners
+(pytest-django, CI) are pointed at it with DJANGO_SETTINGS_MODULE.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+CACHE_PATH = ''
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+METRICS_DIR = None
@@ -6,6 +6,10 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    if sys.argv[1:2] == ['test']:
+        # Even where DJANGO_SETTINGS_MODULE names the production settings
+        # (docker-compose), tests stay off the shared cache and metrics files
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'contacts_project.test_settings'
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'contacts_project.settings')
     try:
         from django.core.management import execute_from_command_line
@@ -229,3 +229,136 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+
+// Typeahead suggestions for the contact search box
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.getElementById('contactSearch');
+    const list = document.getElementById('searchSuggestions');
+    
+    if (!input || !list) return; // Exit if search box doesn't exist
+    
+    const DEBOUNCE_MS = 200;
+    const suggestionCache = new Map();
+    let timer = null;
+    let controller = null;
+    
+    input.addEventListener('input', function() {
+        // Wait until typing pauses instead of querying on every keystroke
+        clearTimeout(timer);
+        timer = setTimeout(() => loadSuggestions(input.value.trim()), DEBOUNCE_MS);
+    });
+    
+    input.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') hideSuggestions();
+    });
+    
+    document.addEventListener('click', function(event) {
+        if (!list.contains(event.target) && event.target !== input) hideSuggestions();
+    });
+    
+    function loadSuggestions(query) {
+        if (!query) {
+            hideSuggestions();
+            return;
+        }
+        if (suggestionCache.has(query)) {
+            showSuggestions(suggestionCache.get(query));
+            return;
+        }
+        
+        // Cancel the request for an older prefix that is still in flight
+        if (controller) controller.abort();
+        controller = new AbortController();
+        
+        fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}&limit=8`, { signal: controller.signal })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Suggestions not available');
+                }
+                return response.json();
+            })
+            .then(data => {
+                suggestionCache.set(query, data);
+                if (input.value.trim() === query) showSuggestions(data);
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') hideSuggestions();
+            });
+    }
+    
+    function showSuggestions(data) {
+        list.replaceChildren();
+        
+        data.contacts.forEach(contact => {
+            const item = document.createElement('a');
+            item.className = 'list-group-item list-group-item-action';
+            item.href = `/contact/${contact.id}/edit/`;
+            item.textContent = `${contact.first_name} ${contact.last_name}`;
+            
+            const details = document.createElement('small');
+            details.className = 'text-muted ms-2';
+            details.textContent = `${contact.email} · ${contact.city}`;
+            item.appendChild(details);
+            list.appendChild(item);
+        });
+        
+        data.cities.forEach(city => {
+            const item = document.createElement('a');
+            item.className = 'list-group-item list-group-item-action';
+            item.href = `?search=${encodeURIComponent(city.city)}`;
+            item.textContent = city.city;
+            
+            const badge = document.createElement('span');
+            badge.className = 'badge bg-secondary float-end';
+            badge.textContent = city.count;
+            item.appendChild(badge);
+            list.appendChild(item);
+        });
+        
+        list.classList.toggle('d-none', list.children.length === 0);
+    }
+    
+    function hideSuggestions() {
+        list.classList.add('d-none');
+        list.replaceChildren();
+    }
+});
+
+
+// Selection for the bulk actions toolbar on the contact list
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('bulkForm');
+    
+    if (!form) return; // Exit if the list has no contacts
+    
+    const checkboxes = document.querySelectorAll('.bulk-select');
+    const selectPage = document.getElementById('bulkSelectPage');
+    const allMatching = document.getElementById('bulkAllMatching');
+    const count = document.getElementById('bulkCount');
+    const buttons = form.querySelectorAll('.bulk-action');
+    
+    function updateSelection() {
+        const checked = Array.from(checkboxes).filter(checkbox => checkbox.checked).length;
+        const everything = allMatching && allMatching.checked;
+        
+        count.textContent = everything ? 'All matching selected' : `${checked} selected`;
+        selectPage.checked = checkboxes.length > 0 && checked === checkboxes.length;
+        buttons.forEach(button => { button.disabled = !everything && checked === 0; });
+    }
+    
+    selectPage.addEventListener('change', function() {
+        checkboxes.forEach(checkbox => { checkbox.checked = selectPage.checked; });
+        updateSelection();
+    });
+    checkboxes.forEach(checkbox => checkbox.addEventListener('change', updateSelection));
+    if (allMatching) allMatching.addEventListener('change', updateSelection);
+    
+    form.addEventListener('submit', function(event) {
+        if (event.submitter && event.submitter.value === 'archive' &&
+            !confirm('Move the selected contacts to the archive?')) {
+            event.preventDefault();
+        }
+    });
+    
+    updateSelection();
+});